@@ -0,0 +1,231 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, TextIO
+
+# how often the board is redrawn, in seconds
+REFRESH_INTERVAL = 0.5
+
+
+@dataclass
+class BatchSpec:
+    """A spec of the batch, with the workspace and the log it gets, and how its run went."""
+    name: str
+    spec_file: str
+    workspace: str
+    log_file: str
+    status: str = "queued"
+    wall_time: float = 0
+    error: str = ""
+    result: Optional[Dict[str, Any]] = None
+
+
+def find_specs(specs_folder: str, output: str, only: List[str]) -> List[BatchSpec]:
+    """Every `.txt` spec of the folder gets its own workspace, and log, in the output folder."""
+    specs = []
+
+    for spec_file in sorted(f for f in os.listdir(specs_folder) if f.endswith(".txt")):
+        name = os.path.splitext(spec_file)[0]
+        if only and name not in only:
+            continue
+
+        specs.append(BatchSpec(name=name,
+                               spec_file=os.path.abspath(os.path.join(specs_folder, spec_file)),
+                               workspace=os.path.abspath(os.path.join(output, name)),
+                               log_file=os.path.abspath(os.path.join(output, f"{name}.log"))))
+
+    return specs
+
+
+def run_batch(specs: List[BatchSpec],
+              workers: int,
+              cache_dir: str,
+              response_cache: bool,
+              board: Optional["BatchBoard"] = None) -> List[BatchSpec]:
+    """
+    Runs the specs in a pool of processes, each spec into its own workspace.
+    The workers share the on-disk API cache (and the response cache, if
+    enabled) from the cache folder.
+    """
+    board = board or BatchBoard(specs)
+
+    for spec in specs:
+        # the log is created when a worker picks the spec, that's how the board knows it's running
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(spec.log_file)
+        os.makedirs(os.path.dirname(spec.log_file), exist_ok=True)
+
+    # spawn, so the workers don't inherit the threads and the sockets of this process
+    context = multiprocessing.get_context("spawn")
+
+    with concurrent.futures.ProcessPoolExecutor(workers,
+                                                mp_context=context,
+                                                initializer=init_worker,
+                                                initargs=(os.path.abspath(cache_dir), response_cache)) as pool:
+        futures = {pool.submit(run_batch_spec, spec.spec_file, spec.workspace, spec.log_file): spec
+                   for spec in specs}
+        pending = set(futures)
+
+        while pending:
+            done, pending = concurrent.futures.wait(pending,
+                                                    timeout=REFRESH_INTERVAL,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                _finish(futures[future], future)
+
+            for spec in specs:
+                if spec.status == "queued" and os.path.exists(spec.log_file):
+                    spec.status = "running"
+
+            board.refresh()
+
+    board.finish()
+
+    return specs
+
+
+def init_worker(cache_dir: str, response_cache: bool) -> None:
+    """Points the caches of the worker process to the shared cache folder."""
+    from geai.disk_cache import DiskCache
+    from geai.ge_openai import ge_agent
+    from geai.tools import workspace_tools
+
+    workspace_tools.api_disk_cache = DiskCache(os.path.join(cache_dir, "api"), "api")
+
+    if response_cache:
+        ge_agent.use_response_cache(os.path.join(cache_dir, "responses"))
+
+
+def run_batch_spec(spec_file: str, workspace: str, log_file: str) -> Dict[str, Any]:
+    """
+    Runs a single spec into its workspace, with all its output going into the
+    log. Runs in the worker process.
+    """
+    import clanker
+    from geai.disk_cache import disk_cache_lookups
+
+    hits_before = disk_cache_lookups.value(cache="api", result="hit") + \
+        disk_cache_lookups.value(cache="responses", result="hit")
+    start = time.perf_counter()
+
+    with open(log_file, "wt", encoding="utf-8", buffering=1) as log, contextlib.redirect_stdout(log):
+        try:
+            asyncio.run(clanker.spec_mode(spec_file, workspace))
+        except Exception:
+            traceback.print_exc(file=log)
+            raise
+
+    hits = disk_cache_lookups.value(cache="api", result="hit") + \
+        disk_cache_lookups.value(cache="responses", result="hit")
+
+    return {
+        "wall_time": time.perf_counter() - start,
+        "files": sum(len(files) for _, _, files in os.walk(workspace)),
+        "cache_hits": hits - hits_before,
+    }
+
+
+class BatchBoard:
+    """
+    Shows the progress of a batch: a line per spec with its status, the stage
+    the running specs are at (the last line of their log), and the totals. On
+    a terminal the board is redrawn in place, otherwise only the finished specs
+    are printed, as they finish.
+    """
+    ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌"}
+
+    def __init__(self, specs: List[BatchSpec], output: TextIO = sys.stdout):
+        self.specs = specs
+        self.output = output
+        self.interactive = output.isatty()
+        self.start = time.perf_counter()
+
+        self._drawn_lines = 0
+        self._reported: set = set()
+
+    def refresh(self) -> None:
+        if not self.interactive:
+            for spec in self.specs:
+                if spec.status in ("done", "failed") and spec.name not in self._reported:
+                    self._reported.add(spec.name)
+                    self.output.write(self._spec_line(spec) + "\n")
+            self.output.flush()
+            return
+
+        lines = [self.totals()] + [self._spec_line(spec) for spec in self.specs]
+        up = f"\033[{self._drawn_lines}A" if self._drawn_lines else ""
+        self.output.write(up + "".join(f"\033[2K{line}\n" for line in lines))
+        self.output.flush()
+        self._drawn_lines = len(lines)
+
+    def finish(self) -> None:
+        self.refresh()
+        self.output.write(self.summary() + "\n")
+        self.output.flush()
+
+    def totals(self) -> str:
+        counts = {status: sum(1 for spec in self.specs if spec.status == status) for status in self.ICONS}
+
+        return (f"📦 {counts['done'] + counts['failed']}/{len(self.specs)} finished: "
+                f"{counts['done']} done, {counts['failed']} failed, {counts['running']} running, "
+                f"{counts['queued']} queued, {self.specs_per_hour():.0f} specs/hour")
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        done = [spec for spec in self.specs if spec.status == "done"]
+        failed = [spec for spec in self.specs if spec.status == "failed"]
+        cache_hits = sum(spec.result["cache_hits"] for spec in done if spec.result)
+
+        lines = [f"📦 {len(self.specs)} specs in {elapsed:.1f}s: {len(done)} done, {len(failed)} failed, "
+                 f"{self.specs_per_hour():.0f} specs/hour, {cache_hits} disk cache hits"]
+        lines.extend(f"  ❌ {spec.name}: {spec.error} (log in {spec.log_file})" for spec in failed)
+
+        return "\n".join(lines)
+
+    def specs_per_hour(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        finished = sum(1 for spec in self.specs if spec.status in ("done", "failed"))
+
+        return finished / elapsed * 3600 if elapsed > 0 else 0
+
+    def _spec_line(self, spec: BatchSpec) -> str:
+        line = f"  {self.ICONS[spec.status]} {spec.name:<24}"
+
+        if spec.status == "done":
+            return line + f" {spec.wall_time:.1f}s, {spec.result['files']} files"
+
+        if spec.status == "failed":
+            return line + f" {spec.error}"
+
+        if spec.status == "running":
+            return line + f" {_last_line(spec.log_file)[:80]}"
+
+        return line
+
+
+def _finish(spec: BatchSpec, future: concurrent.futures.Future) -> None:
+    try:
+        spec.result = future.result()
+        spec.wall_time = spec.result["wall_time"]
+        spec.status = "done"
+    except Exception as e:
+        spec.error = f"{type(e).__name__}: {e}"
+        spec.status = "failed"
+
+
+def _last_line(file_name: str) -> str:
+    try:
+        with open(file_name, "rb") as f:
+            f.seek(max(0, os.fstat(f.fileno()).st_size - 4096))
+            lines = [line for line in f.read().decode("utf-8", "replace").splitlines() if line.strip()]
+    except FileNotFoundError:
+        return ""
+
+    return lines[-1].strip() if lines else ""
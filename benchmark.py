@@ -0,0 +1,414 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import click
+
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+
+COMPARED_METRICS = {
+    # metric: minimum absolute increase that counts, so noise on tiny values isn't a regression
+    "wall_time": 0.05,
+    "orchestration_overhead": 0.05,
+    "peak_rss_mb": 5,
+    "model_requests": 0,
+}
+
+# how many times every import is measured, the fastest run counts
+IMPORT_RUNS = 3
+
+
+@click.command()
+@click.option("--specs", "-s",
+              help="Folder with the spec files to benchmark.",
+              default="spec_tests")
+@click.option("--only",
+              help="Only run this spec (file name without the extension). Can be repeated.",
+              multiple=True)
+@click.option("--output", "-o",
+              help="JSON file where to write the results.",
+              default="bench_output.json")
+@click.option("--latency",
+              help="Fixed latency of every fake model request, in seconds.",
+              type=float,
+              default=0.05)
+@click.option("--token-rate",
+              help="Generation speed of the fake model, in tokens/s (0 is instant).",
+              type=float,
+              default=500)
+@click.option("--prompt-token-rate",
+              help="Prompt processing speed of the fake model, in tokens/s (0 is instant).",
+              type=float,
+              default=5000)
+@click.option("--invalid-percent",
+              help="How many of the generated files the fake checker rejects, so the fix stage runs too.",
+              type=int,
+              default=25)
+@click.option("--baseline", "-b",
+              help="Results JSON of a previous run, to compare against.",
+              default=None)
+@click.option("--threshold", "-t",
+              help="Relative increase over the baseline that counts as a regression.",
+              type=float,
+              default=0.15)
+@click.option("--import-budget",
+              help="JSON file with the import time budget of the modules, in milliseconds.",
+              default="import_budget.json")
+@click.option("--imports-only",
+              help="Only measure the import times of the modules, don't run the specs.",
+              is_flag=True)
+def benchmark_main(specs: str,
+                   only: List[str],
+                   output: str,
+                   latency: float,
+                   token_rate: float,
+                   prompt_token_rate: float,
+                   invalid_percent: int,
+                   baseline: Optional[str],
+                   threshold: float,
+                   import_budget: str,
+                   imports_only: bool) -> None:
+    """
+    Runs the clanker pipeline over the specs against a local fake model server,
+    and reports where the time goes. The import times of the modules are
+    checked against their budget.
+    """
+    spec_files = [] if imports_only else sorted(f for f in os.listdir(specs) if f.endswith(".txt"))
+    if only:
+        spec_files = [f for f in spec_files if os.path.splitext(f)[0] in only]
+
+    config = {
+        "latency": latency,
+        "token_rate": token_rate,
+        "prompt_token_rate": prompt_token_rate,
+        "invalid_percent": invalid_percent,
+    }
+
+    results: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "timestamp": time.time(),
+        "config": config,
+        "specs": {},
+        "imports": {},
+    }
+
+    budget: Dict[str, float] = dict()
+    if os.path.exists(import_budget):
+        with open(import_budget, "rt", encoding="utf-8") as f:
+            budget = json.load(f)
+
+    for module in budget:
+        print(f"⏱️ importing {module} ... ", end="", flush=True)
+        results["imports"][module] = measure_import_time(module)
+        print(f"{results['imports'][module]:.0f}ms (budget {budget[module]:.0f}ms)")
+
+    # every spec runs in a fresh process, so the peak memory is per spec
+    context = multiprocessing.get_context("spawn")
+
+    for spec_file in spec_files:
+        name = os.path.splitext(spec_file)[0]
+        print(f"⏱️ benchmarking {name} ... ", end="", flush=True)
+
+        # not a multiprocessing.Pool, its daemon workers can't start the static checks processes
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+            result = pool.submit(run_spec_benchmark, os.path.join(specs, spec_file), config).result()
+
+        results["specs"][name] = result
+        print(f"{result['wall_time']:.2f}s wall, {result['orchestration_overhead']:.2f}s overhead, "
+              f"{result['model_requests']} requests, {result['peak_rss_mb']:.0f}MB peak")
+
+    with open(output, "wt", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"📄 results written to {output}")
+
+    regressions = check_import_budget(budget, results["imports"])
+
+    if baseline:
+        with open(baseline, "rt", encoding="utf-8") as f:
+            regressions += compare_results(json.load(f), results, threshold)
+
+    if baseline or budget:
+        if regressions:
+            print("❌ regressions over the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            raise SystemExit(1)
+
+        print("✅ no regressions over the baseline" if baseline else "✅ all the imports are within budget")
+
+
+def run_spec_benchmark(spec_file: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs `clanker.spec_mode` for a single spec into a temporary workspace,
+    against a fake model server. Runs in the child process.
+    """
+    import agents
+    import clanker
+    from geai.ge_openai import ge_agent
+    from geai.ge_openai.model_telemetry import model_requests, model_request_duration, model_tool_calls
+    from geai.tools import memo
+
+    agents.set_tracing_disabled(True)
+
+    with open(spec_file, "rt", encoding="utf-8") as f:
+        responder = PipelineResponder(f.read(), config["invalid_percent"])
+
+    server = FakeModelServer(responder,
+                             latency=config["latency"],
+                             token_rate=config["token_rate"],
+                             prompt_token_rate=config["prompt_token_rate"])
+
+    with server, tempfile.TemporaryDirectory() as workspace:
+        ge_agent.configure_client(server.base_url)
+
+        with open(os.devnull, "wt") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            asyncio.run(clanker.spec_mode(spec_file, workspace))
+            wall_time = time.perf_counter() - start
+
+    return {
+        "wall_time": wall_time,
+        "model_time": server.model_time,
+        "client_model_time": model_request_duration.total_sum(),
+        "orchestration_overhead": wall_time - server.model_time,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "model_requests": server.request_count,
+        "prompt_tokens": server.prompt_tokens,
+        "completion_tokens": server.completion_tokens,
+        "client_model_requests": model_requests.total(),
+        "tool_calls": model_tool_calls.total(),
+        "tool_memo_hits": memo.tool_memo_lookups.total(result="hit"),
+        "tool_memo_hit_rate": memo.hit_rate(),
+        "files": len(responder.files),
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Lists the metrics that grew more than the threshold over the baseline.
+    """
+    regressions = []
+
+    for name, result in current["specs"].items():
+        old_result = baseline.get("specs", {}).get(name)
+        if not old_result:
+            continue
+
+        for metric, min_delta in COMPARED_METRICS.items():
+            old_value, new_value = old_result.get(metric), result.get(metric)
+            if old_value is None or new_value is None:
+                continue
+
+            if new_value > old_value * (1 + threshold) and new_value - old_value > min_delta:
+                regressions.append(f"{name}: {metric} {old_value:.2f} -> {new_value:.2f} "
+                                   f"(+{(new_value / old_value - 1) * 100 if old_value else 100:.0f}%)")
+
+    return regressions
+
+
+def measure_import_time(module: str, runs: int = IMPORT_RUNS) -> float:
+    """
+    Measures how long importing the module takes in a fresh interpreter, with
+    everything it imports, using `python -X importtime`. Returns milliseconds.
+    """
+    best: Optional[float] = None
+
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                 capture_output=True, text=True, check=True)
+        cumulative = parse_import_time(process.stderr, module)
+        best = cumulative if best is None else min(best, cumulative)
+
+    return best / 1000
+
+
+def parse_import_time(importtime_output: str, module: str) -> float:
+    """
+    Reads the cumulative time of the module, in microseconds, from the
+    `-X importtime` report: `import time: self [us] | cumulative | imported package`.
+    """
+    for line in importtime_output.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return float(parts[1])
+
+    raise ValueError(f"{module} is not in the import time report")
+
+
+def check_import_budget(budget: Dict[str, float], imports: Dict[str, float]) -> List[str]:
+    """
+    Lists the modules that take longer to import than their budget.
+    """
+    return [f"{module}: import {imports[module]:.0f}ms over the {limit:.0f}ms budget"
+            for module, limit in budget.items()
+            if module in imports and imports[module] > limit]
+
+
+class PipelineResponder:
+    """
+    Scripts the answers of the clanker agents for a single spec. The agent is
+    recognized from its system prompt. The design creates a synthetic SPEC.md
+    with a number of files proportional to the spec size, every file importing
+    the previous one.
+    """
+    AGENTS = [
+        ("You are a specification generator", "_spec_gen"),
+        ("You are a simple data extractor", "_file_lister"),
+        ("You are a python code checker", "_code_check"),
+        ("You are a code checker", "_code_check"),
+        ("You are a python code fixer", "_fix_code"),
+        ("You are a code fixer", "_fix_code"),
+        ("You are a python coder", "_write_code"),
+        ("You are a coder tool", "_write_code"),
+        ("Your role is lead developer", "_write_code"),
+        ("You are an API extractor", "_api_extractor"),
+    ]
+
+    def __init__(self, requirements: str, invalid_percent: int = 0, lines_per_file: int = 60):
+        self.requirements = requirements
+        self.invalid_percent = invalid_percent
+        self.lines_per_file = lines_per_file
+
+        file_count = min(max(len(requirements) // 300, 2), 16)
+        self.files = [f"module_{i}.py" for i in range(1, file_count)] + ["main.py"]
+
+    def __call__(self, request: Dict[str, Any]) -> ScriptedReply:
+        messages = request.get("messages", [])
+        system_prompt = messages[0].get("content", "") if messages else ""
+
+        for marker, handler in self.AGENTS:
+            if marker in system_prompt:
+                return getattr(self, handler)(messages)
+
+        return ScriptedReply(text="OK")
+
+    def _spec_gen(self, messages: List[Dict[str, Any]]) -> ScriptedReply:
+        sections = [f"# Project\n\n{self.requirements}\n\n## Files\n"]
+
+        for i, file_name in enumerate(self.files):
+            used_by = self.files[i + 1] if i + 1 < len(self.files) else None
+            sections.append(f"### `{file_name}`\n\n"
+                            f"Implements part {i + 1} of the project described above."
+                            + (f" It is used by `{used_by}`." if used_by else " It is the entry point.")
+                            + "\n")
+
+        return ScriptedReply(text=json.dumps({"filename": "SPEC.md", "content": "\n".join(sections)}))
+
+    def _file_lister(self, messages: List[Dict[str, Any]]) -> ScriptedReply:
+        return ScriptedReply(text=json.dumps({
+            "files": [{"filename": f, "description": f"part {i + 1} of the project"}
+                      for i, f in enumerate(self.files)]
+        }))
+
+    def _write_code(self, messages: List[Dict[str, Any]]) -> ScriptedReply:
+        called_tools = [call["function"]["name"]
+                        for message in messages if message.get("role") == "assistant"
+                        for call in message.get("tool_calls") or []]
+
+        if "write_file" in called_tools:
+            return ScriptedReply(text="Done.")
+
+        file_name = _requested_file(messages)
+        dependency = self._dependency(file_name)
+
+        # like the real coders, look up the API of the imported file, unless the prompt already has it
+        if dependency and "read_api" not in called_tools and f"def {os.path.splitext(dependency)[0]}_function_0" \
+                not in messages[0].get("content", ""):
+            return ScriptedReply(tool_calls=[("read_api", json.dumps({"file_name": dependency}))])
+
+        arguments = json.dumps({"file_name": file_name, "content": self._code(file_name)})
+
+        return ScriptedReply(tool_calls=[("write_file", arguments)])
+
+    def _dependency(self, file_name: str) -> Optional[str]:
+        index = self.files.index(file_name) if file_name in self.files else 0
+        return self.files[index - 1] if index > 0 else None
+
+    def _fix_code(self, messages: List[Dict[str, Any]]) -> ScriptedReply:
+        if any(message.get("role") == "tool" for message in messages):
+            return ScriptedReply(text="Done.")
+
+        file_name = _requested_file(messages)
+        stem = os.path.splitext(os.path.basename(file_name))[0]
+        search = f"def {stem}_function_0(value: int) -> int:\n"
+        edit = {"search": search, "replace": search + "    if value < 0:\n        raise ValueError(value)\n"}
+
+        return ScriptedReply(tool_calls=[("edit_file", json.dumps({"file_name": file_name, "edits": [edit]}))])
+
+    def _code_check(self, messages: List[Dict[str, Any]]) -> ScriptedReply:
+        file_name = _requested_file(messages)
+        # like the real models, the verdict is followed by a justification that nobody reads
+        justification = " ".join(f"Function {i} of {file_name} matches the spec and is cleanly written."
+                                 for i in range(self.lines_per_file // 10))
+
+        if zlib.crc32(file_name.encode("utf-8")) % 100 < self.invalid_percent:
+            return ScriptedReply(text=f"INVALID: {file_name} doesn't handle invalid input values.\n\n{justification}")
+
+        return ScriptedReply(text=f"VALID\n\n{justification}")
+
+    def _api_extractor(self, messages: List[Dict[str, Any]]) -> ScriptedReply:
+        file_name = _requested_file(messages)
+        stem = os.path.splitext(os.path.basename(file_name))[0]
+
+        return ScriptedReply(text="\n".join(f"def {stem}_function_{i}(value: int) -> int: ..."
+                                            for i in range(self.lines_per_file // 10)))
+
+    def _code(self, file_name: str) -> str:
+        stem = os.path.splitext(os.path.basename(file_name))[0]
+        index = self.files.index(file_name) if file_name in self.files else 0
+        lines = [f'"""{file_name}: part {index + 1} of the project."""']
+
+        if index > 0:
+            previous = os.path.splitext(self.files[index - 1])[0]
+            lines.append(f"from {previous} import {previous}_function_0")
+
+        for i in range(self.lines_per_file // 10):
+            lines.extend([
+                "",
+                "",
+                f"def {stem}_function_{i}(value: int) -> int:",
+                f'    """Computes step {i} of {stem}."""',
+                "    result = value",
+                "    for step in range(3):",
+                "        result += step",
+                "    return result",
+            ])
+
+        return "\n".join(lines) + "\n"
+
+
+def _requested_file(messages: List[Dict[str, Any]]) -> str:
+    """
+    Finds the file the agent was asked about, from the first user message,
+    e.g. "Write the main.py" or "Extract the API for main.py".
+    """
+    for message in messages:
+        if message.get("role") == "user" and isinstance(message.get("content"), str):
+            match = re.search(r"(\S+)\s*$", message["content"])
+            if match:
+                return match.group(1).lstrip("/")
+
+    return "main.py"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+if __name__ == "__main__":
+    benchmark_main()
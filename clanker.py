@@ -3,36 +3,150 @@ import asyncio
 import click
 
 import geai.tools.workspace
+from geai import metrics
+from geai.tracing import tracer
 import readinput
-from codegen import generate_file, check_generated_file, fix_failed_code
+from geai import daemon_client
+from codegen import generate_file, check_generated_file, fix_failed_code, static_check_generated_files
+from geai.ge_openai import ge_agent
 from geai.ge_openai.ge_agent import GeAgent
+from geai.ge_openai.model_router import escalation_rate
 from geai.tools import workspace_tools
 from geai.tools.read_file_tool import read_file_impl
 from geai.tools.workspace_tools import write_file_impl
+from spec_index import SpecIndex
 from structs import FileResult, SpecCheckResult, FileList
 
 
-@click.command()
+class DefaultCommandGroup(click.Group):
+    """
+    A group that runs its default command when the first argument isn't a
+    command, so `clanker.py --user-spec SPEC` still works as `clanker.py spec`.
+    """
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = [self.default_command] + args
+
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultCommandGroup, default_command="spec")
+def cli() -> None:
+    """
+    Generates a project from a specification (`spec`, the default), or many
+    projects from a folder of specifications (`batch`).
+    """
+
+
+@cli.command("spec")
 @click.option("--user-spec",
               help="User specification file. What do you want to be generated?")
 @click.option("--workspace", "-w",
               help="Workspace folder where to create the files.",
               default="workspace.py")
-def event_loop_main(user_spec: str, workspace: str) -> None:
-   asyncio.run(spec_mode(user_spec, workspace))
+@click.option("--metrics-file",
+              help="Write the model and tool metrics, in Prometheus text format, into this file at exit.",
+              default=None)
+@click.option("--metrics-port",
+              help="Serve the model and tool metrics, in Prometheus text format, on http://127.0.0.1:PORT/metrics.",
+              type=int,
+              default=None)
+@click.option("--trace",
+              help="Write a Chrome trace-event JSON file (viewable in Perfetto) with the timing of "
+                   "the pipeline stages, and print the slowest stages at the end.",
+              default=None)
+@click.option("--cassette",
+              help="Cassette file where all the model traffic is recorded, or replayed from.",
+              default=None)
+@click.option("--cassette-mode",
+              help="Record the model traffic into the cassette, or replay it from the cassette (offline).",
+              type=click.Choice(["record", "replay"]),
+              default="replay")
+@click.option("--replay-speed",
+              help="Replay the responses at their recorded speed, or as fast as possible.",
+              type=click.Choice(["recorded", "fast"]),
+              default="fast")
+@click.option("--daemon/--no-daemon",
+              help="Run the pipeline in the geai daemon (geai/daemon.py). By default the daemon is used "
+                   "if it's running, and the metrics, trace and cassette options are not given.",
+              default=None)
+def event_loop_main(user_spec: str,
+                    workspace: str,
+                    metrics_file: str,
+                    metrics_port: int,
+                    trace: str,
+                    cassette: str,
+                    cassette_mode: str,
+                    replay_speed: str,
+                    daemon: bool | None) -> None:
+   """
+   Generates a project from a specification, into the workspace.
+   """
+   local_only = metrics_file or metrics_port or trace or cassette
+   if daemon and local_only:
+       raise click.UsageError("the metrics, trace and cassette options only work with --no-daemon")
+
+   client = daemon_client.connect() if daemon is not False and not local_only else None
+   if daemon and not client:
+       raise click.ClickException(f"no geai daemon is listening on {daemon_client.DEFAULT_SOCKET}")
+
+   if client:
+       try:
+           client.run_spec(read_user_spec(user_spec), workspace)
+       except daemon_client.DaemonError as e:
+           raise click.ClickException(str(e))
+       return
+
+   if metrics_port:
+       metrics.registry.start_http_server(metrics_port)
+
+   tracer.enabled = bool(trace)
+   cassette_transport = ge_agent.use_cassette(cassette, cassette_mode, replay_speed) if cassette else None
+
+   try:
+       asyncio.run(spec_mode(user_spec, workspace))
+   finally:
+       metrics.export_metrics(metrics_file)
+
+       if cassette_transport:
+           print(cassette_transport.report())
+
+       if trace:
+           tracer.export_chrome_trace(trace)
+           print(f"⏱️ slowest stages (full trace in {trace}):")
+           print(tracer.summary())
 
 
 async def spec_mode(user_spec: str, workspace: str) -> None:
-    geai.tools.workspace.folder = workspace
+    await run_spec(read_user_spec(user_spec), workspace)
+
 
+async def run_spec(user_input: str, workspace: str) -> None:
+    """
+    Runs the pipeline into the workspace. The workspace is only seen by this
+    run, so many specs can run concurrently in the same process.
+    """
+    with geai.tools.workspace.use(workspace), tracer.span("spec_mode", workspace=workspace):
+        await run_pipeline(user_input)
+
+
+def read_user_spec(user_spec: str | None) -> str:
+    """The user specification, from the file, or typed in the terminal."""
     if user_spec:
         with open(user_spec, "rt", encoding="utf-8") as f:
-            user_input = f.read()
-    else:
-        user_input = readinput.read_multi(" SPEC", bgcolor="green", bold=True)
+            return f.read()
+
+    return readinput.read_multi(" SPEC", bgcolor="green", bold=True)
+
 
+async def run_pipeline(user_input: str) -> None:
     print("⚙️ designing a spec ... ")
-    spec_result = await create_specification(user_input)
+    with tracer.span("design spec"):
+        spec_result = await create_specification(user_input)
     spec_result = read_file_impl("/SPEC.md").content
 
     # while True:
@@ -49,19 +163,35 @@ async def spec_mode(user_spec: str, workspace: str) -> None:
     #     print(spec_result)
     #
     print("⚙️ making a list of the files to be created ... ")
-    file_list = await extract_file_list()
+    with tracer.span("list files"):
+        file_list = await extract_file_list()
+
+    spec = SpecIndex(spec_result, file_list.files)
 
     for file in file_list.files:
         if workspace_tools.file_exists_in_workspace(file.filename):
             print(f"⏭️ skipped generating {file.filename} ... ")
             continue
 
-        print(f"⚙️ generating {file.filename} ... ")
-        await generate_file(file)
+        print(f"⚙️ generating {file.filename} "
+              f"(spec slice: {len(spec.slice_for(file))} of {len(spec.spec)} chars) ... ")
+        with tracer.span("generate", file=file.filename):
+            await generate_file(file, spec)
+
+    print("⚙️ running the static checks ... ")
+    with tracer.span("static checks"):
+        static_failures = await static_check_generated_files(file_list.files)
 
     for file in file_list.files:
-        print(f"⚙️ re-checking the code for {file.filename} ... ")
-        check = await check_generated_file(file)
+        check = static_failures.get(file.filename)
+
+        # the files that fail the static checks don't need a model to tell they're broken
+        if check:
+            print(f"  ❌ {file.filename} failed the static checks")
+        else:
+            print(f"⚙️ re-checking the code for {file.filename} ... ")
+            with tracer.span("check", file=file.filename):
+                check = await check_generated_file(file, spec)
 
         if check.valid:
             continue
@@ -69,7 +199,10 @@ async def spec_mode(user_spec: str, workspace: str) -> None:
         print(f"  ❌ code was not valid:\n{check.reason}")
 
         print(f"⚙️ fixing the code for {file.filename} ... ")
-        await fix_failed_code(file, check)
+        with tracer.span("fix", file=file.filename):
+            await fix_failed_code(file, check, spec)
+
+    print(f"📈 code checks escalated to a bigger model: {escalation_rate('code_check'):.0%}")
 
 
 async def create_specification(user_input: str) -> str:
@@ -120,5 +253,46 @@ async def extract_file_list() -> FileList:
     return await file_lister.run("Read the list of files")
 
 
+@cli.command("batch")
+@click.argument("specs", default="spec_tests")
+@click.option("--output", "-o",
+              help="Folder where every spec gets its workspace, and its log, named after the spec.",
+              default="batch_output")
+@click.option("--workers", "-j",
+              help="How many specs run in parallel, each in its own process.",
+              type=int,
+              default=4)
+@click.option("--only",
+              help="Only run this spec (file name without the extension). Can be repeated.",
+              multiple=True)
+@click.option("--cache-dir",
+              help="Folder of the on-disk caches shared by the workers.",
+              default=".geai/cache")
+@click.option("--response-cache/--no-response-cache",
+              help="Answer the model requests identical to already answered ones from the cache, "
+                   "e.g. to resume an interrupted batch.",
+              default=False)
+def batch_main(specs: str,
+               output: str,
+               workers: int,
+               only: list[str],
+               cache_dir: str,
+               response_cache: bool) -> None:
+    """
+    Runs all the `.txt` specs of the SPECS folder over a pool of processes,
+    and shows their progress.
+    """
+    import batch
+
+    batch_specs = batch.find_specs(specs, output, only)
+    if not batch_specs:
+        raise click.ClickException(f"no specs found in {specs}")
+
+    batch.run_batch(batch_specs, workers, cache_dir, response_cache)
+
+    if any(spec.status == "failed" for spec in batch_specs):
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
-   event_loop_main()
+   cli()
@@ -1,20 +1,31 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
 import structs
-from geai.ge_openai.ge_agent import GeAgent
-from geai.tools import workspace_tools
+from geai.ge_openai.ge_agent import GeAgent, load_agent_metadata
+from geai.ge_openai.model_router import run_cascade, parse_cascade
+from geai.tools import edit_file_tool, workspace, workspace_tools
 from geai.tools.read_file_tool import read_file_impl
+from spec_index import SpecIndex
+from static_checks import check_workspace_files, format_diagnostics
+from verdict import stream_verdict
+
+MAX_DEPENDENCY_API_CHARS = 16000
 
 
-async def generate_file(file: structs.FileInfo) -> str:
+async def generate_file(file: structs.FileInfo, spec: Optional[SpecIndex] = None) -> str:
     """
     Meat and butter of the generation.
     :param file:
+    :param spec: the indexed SPEC.md, so the coder gets only the relevant part of it.
     :return:
     """
     coder = GeAgent(get_coder_template(file, "code_gen.txt"),
                     data={
                         "file_name": file.filename,
                         "file_description": file.description,
-                        "spec": read_file_impl("/SPEC.md").content,
+                        "spec": spec_for(file, spec),
+                        "dependency_apis": await dependency_apis(file, spec),
                     },
                     tools=[
                         workspace_tools.write_file,
@@ -26,56 +37,161 @@ async def generate_file(file: structs.FileInfo) -> str:
     return read_file_impl(file.filename).content
 
 
-async def check_generated_file(file: structs.FileInfo) -> structs.SpecCheckResult:
-    coder = GeAgent(get_coder_template(file, "code_check.txt"),
-                    data={
-                        "file_name": file.filename,
-                        "file_description": file.description,
-                        "spec": read_file_impl("/SPEC.md").content,
-                        "file_content": read_file_impl(file.filename).content,
-                    },
-                    tools=[
-                        workspace_tools.read_api,
-                    ],
-                    )
+async def dependency_apis(file: structs.FileInfo, spec: Optional[SpecIndex]) -> str:
+    """
+    The APIs of the already written files related to this one, so the coder
+    doesn't need to call `read_api` for them. The files are listed in their
+    dependency order, so the dependencies are normally written already.
+    """
+    if spec is None:
+        return "(none)"
+
+    apis: List[str] = []
+    size = 0
+
+    for dependency in spec.related_files(file):
+        if not workspace_tools.file_exists_in_workspace(dependency):
+            continue
+
+        api = f"### {dependency}\n\n{await workspace_tools.read_api_impl(dependency)}"
+        if size + len(api) > MAX_DEPENDENCY_API_CHARS:
+            # the rest can still be read with `read_api`
+            break
+
+        apis.append(api)
+        size += len(api)
+
+    return "\n\n".join(apis) if apis else "(none)"
+
+
+async def static_check_generated_files(files: List[structs.FileInfo]) -> Dict[str, structs.SpecCheckResult]:
+    """
+    Runs the static checks (compilation, names and imports) over the generated
+    files, in parallel. Only the files with errors are returned, with the
+    diagnostics as the rejection reason, so they can go straight to the fix.
+    """
+    diagnostics = await asyncio.to_thread(check_workspace_files,
+                                          workspace.current().folder,
+                                          [file.filename for file in files])
+    failed: Dict[str, structs.SpecCheckResult] = dict()
+
+    for file in files:
+        file_diagnostics = diagnostics.get(file.filename.lstrip("/"))
+
+        if file_diagnostics:
+            failed[file.filename] = structs.SpecCheckResult(valid=False,
+                                                            reason=format_diagnostics(file_diagnostics))
+
+    return failed
+
+
+async def check_generated_file(file: structs.FileInfo, spec: Optional[SpecIndex] = None) -> structs.SpecCheckResult:
+    """
+    Checks the file with the cheapest model of the template cascade first, and
+    escalates to the next model only if the verdict is malformed or uncertain.
+    The verdict is streamed, and the generation stops as soon as it's decided.
+    """
+    template = get_coder_template(file, "code_check.txt")
+    data = {
+        "file_name": file.filename,
+        "file_description": file.description,
+        "spec": spec_for(file, spec),
+        "file_content": read_file_impl(file.filename).content,
+    }
+
+    async def check_with(model: str) -> Optional[structs.SpecCheckResult]:
+        coder = GeAgent(template,
+                        data=data,
+                        tools=[
+                            workspace_tools.read_api,
+                        ],
+                        model=model,
+                        )
+
+        verdict = await stream_verdict(coder, f"Check the {file.filename}")
+
+        if verdict is None:
+            # a single cheap retry, the stream was cut as soon as the answer went off the format
+            print(f"WARNING: malformed verdict from {model}, retrying once.")
+            verdict = await stream_verdict(coder, f"Check the {file.filename}. Start your answer with "
+                                                  f"VALID, or with INVALID: and the reason.")
+
+        if verdict is None:
+            print(f"WARNING: unable to figure out if the result is VALID or INVALID ({model}).")
+
+        return verdict
 
     try:
-        result = await coder.run(f"Check the {file.filename}")
+        verdict, _ = await run_cascade("code_check",
+                                       parse_cascade(load_agent_metadata(template)),
+                                       check_with,
+                                       accept=lambda verdict: verdict is not None)
     except Exception as e:
         print(f"WARNING: unable to figure out if the result is VALID or INVALID: {e}.")
         return structs.SpecCheckResult(valid=True, reason="")
 
-    if "INVALID" in result:
-        reason = result.split("INVALID")[1]
-
-        return structs.SpecCheckResult(
-            valid=False,
-            reason=reason
-        )
-
-    if "VALID" in result:
+    if verdict is None:
         return structs.SpecCheckResult(valid=True, reason="")
 
-    print(f"WARNING: unable to figure out if the result is VALID or INVALID: {result}.")
-    return structs.SpecCheckResult(valid=True, reason="")
+    return verdict
 
 
-async def fix_failed_code(file: structs.FileInfo, check: structs.SpecCheckResult) -> None:
-    coder = GeAgent(get_coder_template(file, "code_fix.txt"),
+async def fix_failed_code(file: structs.FileInfo,
+                          check: structs.SpecCheckResult,
+                          spec: Optional[SpecIndex] = None) -> None:
+    """
+    Fixes the file with targeted edits, so the model doesn't need to write the
+    whole file again. Falls back to rewriting the file only if no edit could be
+    applied.
+    """
+    original_content = read_file_impl(file.filename).content
+
+    if original_content:
+        try:
+            await run_fixer(file, check, "code_fix_patch.txt", [
+                edit_file_tool.edit_file,
+                edit_file_tool.apply_diff,
+                workspace_tools.read_api,
+            ], spec)
+        except Exception as e:
+            # e.g. the turns ran out while the edits kept failing
+            print(f"WARNING: the patch fixer for {file.filename} failed: {e}")
+
+        if read_file_impl(file.filename).content != original_content:
+            return
+
+        print(f"WARNING: unable to patch {file.filename}, writing it again.")
+
+    await run_fixer(file, check, "code_fix.txt", [
+        workspace_tools.write_file,
+        workspace_tools.read_api,
+    ], spec)
+
+
+async def run_fixer(file: structs.FileInfo,
+                    check: structs.SpecCheckResult,
+                    template: str,
+                    tools: List[Any],
+                    spec: Optional[SpecIndex] = None) -> None:
+    coder = GeAgent(get_coder_template(file, template),
                     data={
                         "file_name": file.filename,
                         "file_description": file.description,
-                        "spec": workspace_tools.read_file_impl("/SPEC.md"),
-                        "file_content": workspace_tools.read_file_impl(file.filename),
+                        "spec": spec_for(file, spec),
+                        "file_content": read_file_impl(file.filename).content,
                         "rejection_reason": check.reason,
                     },
-                    tools=[
-                        workspace_tools.write_file,
-                        workspace_tools.read_api,
-                    ],
+                    tools=tools,
                     )
 
-    await coder.run(f"Write the {file.filename}")
+    await coder.run(f"Fix the {file.filename}")
+
+
+def spec_for(file: structs.FileInfo, spec: Optional[SpecIndex]) -> str:
+    if spec is None:
+        return read_file_impl("/SPEC.md").content
+
+    return spec.slice_for(file)
 
 
 def get_coder_template(file: structs.FileInfo, name: str) -> str:
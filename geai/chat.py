@@ -1,17 +1,24 @@
 import asyncio
 import sys
+from typing import TextIO
 
 import click
 
 import geai.tools.workspace
-from agent_output import AgentPrintout
+from geai import metrics, daemon_client
+from geai.agent_output import AgentPrintout
+from geai.event_sinks import EventSink, JsonlEventSink, PrintoutEventSink, events_output
 from geai.ge_openai.ge_agent import GeAgent
 from geai.ge_openai.memory_session import InMemorySession
+from geai.repl import InputQueue, interruptible
 from geai.tools.read_file_tool import read_file
-from tools.git_grep_tool import git_grep
-from tools.sh_tool import execute
-from tools.time_tools import sleep
-from tools.workspace_tools import write_file, list_files, read_api, patch_file
+from geai.tools.search_code_tool import search_code
+from geai.tools.git_grep_tool import git_grep
+from geai.tools.sh_tool import execute
+from geai.tools.spill import read_spilled_output
+from geai.tools.symbol_tools import find_references, find_symbol
+from geai.tools.time_tools import sleep
+from geai.tools.workspace_tools import write_file, list_files, read_api, patch_file
 
 
 @click.command()
@@ -21,56 +28,104 @@ from tools.workspace_tools import write_file, list_files, read_api, patch_file
 @click.option("--user-prompt", "-u",
               help="Default user prompt to start the conversation.",
               default=None)
-def event_loop_main(workspace: str, user_prompt: str) -> None:
-   asyncio.run(agent_mode(workspace, user_prompt))
-
-
-async def agent_mode(workspace: str, user_prompt: str) -> None:
-    geai.tools.workspace.folder = workspace
+@click.option("--events-jsonl",
+              help="Write the agent events as JSON lines into this file (`-` for stdout, the prompts and "
+                   "notices then go to stderr), instead of rendering them on the terminal.",
+              default=None)
+@click.option("--metrics-file",
+              help="Write the model and tool metrics, in Prometheus text format, into this file at exit.",
+              default=None)
+@click.option("--metrics-port",
+              help="Serve the model and tool metrics, in Prometheus text format, on http://127.0.0.1:PORT/metrics.",
+              type=int,
+              default=None)
+@click.option("--daemon/--no-daemon",
+              help="Run the chat in the geai daemon (geai/daemon.py). By default the daemon is used "
+                   "if it's running, and the metrics options are not given.",
+              default=None)
+def event_loop_main(workspace: str,
+                    user_prompt: str,
+                    events_jsonl: str,
+                    metrics_file: str,
+                    metrics_port: int,
+                    daemon: bool | None) -> None:
+   local_only = metrics_file or metrics_port
+   if daemon and local_only:
+       raise click.UsageError("the metrics options only work with --no-daemon")
+
+   # with the events on stdout, the rest goes to stderr, so the stdout stays JSON lines
+   with events_output(events_jsonl) as events_target:
+       client = daemon_client.connect() if daemon is not False and not local_only else None
+       if daemon and not client:
+           raise click.ClickException(f"no geai daemon is listening on {daemon_client.DEFAULT_SOCKET}")
+
+       if client:
+           event_sink = JsonlEventSink(events_target) if events_target else PrintoutEventSink(AgentPrintout())
+           try:
+               client.run_session("chat", workspace, user_inputs(user_prompt).turns(), event_sink)
+           except daemon_client.DaemonError as e:
+               raise click.ClickException(str(e))
+           except KeyboardInterrupt:
+               pass
+           finally:
+               event_sink.close()
+
+           exit_program()
+
+       if metrics_port:
+           metrics.registry.start_http_server(metrics_port)
+
+       try:
+           asyncio.run(agent_mode(workspace, user_prompt, events_target))
+       finally:
+           metrics.export_metrics(metrics_file)
+
+
+async def agent_mode(workspace: str, user_prompt: str, events_jsonl: str | TextIO | None = None) -> None:
     session = InMemorySession("wut")
+    event_sink = JsonlEventSink(events_jsonl) if events_jsonl else None
 
     try:
-        # Use default user prompt if provided, otherwise read from stdin
-        if user_prompt:
-            user_input = user_prompt
-        else:
-            print("💬️ CHAT> ", end="", flush=True)
-            user_input = sys.stdin.readline().strip()
-
-        # Check if user wants to quit
-        if user_input.lower() == "quit":
-            exit_program()
-
-        await run_agent(session, user_input)
-
-        # Continue reading from stdin for subsequent messages
-        while True:
-            print("💬️ CHAT> ", end="", flush=True)
-            user_input = sys.stdin.readline().strip()
-
-            # Check if user wants to quit
-            if user_input.lower() == "quit":
-                exit_program()
-
-            await run_agent(session, user_input)
-    except KeyboardInterrupt:
-        # Handle Ctrl+C gracefully
+        with geai.tools.workspace.use(workspace):
+            async for user_input in user_inputs(user_prompt):
+                # Ctrl+C during a turn only interrupts the turn
+                await interruptible(run_agent(session, user_input, event_sink))
+
+        exit_program()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        # Handle Ctrl+C at the prompt gracefully
         exit_program()
+    finally:
+        if event_sink:
+            event_sink.close()
+
+
+def user_inputs(user_prompt: str | None) -> InputQueue:
+    """
+    The messages of the user, read in the background, so the messages typed
+    while the agent still runs are queued, and folded into its next turn.
+    """
+    return InputQueue("💬️ CHAT> ", user_prompt)
 
 
-async def run_agent(session, user_input: str) -> str:
-    agent_output = AgentPrintout()
+async def run_agent(session, user_input: str, event_sink: EventSink | None = None) -> str:
+    if not event_sink:
+        event_sink = PrintoutEventSink(AgentPrintout())
 
     local_agent = GeAgent(
         "instructions/chat/chat.txt",
-        agent_output=agent_output,
+        event_sink=event_sink,
         tools=[
+            find_references,
+            find_symbol,
             git_grep,
             # grep,
             list_files,
             read_api,
             read_file,
+            search_code,
             execute,
+            read_spilled_output,
             sleep,
         ],
         session=session,
@@ -0,0 +1,327 @@
+import asyncio
+import contextlib
+import contextvars
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import traceback
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, TextIO, Tuple
+
+import click
+
+from geai import metrics
+from geai.daemon_client import DEFAULT_SOCKET, connect
+from geai.event_sinks import EventSink
+from geai.ge_openai.agent_events import AgentEvent
+from geai.metrics import registry
+from geai.tools import processes, workspace
+from geai.tools.workspace import WorkspaceContext
+
+# the spec of a request can be big, the default limit of a line is only 64KB
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# the modules that have the `run_agent` of the interactive sessions
+SESSION_MODULES = {
+    "agent": "geai.agent",
+    "chat": "geai.chat",
+}
+
+daemon_sessions = registry.counter(
+    "geai_daemon_sessions_total", "Number of the sessions served by the daemon, by command.")
+
+current_session: contextvars.ContextVar[Optional["DaemonSession"]] = \
+    contextvars.ContextVar("current_session", default=None)
+
+
+class DaemonSession:
+    """
+    A client connection. Everything is sent as JSON lines, and the messages
+    can be sent from any thread, e.g. by the tools that run in a thread pool.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        data = (json.dumps(message) + "\n").encode("utf-8")
+
+        if threading.get_ident() == self._loop_thread:
+            self._write(data)
+        else:
+            self._loop.call_soon_threadsafe(self._write, data)
+
+    async def receive(self) -> Optional[Dict[str, Any]]:
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    async def drain(self) -> None:
+        with contextlib.suppress(ConnectionError):
+            await self.writer.drain()
+
+    def _write(self, data: bytes) -> None:
+        # the client might be gone already, the session still finishes its work
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+
+class SessionOutput(io.TextIOBase):
+    """
+    Replaces the stdout of the daemon: what a session prints goes to its client,
+    anything else to the daemon's own stdout. The session is found through a
+    context variable, so the output of concurrent sessions doesn't mix.
+    """
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    @property
+    def encoding(self) -> str:
+        return self.stream.encoding
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        session = current_session.get()
+
+        if session is None:
+            return self.stream.write(text)
+
+        session.send({"type": "output", "text": text})
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class SessionEventSink(EventSink):
+    """Sends the agent events to the client, that renders them."""
+    def __init__(self, session: DaemonSession):
+        self.session = session
+
+    def emit(self, event: AgentEvent) -> None:
+        self.session.send({"type": "event", "event": event.model_dump()})
+
+
+class Daemon:
+    """
+    A long running process that serves the clanker, agent and chat CLIs over a
+    Unix socket. The SDKs stay imported, and the model client (with its open
+    connections), the agent templates and the workspace contexts (with their
+    caches) stay warm between the sessions. The sessions run concurrently, each
+    in its own workspace.
+    """
+    def __init__(self, socket_path: str = DEFAULT_SOCKET):
+        self.socket_path = socket_path
+        self.workspaces: Dict[str, WorkspaceContext] = dict()
+        self.commands: Dict[str, Callable[[DaemonSession, Dict[str, Any]], Awaitable[None]]] = {
+            "spec": self._spec,
+            "agent": self._agent_session,
+            "chat": self._agent_session,
+        }
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stdout: Optional[TextIO] = None
+        self._sessions: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        # the daemon runs shell commands, the other users must never reach its socket, not even before the chmod
+        os.makedirs(os.path.dirname(self.socket_path) or ".", mode=0o700, exist_ok=True)
+        _remove_stale_socket(self.socket_path)
+
+        old_umask = os.umask(0o077)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle,
+                                                           path=self.socket_path,
+                                                           limit=MAX_MESSAGE_SIZE)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.socket_path, 0o600)
+
+        self._stdout = sys.stdout
+        sys.stdout = SessionOutput(sys.stdout)
+
+    async def serve(self) -> None:
+        await self.start()
+
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._stdout:
+            sys.stdout = self._stdout
+            self._stdout = None
+
+        if self._server:
+            self._server.close()
+
+            for task in self._sessions:
+                task.cancel()
+            await asyncio.gather(*self._sessions, return_exceptions=True)
+
+            await self._server.wait_closed()
+            self._server = None
+
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = DaemonSession(reader, writer)
+        # every connection runs in its own task, so this is seen only by this session
+        current_session.set(session)
+
+        task = asyncio.current_task()
+        self._sessions.add(task)
+
+        try:
+            request = await session.receive()
+            command = self.commands.get(request.get("command")) if request else None
+
+            if request and not command:
+                session.send({"type": "error", "message": f"unknown command: {request.get('command')}"})
+            elif command:
+                daemon_sessions.inc(command=request["command"])
+                with workspace.use(self._workspace(request["workspace"])) if "workspace" in request \
+                        else contextlib.nullcontext():
+                    await command(session, request)
+                session.send({"type": "done"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            session.send({"type": "error", "message": f"{type(e).__name__}: {e}"})
+        finally:
+            self._sessions.discard(task)
+            await session.drain()
+            writer.close()
+
+    async def _spec(self, session: DaemonSession, request: Dict[str, Any]) -> None:
+        import clanker
+
+        await clanker.run_spec(request["user_input"], request["workspace"])
+
+    async def _agent_session(self, session: DaemonSession, request: Dict[str, Any]) -> None:
+        from geai.ge_openai.memory_session import InMemorySession
+
+        run_agent = importlib.import_module(SESSION_MODULES[request["command"]]).run_agent
+        history = InMemorySession(request["command"])
+        event_sink = SessionEventSink(session)
+
+        # every turn is answered with one `turn_done`, and every interrupt with one `interrupt_done`, so the
+        # client stays in step even if its interrupt arrives after the turn had already ended
+        while (message := await session.receive()) is not None:
+            if message.get("type") == "interrupt":
+                session.send({"type": "interrupt_done"})
+                continue
+
+            connected, received = await self._interruptible_turn(session,
+                                                                 run_agent(history, message["text"], event_sink))
+
+            session.send({"type": "turn_done"})
+            if received is not None and received.get("type") == "interrupt":
+                session.send({"type": "interrupt_done"})
+            await session.drain()
+
+            if not connected:
+                return
+
+    async def _interruptible_turn(self,
+                                  session: DaemonSession,
+                                  turn: Awaitable[Any]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Runs a turn of a session, that the client can interrupt (on Ctrl+C). The
+        model stream and the tool processes of an interrupted turn are stopped.
+        Returns False if the client went away during the turn, and the message
+        the client sent during the turn, if any.
+        """
+        with processes.scope():
+            turn_task = asyncio.ensure_future(turn)
+            interrupt_task = asyncio.ensure_future(session.receive())
+
+            try:
+                await asyncio.wait([turn_task, interrupt_task], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in (turn_task, interrupt_task):
+                    task.cancel()
+                await asyncio.gather(turn_task, interrupt_task, return_exceptions=True)
+
+        if not turn_task.cancelled() and turn_task.exception():
+            raise turn_task.exception()
+
+        if interrupt_task.cancelled():
+            return True, None
+
+        received = interrupt_task.result()
+
+        return received is not None, received
+
+
+    def _workspace(self, folder: str) -> WorkspaceContext:
+        """The context of the workspace, shared by all its sessions."""
+        if folder not in self.workspaces:
+            self.workspaces[folder] = WorkspaceContext(folder=folder)
+
+        return self.workspaces[folder]
+
+
+def warm_up() -> None:
+    """
+    Imports the SDKs and the pipelines, and creates the model client, so the
+    first session doesn't pay for them.
+    """
+    import agents
+    import clanker
+    from geai.ge_openai import ge_agent
+
+    for module in SESSION_MODULES.values():
+        importlib.import_module(module)
+
+    ge_agent.get_local_client()
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    if not os.path.exists(socket_path):
+        return
+
+    client = connect(socket_path)
+    if client:
+        client.close()
+        raise click.ClickException(f"a daemon is already listening on {socket_path}")
+
+    os.unlink(socket_path)
+
+
+@click.command()
+@click.option("--socket", "socket_path",
+              help="Unix socket where the daemon listens for the CLIs (also the GEAI_DAEMON_SOCKET env var).",
+              default=DEFAULT_SOCKET)
+@click.option("--metrics-port",
+              help="Serve the model and tool metrics, in Prometheus text format, on http://127.0.0.1:PORT/metrics.",
+              type=int,
+              default=None)
+def event_loop_main(socket_path: str, metrics_port: int) -> None:
+    """
+    Runs the geai daemon. While it runs, clanker.py, geai/agent.py and
+    geai/chat.py send their work to it, instead of starting cold.
+    """
+    if metrics_port:
+        metrics.registry.start_http_server(metrics_port)
+
+    warm_up()
+    print(f"👂 geai daemon listening on {socket_path}")
+
+    try:
+        asyncio.run(Daemon(socket_path).serve())
+    except KeyboardInterrupt:
+        print("\n👋 Goodbye!")
+
+
+if __name__ == "__main__":
+    event_loop_main()
@@ -0,0 +1,114 @@
+import functools
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# only the standard library is imported here, the clients must start instantly
+DEFAULT_SOCKET = os.environ.get("GEAI_DAEMON_SOCKET",
+                                os.path.join(os.path.expanduser("~"), ".geai", "daemon.sock"))
+
+
+class DaemonError(Exception):
+    """The daemon failed to run the request."""
+
+
+def connect(socket_path: str = DEFAULT_SOCKET) -> Optional["DaemonClient"]:
+    """
+    Connects to the running daemon, or returns None if there is no daemon
+    listening on the socket.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        client.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        return None
+
+    return DaemonClient(client)
+
+
+class DaemonClient:
+    """
+    A thin client of the geai daemon. The requests and the answers are JSON
+    lines: the client sends a command, then the daemon streams back the printed
+    `output`, the agent `event`s, and a final `done` or `error`. The agent
+    and chat sessions also send an `input` per turn, and get a `turn_done`
+    after each one.
+    """
+    def __init__(self, client: socket.socket):
+        self._socket = client
+        self._reader = client.makefile("r", encoding="utf-8")
+
+    def run_spec(self, user_input: str, workspace: str) -> None:
+        """Runs the spec pipeline for the user input into the workspace."""
+        try:
+            self.send({"command": "spec", "workspace": os.path.abspath(workspace), "user_input": user_input})
+            self._until("done")
+        finally:
+            self.close()
+
+    def run_session(self, command: str, workspace: str, user_inputs: Iterable[str], event_sink: Any) -> None:
+        """
+        Runs an `agent` or `chat` session, one turn for each user input. The
+        events of the turns are replayed into the event sink. Ctrl+C interrupts
+        the running turn.
+        """
+        try:
+            self.send({"command": command, "workspace": os.path.abspath(workspace)})
+
+            for user_input in user_inputs:
+                self.send({"type": "input", "text": user_input})
+
+                try:
+                    self._until("turn_done", event_sink)
+                except KeyboardInterrupt:
+                    # Ctrl+C interrupts only the turn. The daemon still ends the turn with its `turn_done`, and
+                    # answers the interrupt with an `interrupt_done`, even if the turn had ended already
+                    self.send({"type": "interrupt"})
+                    print("\n⛔ interrupted")
+                    self._until("turn_done", event_sink)
+                    self._until("interrupt_done", event_sink)
+        finally:
+            self.close()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self._socket.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def messages(self) -> Iterator[Dict[str, Any]]:
+        for line in self._reader:
+            yield json.loads(line)
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+    def _until(self, message_type: str, event_sink: Any = None) -> None:
+        for message in self.messages():
+            if message["type"] == message_type:
+                return
+
+            if message["type"] == "output":
+                sys.stdout.write(message["text"])
+                sys.stdout.flush()
+            elif message["type"] == "event" and event_sink:
+                event_sink.emit(_parse_event(message["event"]))
+            elif message["type"] == "error":
+                raise DaemonError(message["message"])
+
+        raise DaemonError("the daemon closed the connection")
+
+
+def _parse_event(data: Dict[str, Any]) -> Any:
+    return _event_adapter().validate_python(data)
+
+
+@functools.cache
+def _event_adapter() -> Any:
+    # the events are needed only by the agent sessions, so pydantic is imported only for them
+    from pydantic import TypeAdapter
+    from geai.ge_openai.agent_events import AgentEvent
+
+    return TypeAdapter(AgentEvent)
@@ -0,0 +1,44 @@
+import hashlib
+import os
+from typing import Optional
+
+from geai.files import atomic_write
+from geai.metrics import registry
+
+disk_cache_lookups = registry.counter(
+    "geai_disk_cache_lookups_total", "Number of on-disk cache lookups, by cache and result (hit or miss).")
+
+
+class DiskCache:
+    """
+    A cache of text values in a folder, that many processes can share. Every
+    entry is a file named after the hash of its key. The entries are written
+    to a temporary file first, then renamed into place, so a reader never sees
+    a partial entry, and concurrent writers of the same key just replace each
+    other's (equal) value.
+    """
+    def __init__(self, folder: str, name: str):
+        self.folder = folder
+        self.name = name
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "rt", encoding="utf-8") as f:
+                value = f.read()
+        except FileNotFoundError:
+            disk_cache_lookups.inc(cache=self.name, result="miss")
+            return None
+
+        disk_cache_lookups.inc(cache=self.name, result="hit")
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        atomic_write(path, value)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        # a level of subfolders, so a big cache doesn't end up in a single huge folder
+        return os.path.join(self.folder, digest[:2], digest)
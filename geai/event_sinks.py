@@ -0,0 +1,191 @@
+import atexit
+import contextlib
+import queue
+import sys
+import threading
+from typing import Iterator, List, TextIO
+
+from geai.agent_output import AgentPrintout
+from geai.ge_openai.agent_events import AgentEvent
+
+
+class EventSink:
+    """
+    Receives the typed events of an agent run. Sinks are shared between runs,
+    so they're only closed when the program is done with them.
+    """
+    def emit(self, event: AgentEvent) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class NoOpEventSink(EventSink):
+    """A sink that drops all the events. Used when no output is desired."""
+
+
+class PrintoutEventSink(EventSink):
+    """
+    Renders the events on the terminal through an `AgentPrintout`: tool calls and
+    thinking go in the status line, reasoning is dimmed, text is printed as is.
+    """
+    def __init__(self, agent_output: AgentPrintout):
+        self.agent_output = agent_output
+
+        self._last_status = None
+        self._last_printed = None
+
+    def emit(self, event: AgentEvent) -> None:
+        handler = _PRINTOUT_HANDLERS.get(event.type)
+        if handler:
+            handler(self, event)
+
+    def _status(self, event) -> None:
+        if event.status == "tool":
+            self.agent_output.set_status(f"🔧 {event.detail}")
+            self._last_status = "tool"
+            return
+
+        if event.status == "thinking":
+            self.agent_output.set_status(f"⚙️ thinking...")
+            self._last_status = "think"
+            return
+
+        if self._last_status == "think":
+            self.agent_output.set_status(f"")
+            self._last_status = None
+
+    def _tool_call_start(self, event) -> None:
+        if self._last_status == "tool":
+            self.agent_output.set_status(f"")
+            self._last_status = None
+
+        self.agent_output.print(f"\n🔧 calling {event.name}({event.arguments})")
+        self._last_printed = "tool"
+
+    def _reasoning_delta(self, event) -> None:
+        if self._last_printed != "think":
+            self._last_printed = "think"
+            self.agent_output.print("\n")
+
+        # print as dimmed text
+        self.agent_output.print(event.delta, ansi_before="\033[2m", ansi_after="\033[0m")
+
+    def _text_delta(self, event) -> None:
+        if self._last_printed != "text":
+            self._last_printed = "text"
+            self.agent_output.print("\n")
+
+        self.agent_output.print(event.delta)
+
+    def _turn_changes(self, event) -> None:
+        lines = [f"\n📝 the turn changed {len(event.files)} files (diff in {event.diff_file}):"]
+        lines.extend(f"  {f.change} {f.file_name} +{f.added_lines} -{f.removed_lines}" for f in event.files)
+
+        if event.diagnostics:
+            lines.append("The static checks found these errors:")
+            lines.extend(f"* {d}" for d in event.diagnostics)
+
+        self.agent_output.print("\n".join(lines))
+        self._last_printed = "changes"
+
+
+_PRINTOUT_HANDLERS = {
+    "status": PrintoutEventSink._status,
+    "tool_call_start": PrintoutEventSink._tool_call_start,
+    "reasoning_delta": PrintoutEventSink._reasoning_delta,
+    "text_delta": PrintoutEventSink._text_delta,
+    "turn_changes": PrintoutEventSink._turn_changes,
+}
+
+
+class JsonlEventSink(EventSink):
+    """
+    Writes each event as a JSON line into a file, or into stdout when the target
+    is `-`. The serialization happens on the caller, but the actual writing is
+    done by a background thread, in batches, so a slow pipe doesn't stall the
+    event loop.
+    """
+    def __init__(self, target: str | TextIO):
+        if target == "-":
+            self._output = sys.stdout
+            self._owns_output = False
+        elif isinstance(target, str):
+            self._output = open(target, "at", encoding="utf-8", buffering=64 * 1024)
+            self._owns_output = True
+        else:
+            self._output = target
+            self._owns_output = False
+
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="jsonl-event-sink", daemon=True)
+        self._writer.start()
+
+        atexit.register(self.close)
+
+    def emit(self, event: AgentEvent) -> None:
+        if self._closed:
+            return
+
+        self._queue.put(event.model_dump_json())
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+        if self._owns_output:
+            self._output.close()
+
+    def _write_loop(self) -> None:
+        while True:
+            lines: List[str | None] = [self._queue.get()]
+
+            # drain whatever else is queued, so we write in batches
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = None in lines
+            self._output.write("".join(line + "\n" for line in lines if line is not None))
+            self._output.flush()
+
+            if done:
+                return
+
+
+class FanOutEventSink(EventSink):
+    """Forwards every event to all the given sinks."""
+    def __init__(self, sinks: List[EventSink]):
+        self.sinks = sinks
+
+    def emit(self, event: AgentEvent) -> None:
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+@contextlib.contextmanager
+def events_output(target: str | None) -> Iterator[str | TextIO | None]:
+    """
+    The target of the JSON-lines events, as given on the command line. When
+    it's stdout (`-`), everything else printed in the block (prompts,
+    notices, goodbyes) goes to stderr, so the stdout stays valid JSON lines.
+    """
+    if target != "-":
+        yield target
+        return
+
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        yield stdout
@@ -0,0 +1,259 @@
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ScriptedReply:
+    """What the fake model answers: some text, and/or some tool calls (name, JSON arguments)."""
+    text: str = ""
+    tool_calls: List[Tuple[str, str]] = field(default_factory=list)
+
+
+Responder = Callable[[Dict[str, Any]], ScriptedReply]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, a token being about 4 characters."""
+    return max(1, len(text) // 4)
+
+
+def echo_responder(request: Dict[str, Any]) -> ScriptedReply:
+    """The default responder, that always answers OK."""
+    return ScriptedReply(text="OK")
+
+
+class FakeModelServer:
+    """
+    A local stand-in for an OpenAI compatible server (`/v1/chat/completions`), that
+    serves scripted replies. It simulates the costs of a real model: a fixed latency
+    per request, the prompt processing (`prompt_token_rate` tokens/s) and the
+    generation (`token_rate` tokens/s). A rate of 0 means infinitely fast.
+
+    The server runs in a background thread:
+
+        with FakeModelServer(responder, latency=0.1, token_rate=50) as server:
+            configure_client(server.base_url)
+    """
+    def __init__(self,
+                 responder: Responder = echo_responder,
+                 latency: float = 0.0,
+                 token_rate: float = 0.0,
+                 prompt_token_rate: float = 0.0,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.responder = responder
+        self.latency = latency
+        self.token_rate = token_rate
+        self.prompt_token_rate = prompt_token_rate
+        self.host = host
+        self.port = port
+
+        self.request_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.model_time = 0.0
+
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1/"
+
+    def start(self) -> "FakeModelServer":
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name="fake-model-server", daemon=True).start()
+
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeModelServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def prompt_delay(self, request: Dict[str, Any]) -> Tuple[int, float]:
+        prompt_tokens = estimate_tokens(json.dumps(request.get("messages", [])))
+        delay = self.latency
+
+        if self.prompt_token_rate:
+            delay += prompt_tokens / self.prompt_token_rate
+
+        return prompt_tokens, delay
+
+    def record(self, prompt_tokens: int, completion_tokens: int, elapsed: float) -> None:
+        with self._lock:
+            self.request_count += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.model_time += elapsed
+
+
+def _make_handler(server: FakeModelServer) -> type:
+    class FakeModelHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            start = time.perf_counter()
+            reply = server.responder(request)
+
+            prompt_tokens, delay = server.prompt_delay(request)
+            time.sleep(delay)
+
+            pieces = _reply_pieces(reply)
+            completion_tokens = sum(estimate_tokens(text) for _, _, text in pieces)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+
+            if request.get("stream"):
+                # the client can stop reading early, then only what was sent is counted
+                completion_tokens = self._stream(request, reply, pieces, usage)
+            else:
+                self._complete(request, reply, usage)
+
+            server.record(prompt_tokens, completion_tokens, time.perf_counter() - start)
+
+        def _complete(self, request: Dict[str, Any], reply: ScriptedReply, usage: Dict[str, int]) -> None:
+            time.sleep(usage["completion_tokens"] / server.token_rate if server.token_rate else 0)
+
+            message: Dict[str, Any] = {"role": "assistant", "content": reply.text or None}
+            if reply.tool_calls:
+                message["tool_calls"] = [
+                    {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                     "function": {"name": name, "arguments": arguments}}
+                    for name, arguments in reply.tool_calls
+                ]
+
+            body = json.dumps({
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if reply.tool_calls else "stop"}],
+                "usage": usage,
+            }).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self,
+                    request: Dict[str, Any],
+                    reply: ScriptedReply,
+                    pieces: List[Tuple[str, int, str]],
+                    usage: Dict[str, int]) -> int:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            call_ids = [f"call_{uuid.uuid4().hex[:12]}" for _ in reply.tool_calls]
+            started_calls = set()
+            generation_start = time.perf_counter()
+            generated_tokens = 0
+
+            def send(data: str) -> None:
+                payload = f"data: {data}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+                self.wfile.flush()
+
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                return json.dumps({
+                    "id": chunk_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                })
+
+            try:
+                for kind, index, text in pieces:
+                    generated_tokens += estimate_tokens(text)
+
+                    if server.token_rate:
+                        # sleep until the scheduled time, so the sleeps don't drift
+                        wait = generation_start + generated_tokens / server.token_rate - time.perf_counter()
+                        if wait > 0:
+                            time.sleep(wait)
+
+                    if kind == "text":
+                        send(chunk({"role": "assistant", "content": text}))
+                        continue
+
+                    tool_delta: Dict[str, Any] = {"index": index, "function": {"arguments": text}}
+                    if index not in started_calls:
+                        started_calls.add(index)
+                        tool_delta.update(id=call_ids[index], type="function")
+                        tool_delta["function"]["name"] = reply.tool_calls[index][0]
+
+                    send(chunk({"role": "assistant", "tool_calls": [tool_delta]}))
+
+                send(chunk({}, "tool_calls" if reply.tool_calls else "stop"))
+
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    send(json.dumps({
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [],
+                        "usage": usage,
+                    }))
+
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # the client cancelled the generation
+                self.close_connection = True
+
+            return generated_tokens
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeModelHandler
+
+
+def _reply_pieces(reply: ScriptedReply, piece_size: int = 16) -> List[Tuple[str, int, str]]:
+    """
+    Splits the reply into the pieces that get streamed: ("text", 0, text) and
+    ("tool", call_index, arguments_piece).
+    """
+    pieces: List[Tuple[str, int, str]] = []
+
+    for i in range(0, len(reply.text), piece_size):
+        pieces.append(("text", 0, reply.text[i:i + piece_size]))
+
+    for index, (_, arguments) in enumerate(reply.tool_calls):
+        if not arguments:
+            pieces.append(("tool", index, ""))
+        for i in range(0, len(arguments), piece_size):
+            pieces.append(("tool", index, arguments[i:i + piece_size]))
+
+    return pieces
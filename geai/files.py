@@ -0,0 +1,25 @@
+import os
+import tempfile
+from typing import Union
+
+
+def atomic_write(path: str, data: Union[str, bytes]) -> None:
+    """
+    Writes the file through a temporary file in the same folder, renamed into
+    place, so a reader (or a crash) never sees a partial file. Text is written
+    as utf-8.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+
+    try:
+        if isinstance(data, bytes):
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        else:
+            with os.fdopen(fd, "wt", encoding="utf-8") as f:
+                f.write(data)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
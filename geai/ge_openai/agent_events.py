@@ -0,0 +1,184 @@
+import functools
+import time
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, TYPE_CHECKING
+
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from openai.types.responses import ResponseOutputItemAddedEvent, ResponseOutputItemDoneEvent, \
+        ResponseTextDeltaEvent, ResponseReasoningTextDeltaEvent, ResponseCompletedEvent
+
+
+class AgentEventBase(BaseModel):
+    """Common fields of all the events an agent run produces."""
+    agent: str = ""
+    timestamp: float = Field(default_factory=time.time)
+
+
+class TextDeltaEvent(AgentEventBase):
+    """A chunk of the answer text."""
+    type: Literal["text_delta"] = "text_delta"
+    delta: str
+
+
+class ReasoningDeltaEvent(AgentEventBase):
+    """A chunk of the reasoning (thinking) text."""
+    type: Literal["reasoning_delta"] = "reasoning_delta"
+    delta: str
+
+
+class ToolCallStartEvent(AgentEventBase):
+    """The model finished emitting a tool call, and the tool is about to run."""
+    type: Literal["tool_call_start"] = "tool_call_start"
+    call_id: str
+    name: str
+    arguments: str
+
+
+class ToolCallEndEvent(AgentEventBase):
+    """The tool finished running, and its output goes back to the model."""
+    type: Literal["tool_call_end"] = "tool_call_end"
+    call_id: str
+    name: str
+    output: str
+
+
+class StatusEvent(AgentEventBase):
+    """
+    What the model is busy with. `status` is one of "tool" (composing a tool
+    call, `detail` holds the tool name), "thinking", or "" when idle.
+    """
+    type: Literal["status"] = "status"
+    status: str
+    detail: str = ""
+
+
+class UsageEvent(AgentEventBase):
+    """Token usage of a single model request."""
+    type: Literal["usage"] = "usage"
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+
+
+class ChangedFile(BaseModel):
+    """A workspace file changed by a turn. `change` is "A" (added), "M" (modified) or "D" (deleted)."""
+    file_name: str
+    change: str
+    added_lines: int
+    removed_lines: int
+
+
+class TurnChangesEvent(AgentEventBase):
+    """
+    The workspace files a finished turn changed, not produced by the model.
+    `diff_file` is the saved diff of the turn, relative to the workspace, and
+    `diagnostics` the static check errors of the changed python files.
+    """
+    type: Literal["turn_changes"] = "turn_changes"
+    files: List[ChangedFile]
+    diff_file: str
+    diagnostics: List[str] = Field(default_factory=list)
+
+
+AgentEvent = Union[TextDeltaEvent, ReasoningDeltaEvent, ToolCallStartEvent, ToolCallEndEvent, StatusEvent, UsageEvent,
+                   TurnChangesEvent]
+
+
+class StreamEventTranslator:
+    """
+    Translates the raw `Runner.run_streamed` events into typed `AgentEvent`s.
+
+    The dispatch is done through lookup tables keyed by the exact event types,
+    instead of a chain of `isinstance` checks. Events that are not in the tables
+    are ignored. The stream events are told apart by their `type` field, so the
+    agents SDK doesn't need to be imported for them.
+    """
+    def __init__(self, agent_title: str = ""):
+        self.agent_title = agent_title
+        self._tool_names: Dict[str, str] = dict()
+
+    def translate(self, event: Any) -> Optional[AgentEvent]:
+        event_type = getattr(event, "type", None)
+
+        if event_type == "raw_response_event":
+            data = event.data
+            item = getattr(data, "item", None)
+            handler = _raw_event_handlers().get((type(data), type(item) if item is not None else None))
+            return handler(self, data) if handler else None
+
+        if event_type == "run_item_stream_event":
+            handler = _RUN_ITEM_HANDLERS.get(event.name)
+            return handler(self, event.item) if handler else None
+
+        return None
+
+    def _tool_call_added(self, data: "ResponseOutputItemAddedEvent") -> AgentEvent:
+        return StatusEvent(agent=self.agent_title, status="tool", detail=data.item.name)
+
+    def _tool_call_done(self, data: "ResponseOutputItemDoneEvent") -> AgentEvent:
+        self._tool_names[data.item.call_id] = data.item.name
+
+        return ToolCallStartEvent(agent=self.agent_title,
+                                  call_id=data.item.call_id,
+                                  name=data.item.name,
+                                  arguments=data.item.arguments)
+
+    def _reasoning_added(self, data: "ResponseOutputItemAddedEvent") -> AgentEvent:
+        return StatusEvent(agent=self.agent_title, status="thinking")
+
+    def _reasoning_done(self, data: "ResponseOutputItemDoneEvent") -> AgentEvent:
+        return StatusEvent(agent=self.agent_title, status="")
+
+    def _reasoning_delta(self, data: "ResponseReasoningTextDeltaEvent") -> Optional[AgentEvent]:
+        if not data.delta:
+            return None
+
+        return ReasoningDeltaEvent(agent=self.agent_title, delta=data.delta)
+
+    def _text_delta(self, data: "ResponseTextDeltaEvent") -> Optional[AgentEvent]:
+        if not data.delta:
+            return None
+
+        return TextDeltaEvent(agent=self.agent_title, delta=data.delta)
+
+    def _completed(self, data: "ResponseCompletedEvent") -> Optional[AgentEvent]:
+        usage = data.response.usage
+        if usage is None:
+            return None
+
+        return UsageEvent(agent=self.agent_title,
+                          input_tokens=usage.input_tokens,
+                          output_tokens=usage.output_tokens,
+                          total_tokens=usage.total_tokens)
+
+    def _tool_output(self, item: Any) -> AgentEvent:
+        call_id = item.call_id or ""
+
+        return ToolCallEndEvent(agent=self.agent_title,
+                                call_id=call_id,
+                                name=self._tool_names.pop(call_id, ""),
+                                output=str(item.output))
+
+
+@functools.cache
+def _raw_event_handlers() -> Dict[Tuple[type, Optional[type]], Callable[[StreamEventTranslator, Any], Optional[AgentEvent]]]:
+    # built on the first event, the openai types are imported only when an agent actually runs
+    from openai.types.responses import ResponseOutputItemAddedEvent, ResponseFunctionToolCall, \
+        ResponseOutputItemDoneEvent, ResponseReasoningItem, ResponseTextDeltaEvent, ResponseReasoningTextDeltaEvent, \
+        ResponseCompletedEvent
+
+    return {
+        (ResponseOutputItemAddedEvent, ResponseFunctionToolCall): StreamEventTranslator._tool_call_added,
+        (ResponseOutputItemDoneEvent, ResponseFunctionToolCall): StreamEventTranslator._tool_call_done,
+        (ResponseOutputItemAddedEvent, ResponseReasoningItem): StreamEventTranslator._reasoning_added,
+        (ResponseOutputItemDoneEvent, ResponseReasoningItem): StreamEventTranslator._reasoning_done,
+        (ResponseReasoningTextDeltaEvent, None): StreamEventTranslator._reasoning_delta,
+        (ResponseTextDeltaEvent, None): StreamEventTranslator._text_delta,
+        (ResponseCompletedEvent, None): StreamEventTranslator._completed,
+    }
+
+
+_RUN_ITEM_HANDLERS: Dict[str, Callable[[StreamEventTranslator, Any], Optional[AgentEvent]]] = {
+    "tool_output": StreamEventTranslator._tool_output,
+}
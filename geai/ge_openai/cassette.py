@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+try:
+    import httpx2 as httpx  # the HTTP client of the newer openai SDKs
+except ImportError:
+    import httpx
+
+CASSETTE_MODES = ("record", "replay")
+REPLAY_SPEEDS = ("recorded", "fast")
+
+# headers that describe the original transfer, not the content we replay
+_DROPPED_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection"}
+
+
+class CassetteMismatchError(Exception):
+    """A replayed request has no recorded interaction to answer it."""
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    An HTTP transport for the model client, that records all the requests and
+    their (streamed) responses into a cassette file, or replays them from it.
+
+    The cassette is a JSON lines file, one interaction per line, with the request
+    body and every response chunk, together with its time offset from the start
+    of the request.
+
+    When replaying, a request is answered by the first unused interaction with
+    the same request. Requests that don't match any recording are flagged as
+    divergences, and answered with the next unused interaction in the recorded
+    order, unless `strict` is set, when they fail.
+    """
+    def __init__(self, file_name: str, mode: str, speed: str = "fast", strict: bool = False):
+        if mode not in CASSETTE_MODES:
+            raise Exception(f"unknown cassette mode: {mode}, must be one of {CASSETTE_MODES}")
+
+        if speed not in REPLAY_SPEEDS:
+            raise Exception(f"unknown replay speed: {speed}, must be one of {REPLAY_SPEEDS}")
+
+        self.file_name = file_name
+        self.mode = mode
+        self.speed = speed
+        self.strict = strict
+
+        self.divergences: List[str] = []
+        self.replayed = 0
+        self.recorded = 0
+
+        self._lock = threading.Lock()
+
+        if mode == "record":
+            self._transport = httpx.AsyncHTTPTransport()
+            # a new recording replaces the old one
+            open(file_name, "wt", encoding="utf-8").close()
+            return
+
+        self._interactions: List[Dict[str, Any]] = []
+        with open(file_name, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._interactions.append(json.loads(line))
+
+        self._unused: Deque[int] = deque(range(len(self._interactions)))
+        self._by_key: Dict[str, Deque[int]] = dict()
+        for index, interaction in enumerate(self._interactions):
+            self._by_key.setdefault(interaction["request"]["key"], deque()).append(index)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = _parse_body(await request.aread())
+        key = request_key(request.method, request.url.path, body)
+
+        if self.mode == "record":
+            return await self._record(request, body, key)
+
+        return self._replay(request, body, key)
+
+    async def aclose(self) -> None:
+        if self.mode == "record":
+            await self._transport.aclose()
+
+    def report(self) -> str:
+        """A short summary of the recording or of the replay, with the divergences."""
+        if self.mode == "record":
+            return f"📼 recorded {self.recorded} model requests into {self.file_name}"
+
+        lines = [f"📼 replayed {self.replayed} model requests from {self.file_name}, "
+                 f"{len(self.divergences)} diverged"]
+        lines.extend(f"  ⚠️ {divergence}" for divergence in self.divergences)
+
+        return "\n".join(lines)
+
+    async def _record(self, request: httpx.Request, body: Any, key: str) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        chunks: List[List[Any]] = []
+
+        async def recorded_chunks() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in _decoded(response):
+                    chunks.append([time.perf_counter() - start, chunk.decode("utf-8", "surrogateescape")])
+                    yield chunk
+            finally:
+                await response.aclose()
+                self._append({
+                    "request": {"method": request.method, "path": request.url.path, "key": key, "body": body},
+                    "response": {"status": response.status_code, "headers": _kept_headers(response.headers),
+                                 "chunks": chunks},
+                })
+
+        return httpx.Response(response.status_code,
+                              headers=_kept_headers(response.headers),
+                              stream=_ChunkStream(recorded_chunks()),
+                              request=request)
+
+    def _append(self, interaction: Dict[str, Any]) -> None:
+        with self._lock:
+            with open(self.file_name, "at", encoding="utf-8") as f:
+                f.write(json.dumps(interaction) + "\n")
+            self.recorded += 1
+
+    def _replay(self, request: httpx.Request, body: Any, key: str) -> httpx.Response:
+        with self._lock:
+            index = self._take(key)
+
+            if index is None:
+                if self.strict or not self._unused:
+                    raise CassetteMismatchError(f"no recorded interaction for {request.method} {request.url.path}")
+
+                index = self._unused.popleft()
+                self._by_key[self._interactions[index]["request"]["key"]].remove(index)
+
+                expected = self._interactions[index]["request"]["body"]
+                self.divergences.append(f"request #{self.replayed + 1} to {request.url.path} diverged from "
+                                        f"recording #{index + 1}: {describe_difference(expected, body)}")
+
+            self.replayed += 1
+
+        recorded = self._interactions[index]["response"]
+
+        return httpx.Response(recorded["status"],
+                              headers=recorded["headers"],
+                              stream=_ChunkStream(self._replayed_chunks(recorded["chunks"])),
+                              request=request)
+
+    def _take(self, key: str) -> Optional[int]:
+        candidates = self._by_key.get(key)
+        if not candidates:
+            return None
+
+        index = candidates.popleft()
+        self._unused.remove(index)
+
+        return index
+
+    async def _replayed_chunks(self, chunks: List[List[Any]]) -> AsyncIterator[bytes]:
+        start = time.perf_counter()
+
+        for offset, text in chunks:
+            if self.speed == "recorded":
+                wait = start + offset - time.perf_counter()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            yield text.encode("utf-8", "surrogateescape")
+
+
+def cassette_http_client(transport: CassetteTransport) -> httpx.AsyncClient:
+    """An HTTP client for `AsyncOpenAI`, going through the cassette."""
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(600, connect=10))
+
+
+class _ChunkStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._chunks.aclose()
+
+
+def request_key(method: str, path: str, body: Any) -> str:
+    """Identifies a request by its method, path, and its normalized body."""
+    normalized = json.dumps([method, path, body], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def describe_difference(expected: Any, actual: Any) -> str:
+    """Points to the first difference between a recorded request body and the current one."""
+    if not isinstance(expected, dict) or not isinstance(actual, dict):
+        return "the body is different"
+
+    for field in sorted(set(expected) | set(actual)):
+        if field == "messages":
+            continue
+        if expected.get(field) != actual.get(field):
+            return f"`{field}` is different"
+
+    expected_messages = expected.get("messages") or []
+    actual_messages = actual.get("messages") or []
+
+    for i, (old, new) in enumerate(zip(expected_messages, actual_messages)):
+        if old != new:
+            return f"message #{i + 1} ({new.get('role', '?')}) is different"
+
+    return f"{len(actual_messages)} messages instead of {len(expected_messages)}"
+
+
+async def _decoded(response: httpx.Response) -> AsyncIterator[bytes]:
+    # a transport response only has the raw stream, so we wrap it to get the decoding
+    wrapped = httpx.Response(response.status_code, headers=response.headers, stream=response.stream)
+
+    async for chunk in wrapped.aiter_bytes():
+        yield chunk
+
+
+def _kept_headers(headers: httpx.Headers) -> Dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS}
+
+
+def _parse_body(content: bytes) -> Any:
+    if not content:
+        return None
+
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", "surrogateescape")
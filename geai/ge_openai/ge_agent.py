@@ -1,18 +1,94 @@
+import asyncio
+import atexit
+import os
 import re
-from typing import List, Any, Dict, Optional, Tuple, AsyncIterable
+from typing import List, Any, Dict, Optional, Tuple, AsyncIterable, TYPE_CHECKING
 
-from openai import AsyncOpenAI
-from openai.types.responses import ResponseOutputItemAddedEvent, ResponseFunctionToolCall, ResponseOutputItemDoneEvent, \
-    ResponseReasoningItem, ResponseTextDeltaEvent, ResponseReasoningTextDeltaEvent
+from geai.agent_output import AgentPrintout
+from geai.event_sinks import EventSink, NoOpEventSink, PrintoutEventSink
+from geai.ge_openai.agent_events import StreamEventTranslator
+from geai.ge_openai.model_router import resolve_model
+from geai.tools import memo
+from geai.tools.lazy_tool import resolve_tools
 
-from geai.agent_output import AgentPrintout, NoOpAgentPrintout
-from agents import Agent, Runner, OpenAIChatCompletionsModel, AgentOutputSchemaBase, ModelSettings, \
-    RawResponsesStreamEvent
+if TYPE_CHECKING:
+    # the SDKs are imported only when the first agent is created, so the CLIs start fast
+    from agents import AgentOutputSchemaBase
+    from openai import AsyncOpenAI
+    from geai.ge_openai.cassette import CassetteTransport
 
-local_client = AsyncOpenAI(
-    base_url="http://gmktek:11434/v1/",
-    api_key="EMPTY",
-)
+DEFAULT_BASE_URL = os.environ.get("GEAI_BASE_URL", "http://gmktek:11434/v1/")
+
+# created on first use, see `get_local_client`
+local_client: Optional["AsyncOpenAI"] = None
+
+# the content of the agent files, with the mtime they were read at
+agent_files: Dict[str, Tuple[float, str]] = dict()
+
+
+def get_local_client() -> "AsyncOpenAI":
+    if local_client is None:
+        configure_client(DEFAULT_BASE_URL)
+
+    return local_client
+
+
+def configure_client(base_url: str,
+                     api_key: str = "EMPTY",
+                     http_client: Optional[Any] = None,
+                     max_retries: int = 2) -> None:
+    """
+    Points all the agents created from now on to another OpenAI compatible server.
+    """
+    from openai import AsyncOpenAI
+
+    global local_client
+
+    local_client = AsyncOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        http_client=http_client,
+        max_retries=max_retries,
+    )
+
+
+def use_cassette(file_name: str, mode: str, speed: str = "fast", strict: bool = False) -> "CassetteTransport":
+    """
+    Records all the model traffic of the agents created from now on into the
+    cassette file, or replays it from there (see `CassetteTransport`).
+    """
+    from geai.ge_openai.cassette import CassetteTransport, cassette_http_client
+
+    transport = CassetteTransport(file_name, mode, speed=speed, strict=strict)
+
+    configure_client(str(local_client.base_url) if local_client else DEFAULT_BASE_URL,
+                     http_client=cassette_http_client(transport),
+                     # a replay must not retry a request that diverged
+                     max_retries=0 if mode == "replay" else 2)
+
+    return transport
+
+
+def use_response_cache(folder: str) -> None:
+    """
+    Answers the requests of the agents created from now on from the on-disk
+    response cache in the folder, when an identical request was already answered
+    (see `ResponseCacheTransport`).
+    """
+    from geai.disk_cache import DiskCache
+    from geai.ge_openai.response_cache import ResponseCacheTransport, response_cache_http_client
+
+    transport = ResponseCacheTransport(DiskCache(folder, "responses"))
+
+    configure_client(str(local_client.base_url) if local_client else DEFAULT_BASE_URL,
+                     http_client=response_cache_http_client(transport))
+
+
+if os.environ.get("GEAI_CASSETTE"):
+    active_cassette = use_cassette(os.environ["GEAI_CASSETTE"],
+                                   os.environ.get("GEAI_CASSETTE_MODE", "replay"),
+                                   speed=os.environ.get("GEAI_CASSETTE_SPEED", "fast"))
+    atexit.register(lambda: print(active_cassette.report()))
 
 agent_index = 1
 
@@ -25,9 +101,11 @@ class GeAgent:
                  agent_file: str,
                  agent_output: AgentPrintout | None = None,
                  tools: List[Any]=[],
-                 output_type: type[Any] | AgentOutputSchemaBase | None = None,
+                 output_type: "type[Any] | AgentOutputSchemaBase | None" = None,
                  data: Optional[Dict[str, str]] = None,
-                 session: Optional[any] = None):
+                 session: Optional[any] = None,
+                 event_sink: EventSink | None = None,
+                 model: Optional[str] = None):
         """
         This creates an agent definition from a file. The agent file is divided in two parts divided by at least
         one empty line:
@@ -38,11 +116,13 @@ class GeAgent:
         :param tools:
         :param output_type:
         :param data:
+        :param event_sink: where the typed events of `async_run` go. If not set, the
+                           events are rendered into the `agent_output`, if any.
+        :param model: runs on this model, instead of the model from the agent file metadata.
         """
 
         try:
-            with open(agent_file, encoding="UTF-8") as f:
-                agent_file_content = f.read()
+            agent_file_content = read_agent_file(agent_file)
         except:
             print(f"unable to open agent file: {agent_file}")
             raise
@@ -55,20 +135,28 @@ class GeAgent:
         metadata, instruction_lines = extract_metadata(agent_file_lines)
 
         self.title = metadata['title']
-        self.model_name = metadata['model']
-        self.model_name = "qwen3-coder-next"
+        self.model_name = model if model else resolve_model(metadata['model'])
 
         self.instructions = "\n".join(instruction_lines)
         self.tools = tools
         self.session = session
-        self.agent_output = agent_output if agent_output else NoOpAgentPrintout()
 
-        self._last_status = None
-        self._last_printed = None
-
-        local_model = OpenAIChatCompletionsModel(
-            model=self.model_name,
-            openai_client=local_client,
+        if event_sink:
+            self.event_sink = event_sink
+        elif agent_output:
+            self.event_sink = PrintoutEventSink(agent_output)
+        else:
+            self.event_sink = NoOpEventSink()
+
+        from agents import Agent, OpenAIChatCompletionsModel, ModelSettings
+        from geai.ge_openai.model_telemetry import MeteredModel, ToolMetricsHooks
+
+        local_model = MeteredModel(OpenAIChatCompletionsModel(
+                model=self.model_name,
+                openai_client=get_local_client(),
+            ),
+            agent_title=self.title,
+            model_name=self.model_name,
         )
 
         global agent_index
@@ -77,95 +165,118 @@ class GeAgent:
         self.agent = Agent(
             name=self.title + f' #{agent_index}',
             instructions=self.instructions,
-            tools=tools,
+            tools=resolve_tools(tools),
             model=local_model,
             output_type=output_type,
-            model_settings=ModelSettings(top_p=0.1, max_tokens=202752),
+            hooks=ToolMetricsHooks(self.title, self.model_name),
+            # the file tools lock the files they change, so the tool calls can run in parallel
+            model_settings=ModelSettings(top_p=0.1,
+                                         max_tokens=202752,
+                                         include_usage=True,
+                                         parallel_tool_calls=True if tools else None),
         )
 
     async def run(self, user_input: str) -> Any:
-        result = await Runner.run(
-            self.agent,
-            input=user_input,
-            max_turns=200,  # how many tools to call
-        )
-        return result.final_output
+        from agents import Runner
 
-    async def async_run(self, user_input: str) -> AsyncIterable[str]:
-        result = Runner.run_streamed(
+        # we always stream, so the time to the first token gets measured
+        with memo.turn():
+            result = Runner.run_streamed(
                 self.agent,
                 input=user_input,
-                max_turns=200,
-                session=self.session,
-        )
+                max_turns=200,  # how many tools to call
+            )
 
-        async for event in result.stream_events():
-            if isinstance(event, RawResponsesStreamEvent) and \
-                    isinstance(event.data, ResponseOutputItemAddedEvent) and \
-                    isinstance(event.data.item, ResponseFunctionToolCall):
-                self.agent_output.set_status(f"🔧 {event.data.item.name}")
-                self._last_status = "tool"
-                continue
-
-            if isinstance(event, RawResponsesStreamEvent) and \
-                    isinstance(event.data, ResponseOutputItemDoneEvent) and \
-                    isinstance(event.data.item, ResponseFunctionToolCall):
-                if self._last_status == "tool":
-                    self.agent_output.set_status(f"")
-                    self._last_status = None
-
-                tool_arguments = event.data.item.arguments
-                self.agent_output.print(f"\n🔧 calling {event.data.item.name}({tool_arguments})")
-                self._last_printed = "tool"
-
-                continue
-
-            if isinstance(event, RawResponsesStreamEvent) and \
-                    isinstance(event.data, ResponseOutputItemAddedEvent) and \
-                    isinstance(event.data.item, ResponseReasoningItem):
-                self.agent_output.set_status(f"⚙️ thinking...")
-                self._last_status = "think"
-
-                continue
-
-            if isinstance(event, RawResponsesStreamEvent) and \
-                    isinstance(event.data, ResponseOutputItemDoneEvent) and \
-                    isinstance(event.data.item, ResponseReasoningItem):
-                if self._last_status == "think":
-                    self.agent_output.set_status(f"")
-                    self._last_status = None
-
-                continue
-
-            if isinstance(event, RawResponsesStreamEvent) and \
-                    isinstance(event.data, ResponseReasoningTextDeltaEvent):
-                if event.data.delta == "":
-                    continue
+        async for _ in result.stream_events():
+            pass
+
+        return result.final_output
+
+    async def async_run(self, user_input: str) -> AsyncIterable[str]:
+        from agents import Runner
 
-                if self._last_printed != "think":
-                    self._last_printed = "think"
-                    self.agent_output.print("\n")
+        history_length = len(await self.session.get_items()) if self.session else 0
 
-                # print as dimmed text
-                self.agent_output.print(event.data.delta, ansi_before="\033[2m", ansi_after="\033[0m")
+        with memo.turn():
+            result = Runner.run_streamed(
+                    self.agent,
+                    input=user_input,
+                    max_turns=200,
+                    session=self.session,
+            )
 
-                continue
+        translator = StreamEventTranslator(self.title)
+        output: List[str] = []
 
-            if isinstance(event, RawResponsesStreamEvent) and \
-                    isinstance(event.data, ResponseTextDeltaEvent):
-                if event.data.delta == "":
+        try:
+            async for event in result.stream_events():
+                agent_event = translator.translate(event)
+
+                if agent_event is None:
                     continue
 
-                if self._last_printed != "text":
-                    self._last_printed = "text"
-                    self.agent_output.print("\n")
+                self.event_sink.emit(agent_event)
+
+                if agent_event.type == "text_delta":
+                    output.append(agent_event.delta)
+                    yield agent_event.delta
+        except asyncio.CancelledError:
+            # interrupted (e.g. Ctrl+C): stop the run, and keep what it generated in the session
+            result.cancel()
+            if result.run_loop_task:
+                await asyncio.wait([result.run_loop_task])
+
+            if self.session:
+                await keep_interrupted_turn(self.session, history_length, user_input, "".join(output))
+
+            raise
+        finally:
+            # the caller stopped reading, e.g. it already has its answer: stop the generation too
+            if not result.is_complete:
+                result.cancel()
+
+
+async def keep_interrupted_turn(session: Any, history_length: int, user_input: str, output: str) -> None:
+    """
+    Leaves the session consistent after an interrupted turn: the items the run
+    saved so far (e.g. a tool call without its result) are replaced with the
+    user input, and the output generated until the interruption.
+    """
+    while len(await session.get_items()) > history_length:
+        await session.pop_item()
+
+    await session.add_items([
+        {"role": "user", "content": user_input},
+        {"role": "assistant", "content": f"{output}\n\n[interrupted by the user]".lstrip()},
+    ])
+
+
+def load_agent_metadata(agent_file: str) -> Dict[str, str]:
+    """
+    Reads only the metadata (title, model, etc) of an agent file.
+    """
+    metadata, _ = extract_metadata(read_agent_file(agent_file).splitlines())
+
+    return metadata
+
+
+def read_agent_file(agent_file: str) -> str:
+    """
+    Reads the agent file, or takes it from the cache if it didn't change since
+    it was last read.
+    """
+    mtime = os.stat(agent_file).st_mtime
+    cached = agent_files.get(agent_file)
+
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(agent_file, encoding="UTF-8") as f:
+        content = f.read()
 
-                self.agent_output.print(event.data.delta)
+    agent_files[agent_file] = (mtime, content)
 
-                yield event.data.delta
-            else:
-                pass
-                # print(f"--> unexpected event: {event}")
+    return content
 
 
 def extract_metadata(agent_lines: List[str]) -> Tuple[Dict[str, str], List[str]]:
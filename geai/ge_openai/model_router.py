@@ -0,0 +1,110 @@
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from geai.metrics import registry
+
+cascade_runs = registry.counter(
+    "geai_cascade_runs_total", "Number of cascaded tasks.")
+cascade_escalated_runs = registry.counter(
+    "geai_cascade_escalated_runs_total", "Number of cascaded tasks that escalated at least once.")
+cascade_escalations = registry.counter(
+    "geai_cascade_escalations_total", "Number of escalations from a model to the next one.")
+cascade_answers = registry.counter(
+    "geai_cascade_answers_total", "Number of cascaded tasks, by the model that gave the final answer.")
+
+
+def resolve_model(template_model: str) -> str:
+    """
+    Picks the model that actually runs for the model requested by a template:
+    * `GEAI_MODEL` forces a single model for everything,
+    * `GEAI_MODEL_ALIASES` (`requested=actual,...`) remaps some of the models, e.g. if the
+      server doesn't have them,
+    * otherwise the template model is used as is.
+    """
+    forced_model = os.environ.get("GEAI_MODEL")
+    if forced_model:
+        return forced_model
+
+    return model_aliases().get(template_model, template_model)
+
+
+def model_aliases() -> Dict[str, str]:
+    aliases: Dict[str, str] = dict()
+
+    for alias in os.environ.get("GEAI_MODEL_ALIASES", "").split(","):
+        if "=" in alias:
+            requested, actual = alias.split("=", 1)
+            aliases[requested.strip()] = actual.strip()
+
+    return aliases
+
+
+def parse_cascade(metadata: Dict[str, str]) -> List[str]:
+    """
+    Reads the `cascade=small,large` metadata of a template: the models to try in
+    order, from the cheapest to the most capable. Without it, only the template
+    model is used. The models are resolved, and the duplicates removed, so
+    forcing a single model doesn't run the same model twice.
+    """
+    cascade = metadata.get("cascade") or metadata["model"]
+    models: List[str] = []
+
+    for model in cascade.split(","):
+        model = resolve_model(model.strip())
+        if model and model not in models:
+            models.append(model)
+
+    return models
+
+
+async def run_cascade(task: str,
+                      models: List[str],
+                      attempt: Callable[[str], Awaitable[Any]],
+                      accept: Callable[[Any], bool]) -> Tuple[Any, str]:
+    """
+    Runs the attempt with each model in order, and stops at the first result
+    that is accepted. A failed attempt escalates to the next model as well. If
+    no model gives an acceptable result, the last result is returned (or the
+    last error raised). Escalations are counted per task, see `escalation_rate`.
+
+    :return: the result, and the model that produced it.
+    :raises ValueError: if there are no models to run.
+    """
+    if not models:
+        raise ValueError(f"no models to run the {task} cascade with, the cascade resolved to no model names")
+
+    result: Any = None
+    error: Optional[Exception] = None
+
+    for index, model in enumerate(models):
+        if index > 0:
+            cascade_escalations.inc(task=task, from_model=models[index - 1], to_model=model)
+
+        try:
+            result = await attempt(model)
+            error = None
+        except Exception as e:
+            error = e
+            continue
+
+        if accept(result):
+            break
+
+    model = models[index]
+    cascade_runs.inc(task=task)
+    cascade_answers.inc(task=task, model=model)
+
+    if index > 0:
+        cascade_escalated_runs.inc(task=task)
+
+    if error:
+        raise error
+
+    return result, model
+
+
+def escalation_rate(task: str) -> float:
+    """How many of the cascaded runs of the task escalated at least once."""
+    runs = cascade_runs.value(task=task)
+
+    return cascade_escalated_runs.value(task=task) / runs if runs else 0.0
@@ -0,0 +1,133 @@
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from openai.types.responses import ResponseCompletedEvent
+
+from agents import AgentHooks, Model, ModelResponse
+from geai.metrics import registry, LATENCY_BUCKETS, TOKEN_BUCKETS, RATE_BUCKETS
+from geai.tracing import tracer, Span
+
+model_requests = registry.counter(
+    "geai_model_requests_total", "Number of model requests.")
+model_time_to_first_token = registry.histogram(
+    "geai_model_time_to_first_token_seconds", "Time until the first streamed event of a model request.",
+    LATENCY_BUCKETS)
+model_request_duration = registry.histogram(
+    "geai_model_request_duration_seconds", "Total latency of a model request.", LATENCY_BUCKETS)
+model_prompt_tokens = registry.histogram(
+    "geai_model_prompt_tokens", "Prompt tokens of a model request.", TOKEN_BUCKETS)
+model_completion_tokens = registry.histogram(
+    "geai_model_completion_tokens", "Completion tokens of a model request.", TOKEN_BUCKETS)
+model_tokens_per_second = registry.histogram(
+    "geai_model_completion_tokens_per_second", "Generation speed, after the first token.", RATE_BUCKETS)
+model_tool_calls = registry.counter(
+    "geai_model_tool_calls_total", "Number of tool calls executed for the model.")
+tool_duration = registry.histogram(
+    "geai_tool_duration_seconds", "Latency of a tool call.", LATENCY_BUCKETS)
+
+
+class MeteredModel(Model):
+    """
+    Wraps a model, and records the latency and the token counts of each request
+    into the metrics registry, tagged with the agent title and the model name.
+    """
+    def __init__(self, model: Model, agent_title: str, model_name: str):
+        self.model = model
+        self.agent_title = agent_title
+        self.model_name = model_name
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        span = tracer.start_span("model request", "model", agent=self.agent_title, model=self.model_name)
+        start = time.perf_counter()
+        input_tokens = output_tokens = 0
+
+        try:
+            response = await self.model.get_response(*args, **kwargs)
+
+            if response.usage:
+                input_tokens = response.usage.input_tokens
+                output_tokens = response.usage.output_tokens
+
+            return response
+        finally:
+            self._record(span, start, None, input_tokens, output_tokens)
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[Any]:
+        span = tracer.start_span("model request", "model", agent=self.agent_title, model=self.model_name)
+        start = time.perf_counter()
+        first_event: Optional[float] = None
+        input_tokens = output_tokens = 0
+
+        try:
+            async for event in self.model.stream_response(*args, **kwargs):
+                if first_event is None:
+                    first_event = time.perf_counter()
+
+                if type(event) is ResponseCompletedEvent and event.response.usage:
+                    input_tokens = event.response.usage.input_tokens
+                    output_tokens = event.response.usage.output_tokens
+
+                yield event
+        finally:
+            self._record(span, start, first_event, input_tokens, output_tokens)
+
+    async def close(self) -> None:
+        await self.model.close()
+
+    def _record(self,
+                span: Optional[Span],
+                start: float,
+                first_event: Optional[float],
+                input_tokens: int,
+                output_tokens: int) -> None:
+        end = time.perf_counter()
+
+        if span:
+            span.attributes.update(prompt_tokens=input_tokens, completion_tokens=output_tokens)
+            if first_event is not None:
+                span.attributes["time_to_first_token"] = f"{first_event - start:.3f}s"
+            span.finish()
+
+        labels = {"agent": self.agent_title, "model": self.model_name}
+
+        model_requests.inc(**labels)
+        model_request_duration.observe(end - start, **labels)
+        model_prompt_tokens.observe(input_tokens, **labels)
+        model_completion_tokens.observe(output_tokens, **labels)
+
+        if first_event is not None:
+            model_time_to_first_token.observe(first_event - start, **labels)
+
+            if output_tokens and end > first_event:
+                model_tokens_per_second.observe(output_tokens / (end - first_event), **labels)
+
+
+class ToolMetricsHooks(AgentHooks):
+    """
+    Agent hooks that record how many tools were called, and how long each one took.
+    Each tool call is also traced as a span.
+    """
+    def __init__(self, agent_title: str, model_name: str):
+        self.agent_title = agent_title
+        self.model_name = model_name
+        self._started: Dict[Any, Tuple[float, Optional[Span]]] = dict()
+
+    async def on_tool_start(self, context, agent, tool) -> None:
+        span = tracer.start_span(tool.name, "tool", agent=self.agent_title)
+        self._started[_call_key(context, tool)] = (time.perf_counter(), span)
+
+    async def on_tool_end(self, context, agent, tool, result) -> None:
+        start, span = self._started.pop(_call_key(context, tool), (None, None))
+        labels = {"agent": self.agent_title, "model": self.model_name, "tool": tool.name}
+
+        model_tool_calls.inc(**labels)
+
+        if span:
+            span.finish()
+
+        if start is not None:
+            tool_duration.observe(time.perf_counter() - start, **labels)
+
+
+def _call_key(context, tool) -> Any:
+    return getattr(context, "tool_call_id", None) or (id(context), tool.name)
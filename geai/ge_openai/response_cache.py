@@ -0,0 +1,70 @@
+import json
+from typing import AsyncIterator, List, Optional
+
+from geai.disk_cache import DiskCache
+from geai.ge_openai.cassette import _ChunkStream, _decoded, _kept_headers, _parse_body, httpx, request_key
+
+
+class ResponseCacheTransport(httpx.AsyncBaseTransport):
+    """
+    An HTTP transport for the model client, that answers the requests it has
+    already seen from an on-disk cache, and forwards the others to the server.
+    Unlike a cassette, the cache is shared by many processes, and only the
+    successful responses that were read until their end are stored, so a
+    generation stopped early (e.g. a decided verdict) is never served.
+    """
+    def __init__(self, cache: DiskCache, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cache = cache
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request.method, request.url.path, _parse_body(await request.aread()))
+        cached = self.cache.get(key)
+
+        if cached is not None:
+            entry = json.loads(cached)
+            return httpx.Response(entry["status"],
+                                  headers=entry["headers"],
+                                  stream=_ChunkStream(_cached_chunks(entry["chunks"])),
+                                  request=request)
+
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code != 200:
+            return response
+
+        return httpx.Response(response.status_code,
+                              headers=_kept_headers(response.headers),
+                              stream=_ChunkStream(self._stored_chunks(key, response)),
+                              request=request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def _stored_chunks(self, key: str, response: httpx.Response) -> AsyncIterator[bytes]:
+        chunks: List[str] = []
+        complete = False
+
+        try:
+            async for chunk in _decoded(response):
+                chunks.append(chunk.decode("utf-8", "surrogateescape"))
+                yield chunk
+
+            complete = True
+        finally:
+            await response.aclose()
+
+            if complete:
+                self.cache.put(key, json.dumps({"status": response.status_code,
+                                                "headers": _kept_headers(response.headers),
+                                                "chunks": chunks}))
+
+
+def response_cache_http_client(transport: ResponseCacheTransport) -> httpx.AsyncClient:
+    """An HTTP client for `AsyncOpenAI`, going through the response cache."""
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(600, connect=10))
+
+
+async def _cached_chunks(chunks: List[str]) -> AsyncIterator[bytes]:
+    for text in chunks:
+        yield text.encode("utf-8", "surrogateescape")
@@ -0,0 +1,202 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from geai.files import atomic_write
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 8192, 16384, 32768, 65536, 131072)
+RATE_BUCKETS = (1, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500)
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1)
+
+
+class Counter:
+    """A monotonically increasing value, per label set."""
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelValues, float] = dict()
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def total(self, **labels: str) -> float:
+        """The sum over all the label sets, or only over the ones that have these labels."""
+        wanted = set(_label_key(labels))
+
+        return sum(value for key, value in self._values.items() if wanted.issubset(key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}",
+                 f"# TYPE {self.name} counter"]
+
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+
+        return lines
+
+
+class Histogram:
+    """
+    Counts the observed values in fixed buckets, per label set. Only the per-bucket
+    counts are stored, the cumulative counts are computed when rendering.
+    """
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts, total = self._values.get(key) or self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(_label_key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels: str) -> float:
+        entry = self._values.get(_label_key(labels))
+        return entry[1][0] if entry else 0.0
+
+    def total_sum(self) -> float:
+        """The sum of the observed values, over all the label sets."""
+        return sum(total[0] for _, total in self._values.values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}",
+                 f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bucket, count in zip(self.buckets, counts):
+                    cumulative += count
+                    bucket_key = key + (("le", _format_value(bucket)),)
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_key)} {cumulative}")
+
+                cumulative += counts[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process registry of the metrics. Asking twice for the same metric name
+    returns the same metric.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, Counter | Histogram] = dict()
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+
+            return self._metrics[name]
+
+    def render_prometheus(self) -> str:
+        """
+        Renders all the metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, file_name: str) -> None:
+        """
+        Writes the metrics into the file. The file is replaced atomically, so a
+        node_exporter textfile collector never reads a half written file.
+        """
+        atomic_write(file_name, self.render_prometheus())
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serves the metrics on `http://host:port/metrics` from a daemon thread.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+        return server
+
+
+def _label_key(labels: Dict[str, str]) -> LabelValues:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelValues) -> str:
+    if not key:
+        return ""
+
+    escaped = (f'{k}="{_escape_label_value(v)}"' for k, v in key)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+
+def export_metrics(metrics_file: Optional[str]) -> None:
+    """Writes the process metrics into the file, if one was given."""
+    if metrics_file:
+        registry.write_prometheus_file(metrics_file)
@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+import queue
+import signal
+import sys
+import threading
+from typing import Awaitable, Iterator, List, Optional, TextIO, TypeVar
+
+from geai.metrics import registry
+from geai.tools import processes
+
+repl_folded_messages = registry.counter(
+    "geai_repl_folded_messages_total", "Number of user messages queued during a turn, and folded into the next turn.")
+repl_interrupted_turns = registry.counter(
+    "geai_repl_interrupted_turns_total", "Number of turns interrupted by the user.")
+
+T = TypeVar("T")
+
+
+class InputQueue:
+    """
+    The messages of the user: the default user prompt, if provided, then the
+    lines read from the input, until `quit` (or the end of the input).
+
+    The lines are read by a background thread, so the event loop is never
+    blocked, and the user can keep typing while a turn is still streaming. All
+    the messages queued until the next turn starts are folded into that turn,
+    instead of paying a model turn for each of them.
+    """
+    def __init__(self, prompt: str, user_prompt: Optional[str] = None, input_file: Optional[TextIO] = None):
+        self.prompt = prompt
+        self.input_file = input_file
+
+        self._lines: queue.Queue = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._finished = False
+
+        if user_prompt:
+            self._lines.put(user_prompt)
+
+    def __aiter__(self) -> "InputQueue":
+        return self
+
+    async def __anext__(self) -> str:
+        turn = await self.next_turn()
+        if turn is None:
+            raise StopAsyncIteration
+
+        return turn
+
+    async def next_turn(self) -> Optional[str]:
+        """The message of the next turn, or None when the user is done."""
+        self._loop = asyncio.get_running_loop()
+        self._ready = self._ready or asyncio.Event()
+        self._start()
+
+        while not self._finished:
+            if self._lines.empty():
+                self._show_prompt()
+
+            while self._lines.empty():
+                self._ready.clear()
+                # a line put before the clear is seen here, one put after it sets the event
+                if self._lines.empty():
+                    await self._ready.wait()
+
+            if messages := self._fold([]):
+                return "\n\n".join(messages)
+
+        return None
+
+    def turns(self) -> Iterator[str]:
+        """The messages of the turns, waiting in the calling thread (e.g. for a daemon session)."""
+        self._start()
+
+        while not self._finished:
+            if self._lines.empty():
+                self._show_prompt()
+
+            # wait for a line, then fold it with the ones queued after it
+            if messages := self._fold([self._lines.get()]):
+                yield "\n\n".join(messages)
+
+    def _start(self) -> None:
+        if self._reader:
+            return
+
+        # daemon, since it's blocked in a read of the input when the program exits
+        self._reader = threading.Thread(target=self._read_lines, name="input-queue", daemon=True)
+        self._reader.start()
+
+    def _read_lines(self) -> None:
+        input_file = self.input_file or sys.stdin
+
+        for line in iter(input_file.readline, ""):
+            self._put(line.strip())
+
+        self._put(None)
+
+    def _put(self, line: Optional[str]) -> None:
+        self._lines.put(line)
+
+        if self._loop:
+            # the loop is closed if the user quit while this thread was reading
+            with contextlib.suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._ready.set)
+
+    def _fold(self, lines: List[Optional[str]]) -> List[str]:
+        messages = []
+
+        while not self._finished:
+            try:
+                line = lines.pop(0) if lines else self._lines.get_nowait()
+            except queue.Empty:
+                break
+
+            if line is None or line.lower() == "quit":
+                self._finished = True
+            elif line:
+                messages.append(line)
+
+        if len(messages) > 1:
+            repl_folded_messages.inc(len(messages) - 1)
+            print(f"📨 {len(messages)} queued messages in this turn")
+
+        return messages
+
+    def _show_prompt(self) -> None:
+        print(self.prompt, end="", flush=True)
+
+
+async def interruptible(turn: Awaitable[T]) -> Optional[T]:
+    """
+    Runs a turn of the REPL, that Ctrl+C interrupts, instead of exiting the
+    program: the model stream and the tool processes of the turn are stopped,
+    and None is returned, so the REPL goes back to the prompt.
+    """
+    with processes.scope():
+        task = asyncio.ensure_future(turn)
+
+        with _interrupts(task):
+            return await _interrupted_turn(task)
+
+
+async def _interrupted_turn(task: "asyncio.Future[T]") -> Optional[T]:
+    try:
+        return await task
+    except asyncio.CancelledError:
+        # it's only the turn that got interrupted, not the REPL itself
+        if not task.cancelled() or asyncio.current_task().cancelling():
+            raise
+
+        repl_interrupted_turns.inc()
+        print("\n⛔ interrupted")
+
+        return None
+
+
+@contextlib.contextmanager
+def _interrupts(task: asyncio.Future) -> Iterator[None]:
+    """Ctrl+C cancels the task, while in the block."""
+    # only the main thread gets the signals
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGINT)
+    signal.signal(signal.SIGINT, lambda signum, frame: loop.call_soon_threadsafe(task.cancel))
+
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from geai.metrics import registry
+
+singleflight_calls = registry.counter(
+    "geai_singleflight_calls_total", "Number of single-flight calls, by the flight name.")
+singleflight_deduplicated = registry.counter(
+    "geai_singleflight_deduplicated_total", "Number of single-flight calls that joined a call already in flight.")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces the concurrent calls for the same key: while a call is in flight,
+    the other callers with the same key wait for its result, instead of starting
+    their own call. Nothing is cached after the call ends.
+
+    A caller that gets cancelled only stops waiting. The call itself is
+    cancelled only when all its callers are gone.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Tuple[int, Hashable], _Flight] = dict()
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        # the tasks belong to their loop, so the calls are shared only inside the same loop
+        flight_key = (id(asyncio.get_running_loop()), key)
+        flight = self._flights.get(flight_key)
+
+        singleflight_calls.inc(name=self.name)
+
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+        else:
+            singleflight_deduplicated.inc(name=self.name)
+
+        flight.waiters += 1
+
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # nobody waits for it anymore, and new callers must not join a cancelled call
+                self._forget(flight_key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, flight_key: Tuple[int, Hashable], flight: _Flight) -> None:
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
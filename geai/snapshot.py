@@ -0,0 +1,222 @@
+import difflib
+import hashlib
+import os
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from geai.files import atomic_write
+from geai.metrics import registry
+from geai.tools.workspace import scratch_folder
+
+SKIPPED_FOLDERS = {".git", ".geai", "__pycache__", "venv", ".venv", "node_modules"}
+
+# the content of bigger files isn't kept, their diff only says they changed
+MAX_STORED_SIZE = 1024 * 1024
+
+snapshot_files = registry.counter(
+    "geai_snapshot_files_total",
+    "Number of the files seen by the workspace snapshots, by how their hash was known (hashed, or reused "
+    "since their mtime and size didn't change).")
+snapshot_objects_pruned = registry.counter(
+    "geai_snapshot_objects_pruned_total",
+    "Number of the stored file contents deleted, since no kept snapshot referenced them anymore.")
+
+
+@dataclass(frozen=True)
+class FileState:
+    """A file in a snapshot: its mtime and size, for the shortcut, and its content hash."""
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+# relative file name -> its state
+Snapshot = Dict[str, FileState]
+
+
+@dataclass
+class ChangeSet:
+    """The files changed between two snapshots, relative to the workspace."""
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+
+    def touched(self) -> List[str]:
+        """The changed files that still exist, e.g. to check them."""
+        return sorted(self.added + self.modified)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+class SnapshotEngine:
+    """
+    Takes snapshots of the files of a workspace, with their content hashes. The
+    files whose mtime and size didn't change since the previous snapshot aren't
+    read again. The files ignored by git (e.g. `build/`) aren't in the
+    snapshots. The contents are kept in a content addressed store in the
+    workspace (`.geai/objects`), so the diffs between the kept snapshots can
+    be made, and an unchanged content is stored only once. The contents no
+    kept snapshot needs are deleted with `prune`.
+    """
+    def __init__(self, folder: str):
+        self.folder = os.path.abspath(folder)
+        self.objects_folder = scratch_folder(self.folder, "objects")
+        self._previous: Snapshot = dict()
+
+    def snapshot(self) -> Snapshot:
+        snapshot: Snapshot = dict()
+        ignored = self._ignored()
+
+        for root, folders, files in os.walk(self.folder):
+            relative_root = os.path.relpath(root, self.folder)
+            folders[:] = sorted(f for f in folders
+                                if f not in SKIPPED_FOLDERS
+                                and os.path.normpath(os.path.join(relative_root, f)) + "/" not in ignored)
+
+            for file_name in sorted(files):
+                full_file_name = os.path.join(root, file_name)
+                relative_name = os.path.relpath(full_file_name, self.folder)
+
+                if relative_name in ignored:
+                    continue
+
+                try:
+                    state = self._file_state(relative_name, full_file_name)
+                except OSError:
+                    continue  # gone in the meantime, or not readable
+
+                snapshot[relative_name] = state
+
+        self._previous = snapshot
+
+        return snapshot
+
+    def prune(self, *kept: Snapshot) -> None:
+        """Deletes the stored contents that none of the kept snapshots reference."""
+        digests = {state.digest for snapshot in kept for state in snapshot.values()}
+
+        for folder in os.scandir(self.objects_folder):
+            if not folder.is_dir():
+                continue
+
+            for entry in os.scandir(folder.path):
+                # the temp files are still being written
+                if entry.name in digests or entry.name.startswith(".tmp-"):
+                    continue
+
+                try:
+                    os.unlink(entry.path)
+                    snapshot_objects_pruned.inc()
+                except FileNotFoundError:
+                    pass
+
+            if not os.listdir(folder.path):
+                os.rmdir(folder.path)
+
+    def changes(self, before: Snapshot, after: Snapshot) -> ChangeSet:
+        changes = ChangeSet()
+
+        for file_name in sorted(before.keys() | after.keys()):
+            if file_name not in before:
+                changes.added.append(file_name)
+            elif file_name not in after:
+                changes.deleted.append(file_name)
+            elif before[file_name].digest != after[file_name].digest:
+                changes.modified.append(file_name)
+
+        return changes
+
+    def diff(self, before: Snapshot, after: Snapshot, changes: Optional[ChangeSet] = None) -> str:
+        """The unified diff of the changes between the snapshots."""
+        changes = changes or self.changes(before, after)
+        parts = []
+
+        for file_name in sorted(changes.added + changes.modified + changes.deleted):
+            old_lines = self._lines(before.get(file_name))
+            new_lines = self._lines(after.get(file_name))
+
+            if old_lines is None or new_lines is None:
+                parts.append(f"Binary or large file {file_name} changed\n")
+                continue
+
+            parts.append("".join(difflib.unified_diff(old_lines,
+                                                      new_lines,
+                                                      f"a/{file_name}" if file_name in before else "/dev/null",
+                                                      f"b/{file_name}" if file_name in after else "/dev/null")))
+
+        return "".join(parts)
+
+    def line_counts(self, before: Snapshot, after: Snapshot, file_name: str) -> Tuple[int, int]:
+        """The added and removed lines of a changed file."""
+        added = removed = 0
+        old_lines = self._lines(before.get(file_name)) or []
+        new_lines = self._lines(after.get(file_name)) or []
+
+        for line in difflib.unified_diff(old_lines, new_lines, n=0):
+            if line.startswith("+") and not line.startswith("+++"):
+                added += 1
+            elif line.startswith("-") and not line.startswith("---"):
+                removed += 1
+
+        return added, removed
+
+    def _ignored(self) -> Set[str]:
+        """
+        The paths git ignores in the workspace, relative to it, the folders
+        with a trailing `/`. Empty if the workspace isn't in a git repository.
+        """
+        try:
+            result = subprocess.run(["git", "ls-files", "--others", "--ignored", "--exclude-standard",
+                                     "--directory", "-z"],
+                                    cwd=self.folder,
+                                    capture_output=True)
+        except OSError:
+            return set()
+
+        if result.returncode:
+            return set()
+
+        return {path for path in result.stdout.decode("utf-8", errors="replace").split("\0") if path}
+
+    def _file_state(self, relative_name: str, full_file_name: str) -> FileState:
+        stat = os.stat(full_file_name)
+        previous = self._previous.get(relative_name)
+
+        if previous and previous.mtime_ns == stat.st_mtime_ns and previous.size == stat.st_size:
+            snapshot_files.inc(hash="reused")
+            return previous
+
+        with open(full_file_name, "rb") as f:
+            content = f.read()
+
+        snapshot_files.inc(hash="hashed")
+        digest = hashlib.sha256(content).hexdigest()
+
+        if len(content) <= MAX_STORED_SIZE:
+            self._store(digest, content)
+
+        return FileState(stat.st_mtime_ns, stat.st_size, digest)
+
+    def _store(self, digest: str, content: bytes) -> None:
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, content)
+
+    def _lines(self, state: Optional[FileState]) -> Optional[List[str]]:
+        """The lines of a stored content, empty for a missing file, None if it can't be diffed."""
+        if state is None:
+            return []
+
+        try:
+            with open(self._object_path(state.digest), "rb") as f:
+                return f.read().decode("utf-8").splitlines(keepends=True)
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_folder, digest[:2], digest)
@@ -0,0 +1,222 @@
+import re
+from typing import List, Optional
+
+from geai.tools.lazy_tool import function_tool
+from pydantic import BaseModel
+
+import geai.tools.workspace_tools as workspace_tools
+from geai.tools.file_locks import file_locks
+from geai.tools.read_file_tool import read_file_impl
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+
+
+class FileEdit(BaseModel):
+    """A single search/replace edit."""
+    search: str
+    replace: str
+
+
+class EditError(Exception):
+    """The edits can't be applied, or the result isn't valid."""
+
+
+@function_tool
+def edit_file(file_name: str, edits: list[FileEdit]) -> str:
+    """
+    Edits an existing file, by replacing the `search` text of every edit with its
+    `replace` text. The `search` text must be copied exactly from the file, and
+    must be found only once, so add some surrounding lines if needed. The edits
+    are applied in order, either all of them, or none.
+
+    :param file_name: The name of the file to edit
+    :param edits: The search/replace edits
+    :return: confirmation or error message
+    """
+    return edit_file_impl(file_name, edits)
+
+
+@function_tool
+def apply_diff(file_name: str, diff: str) -> str:
+    """
+    Edits an existing file, by applying a unified diff (`@@ -line,count +line,count @@`
+    hunks, with ` ` context lines, `-` removed lines, `+` added lines). Either all
+    the hunks are applied, or none.
+
+    :param file_name: The name of the file to edit
+    :param diff: The unified diff
+    :return: confirmation or error message
+    """
+    return apply_diff_impl(file_name, diff)
+
+
+def edit_file_impl(file_name: str, edits: List[FileEdit]) -> str:
+    return _change_file(file_name, lambda content: apply_edits(content, edits))
+
+
+def apply_diff_impl(file_name: str, diff: str) -> str:
+    return _change_file(file_name, lambda content: apply_unified_diff(content, diff))
+
+
+def apply_edits(content: str, edits: List[FileEdit]) -> str:
+    """
+    Applies the search/replace edits in order, or raises `EditError` if a search
+    text isn't found exactly once.
+    """
+    if not edits:
+        raise EditError("no edits were given")
+
+    for i, edit in enumerate(edits):
+        count = content.count(edit.search) if edit.search else 0
+
+        if count == 0:
+            raise EditError(f"edit #{i + 1}: the search text was not found, copy it exactly from the file")
+
+        if count > 1:
+            raise EditError(f"edit #{i + 1}: the search text was found {count} times, "
+                            f"add some surrounding lines so it's found only once")
+
+        content = content.replace(edit.search, edit.replace, 1)
+
+    return content
+
+
+def apply_unified_diff(content: str, diff: str) -> str:
+    """
+    Applies the hunks of a unified diff in order, or raises `EditError` if a
+    hunk doesn't match. The line numbers of the hunks are only a hint, the
+    hunks are found by their content, since the models often get them wrong.
+    """
+    lines = content.splitlines(keepends=True)
+    hunks = _parse_hunks(diff)
+
+    if not hunks:
+        raise EditError("the diff has no hunks, they must start with a `@@ -line,count +line,count @@` header")
+
+    position = 0
+    # the hints are lines of the old file, the lines the previous hunks added or removed move them
+    offset = 0
+
+    for i, (hint, old_lines, new_lines) in enumerate(hunks):
+        start = _find_lines(lines, old_lines, position, hint + offset if hint is not None else None)
+
+        if start is None:
+            raise EditError(f"hunk #{i + 1}: the context and removed lines were not found in the file")
+
+        replaced = [line if line.endswith("\n") else line + "\n" for line in new_lines]
+        lines[start:start + len(old_lines)] = replaced
+        position = start + len(replaced)
+        offset += len(replaced) - len(old_lines)
+
+    result = "".join(lines)
+    # keep the end of file as it was
+    if not content.endswith("\n") and result.endswith("\n"):
+        result = result[:-1]
+
+    return result
+
+
+def validate_content(file_name: str, content: str) -> None:
+    """
+    Checks the changed content locally, before it's written. Python files must
+    still compile.
+    """
+    if not file_name.endswith(".py"):
+        return
+
+    try:
+        compile(content, file_name, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        raise EditError(f"the edited file doesn't compile anymore, line {e.lineno}: {e.msg}")
+
+
+def _change_file(file_name: str, change) -> str:
+    # the file can't change between the read and the write, e.g. by a parallel tool call
+    with file_locks.write(workspace_tools.get_full_file_name(file_name)):
+        return _change_locked_file(file_name, change)
+
+
+def _change_locked_file(file_name: str, change) -> str:
+    current = read_file_impl(file_name)
+
+    if not current.success:
+        return f"unable to edit {file_name}: {current.error_message}"
+
+    try:
+        content = change(current.content)
+        validate_content(file_name, content)
+    except EditError as e:
+        return f"unable to edit {file_name}, nothing was changed: {e}"
+
+    if content == current.content:
+        return f"unable to edit {file_name}: the edits don't change anything"
+
+    return workspace_tools.write_file_impl(file_name, content)
+
+
+def _parse_hunks(diff: str) -> List[tuple]:
+    """
+    Reads the hunks of the diff, as (line hint, old lines, new lines).
+    """
+    hunks: List[tuple] = []
+    old_lines: Optional[List[str]] = None
+    new_lines: List[str] = []
+
+    for line in diff.splitlines():
+        if line.startswith("---") or line.startswith("+++"):
+            continue
+
+        if line.startswith("@@"):
+            match = HUNK_HEADER.match(line)
+            old_lines, new_lines = [], []
+            hunks.append((_hunk_hint(match) if match else None, old_lines, new_lines))
+            continue
+
+        if old_lines is None or line.startswith("\\"):
+            # before the first hunk, or `\ No newline at end of file`
+            continue
+
+        if line.startswith("-"):
+            old_lines.append(line[1:])
+        elif line.startswith("+"):
+            new_lines.append(line[1:])
+        else:
+            # context, the models sometimes drop the leading space of empty lines
+            old_lines.append(line[1:] if line.startswith(" ") else line)
+            new_lines.append(line[1:] if line.startswith(" ") else line)
+
+    return [hunk for hunk in hunks if hunk[1] or hunk[2]]
+
+
+def _hunk_hint(match: re.Match) -> int:
+    """
+    The 0-based line where the hunk starts. A hunk without old lines (`-N,0`,
+    e.g. from `diff -U0`) inserts after line N, the others start at line N.
+    """
+    start = int(match.group(1))
+
+    return start if match.group(2) == "0" else start - 1
+
+
+def _find_lines(lines: List[str], wanted: List[str], position: int, hint: Optional[int]) -> Optional[int]:
+    """
+    Finds where the wanted lines are in the file, after the position. The line
+    hint is tried first, then the exact lines anywhere, and then the lines with
+    their trailing whitespace ignored.
+    """
+    if not wanted:
+        # a pure insertion, it can only go where the hint says
+        return min(max(hint or 0, position), len(lines)) if hint is not None else None
+
+    for normalize in (lambda l: l.rstrip("\n"), lambda l: l.rstrip()):
+        target = [normalize(line) for line in wanted]
+        normalized = [normalize(line) for line in lines]
+
+        if hint is not None and hint >= position and normalized[hint:hint + len(target)] == target:
+            return hint
+
+        for start in range(position, len(lines) - len(target) + 1):
+            if normalized[start:start + len(target)] == target:
+                return start
+
+    return None
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Generic, Type, TypeVar
+
+from geai.files import atomic_write
+from geai.metrics import registry
+from geai.snapshot import SKIPPED_FOLDERS
+from geai.tools import workspace
+
+# bigger files are mostly generated, or data
+MAX_INDEXED_SIZE = 1024 * 1024
+
+file_index_files = registry.counter(
+    "geai_file_index_files_total",
+    "Number of the files seen by the workspace index refreshes, by index, and by whether they were indexed, "
+    "or reused since their mtime and size didn't change.")
+
+# what an index keeps for a file, a dataclass with `mtime_ns` and `size` fields, and JSON fields
+Entry = TypeVar("Entry")
+
+_indexes_lock = threading.Lock()
+
+
+class FileIndex(Generic[Entry]):
+    """
+    An index over the files of a workspace, with an entry for every file. A
+    refresh indexes again only the files whose mtime or size changed, and
+    the write tools update the changed files right away. The index is
+    persisted in the workspace (`.geai/index/<name>.json`), so a new session
+    starts from it. The subclasses keep their own lookup structures up to
+    date in `_added` and `_removed`.
+    """
+    name = ""
+    version = 1
+    entry_type: Type[Entry]
+
+    def __init__(self, folder: str):
+        self.folder = os.path.abspath(folder)
+        self.index_file = os.path.join(self.folder, ".geai", "index", f"{self.name}.json")
+
+        self._lock = threading.RLock()
+        self._files: Dict[str, Entry] = dict()
+        # changed since it was saved
+        self._dirty = False
+
+        self._load()
+
+    @classmethod
+    def current(cls):
+        """The index of the current workspace, loaded on its first use."""
+        indexes = workspace.current().tool_state.setdefault("file_indexes", dict())
+
+        with _indexes_lock:
+            if cls.name not in indexes:
+                indexes[cls.name] = cls(workspace.current().folder)
+
+            return indexes[cls.name]
+
+    def refresh(self) -> None:
+        """Indexes the new and changed files of the workspace, drops the deleted ones, and saves the index."""
+        with self._lock:
+            seen = set()
+
+            for root, folders, files in os.walk(self.folder):
+                folders[:] = [f for f in folders if f not in SKIPPED_FOLDERS]
+
+                for file_name in files:
+                    full_file_name = os.path.join(root, file_name)
+                    relative_name = os.path.relpath(full_file_name, self.folder)
+
+                    if not self.indexes(relative_name):
+                        continue
+
+                    try:
+                        stat = os.stat(full_file_name)
+                    except OSError:
+                        continue
+
+                    seen.add(relative_name)
+                    entry = self._files.get(relative_name)
+
+                    if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                        file_index_files.inc(index=self.name, result="reused")
+                        continue
+
+                    file_index_files.inc(index=self.name, result="indexed")
+                    self._update(relative_name, full_file_name, stat)
+
+            for relative_name in list(self._files.keys() - seen):
+                self._remove(relative_name)
+
+            if self._dirty:
+                self._save()
+
+    def update(self, full_file_name: str) -> None:
+        """Indexes a file again, after a tool changed it. It's saved with the next refresh."""
+        relative_name = os.path.relpath(full_file_name, self.folder)
+        if relative_name.startswith("..") or not self.indexes(relative_name):
+            return
+
+        with self._lock:
+            try:
+                stat = os.stat(full_file_name)
+            except OSError:
+                self._remove(relative_name)
+                return
+
+            file_index_files.inc(index=self.name, result="indexed")
+            self._update(relative_name, full_file_name, stat)
+
+    def indexes(self, file_name: str) -> bool:
+        """If the file belongs in the index."""
+        return True
+
+    def _index_file(self, full_file_name: str, content: str, stat: os.stat_result) -> Entry:
+        raise NotImplementedError()
+
+    def _added(self, file_name: str, entry: Entry) -> None:
+        pass
+
+    def _removed(self, file_name: str, entry: Entry) -> None:
+        pass
+
+    def _update(self, relative_name: str, full_file_name: str, stat: os.stat_result) -> None:
+        content = ""
+
+        # binary and big files are indexed empty, so they're not read again until they change
+        if stat.st_size <= MAX_INDEXED_SIZE:
+            try:
+                with open(full_file_name, "rt", encoding="utf-8") as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                pass
+
+        self._remove(relative_name)
+        self._add(relative_name, self._index_file(full_file_name, content, stat))
+
+    def _add(self, file_name: str, entry: Entry) -> None:
+        self._files[file_name] = entry
+        self._added(file_name, entry)
+        self._dirty = True
+
+    def _remove(self, file_name: str) -> None:
+        entry = self._files.pop(file_name, None)
+        if entry is None:
+            return
+
+        self._removed(file_name, entry)
+        self._dirty = True
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_file, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != self.version:
+            return
+
+        for file_name, entry in data["files"].items():
+            self._add(file_name, self.entry_type(**entry))
+
+        self._dirty = False
+
+    def _save(self) -> None:
+        workspace.scratch_folder(self.folder, "index")
+        data: Dict[str, Any] = {
+            "version": self.version,
+            "files": {file_name: entry.__dict__ for file_name, entry in self._files.items()},
+        }
+
+        # atomic, a crash never leaves a broken index behind
+        atomic_write(self.index_file, json.dumps(data))
+
+        self._dirty = False
+
+
+def file_changed(full_file_name: str) -> None:
+    """Called by the tools that write a file, so the loaded indexes of the workspace see the change right away."""
+    for index in list(workspace.current().tool_state.get("file_indexes", dict()).values()):
+        index.update(full_file_name)
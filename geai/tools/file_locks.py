@@ -0,0 +1,138 @@
+import contextlib
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class ReadWriteLock:
+    """
+    A lock with shared (read) and exclusive (write) holders. A waiting writer
+    blocks the new readers, so the writers aren't starved. The lock is
+    reentrant for a thread: a writer can also read, or write again, and a
+    reader can read again even with a writer waiting.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers: Dict[int, int] = dict()
+        self._writer: Optional[int] = None
+        self._writes = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+
+        with self._condition:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+
+        with self._condition:
+            self._readers[me] -= 1
+            if not self._readers[me]:
+                del self._readers[me]
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+
+        with self._condition:
+            if self._writer == me:
+                self._writes += 1
+                return
+
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or any(reader != me for reader in self._readers):
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+
+            self._writer = me
+            self._writes = 1
+
+    def release_write(self) -> None:
+        with self._condition:
+            self._writes -= 1
+            if not self._writes:
+                self._writer = None
+                self._condition.notify_all()
+
+
+class FileLocks:
+    """
+    The locks of the files the tools work on, by absolute path, so parallel
+    tool calls don't race on a file: the readers share a file, a writer holds
+    it alone for its whole read-modify-write. A lock exists only while it's
+    used.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # absolute path -> (lock, how many are using it)
+        self._locks: Dict[str, Tuple[ReadWriteLock, int]] = dict()
+
+    @contextlib.contextmanager
+    def read(self, path: str) -> Iterator[None]:
+        lock = self._use(path)
+        lock.acquire_read()
+
+        try:
+            yield
+        finally:
+            lock.release_read()
+            self._release(path)
+
+    @contextlib.contextmanager
+    def write(self, *paths: str) -> Iterator[None]:
+        """
+        Holds the files for writing. Many files (e.g. for a batch of edits) are
+        always locked in the order of their paths, so two writers can't
+        deadlock on each other's files.
+        """
+        ordered: List[str] = sorted(set(os.path.abspath(path) for path in paths))
+        acquired: List[Tuple[str, ReadWriteLock]] = []
+
+        try:
+            for path in ordered:
+                lock = self._use(path)
+                try:
+                    lock.acquire_write()
+                except BaseException:
+                    self._release(path)
+                    raise
+                acquired.append((path, lock))
+
+            yield
+        finally:
+            for path, lock in reversed(acquired):
+                lock.release_write()
+                self._release(path)
+
+    def _use(self, path: str) -> ReadWriteLock:
+        path = os.path.abspath(path)
+
+        with self._lock:
+            lock, users = self._locks.get(path, (None, 0))
+            lock = lock or ReadWriteLock()
+            self._locks[path] = (lock, users + 1)
+
+            return lock
+
+    def _release(self, path: str) -> None:
+        path = os.path.abspath(path)
+
+        with self._lock:
+            lock, users = self._locks[path]
+
+            if users == 1:
+                del self._locks[path]
+            else:
+                self._locks[path] = (lock, users - 1)
+
+
+# shared by all the workspaces, the paths are absolute
+file_locks = FileLocks()
@@ -1,10 +1,12 @@
 import os
 from typing import List, Optional
 
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 from pydantic import BaseModel
 
-from geai.tools import workspace_tools
+from geai.tools import memo, workspace_tools
+from geai.tools.memo import memoized
+from geai.tools.spill import capped
 
 
 class FindFileResult(BaseModel):
@@ -22,7 +24,7 @@ class FindFileListResult(BaseModel):
 
 def find_file_impl(starting_folder: str, filename_pattern: str, file_type: str) -> FindFileListResult:
     """
-    Internal implementation of find_file - searches for files within the workspace.folder directory.
+    Internal implementation of find_file - searches for files within the workspace directory.
     
     This function is used by the find_file tool and can be tested independently.
     
@@ -42,7 +44,7 @@ def find_file_impl(starting_folder: str, filename_pattern: str, file_type: str)
             )
         
         # Get the full path of the starting folder
-        full_starting_path = os.path.abspath(starting_folder)
+        full_starting_path = workspace_tools.get_full_file_name(starting_folder)
         
         # Check if starting folder exists
         if not os.path.exists(full_starting_path):
@@ -131,9 +133,11 @@ def find_file_impl(starting_folder: str, filename_pattern: str, file_type: str)
 
 
 @function_tool
+@capped
+@memoized(lambda result, starting_folder, *args, **kwargs: memo.tree(workspace_tools.get_full_file_name(starting_folder)))
 def find_file(starting_folder: str, filename_pattern: str, file_type: str) -> FindFileListResult:
     """
-    Searches for files within the workspace.folder directory.
+    Searches for files within the workspace directory.
     
     :param starting_folder: The folder to start searching from
     :param filename_pattern: The pattern to match filenames (supports * and ? wildcards)
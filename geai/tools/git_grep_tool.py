@@ -1,12 +1,16 @@
 import subprocess
 
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 
-from geai.tools import workspace
+from geai.tools import memo, processes, workspace
 from geai.tools.grep_tool import GrepResult, GrepLine
+from geai.tools.memo import memoized
+from geai.tools.spill import capped
 
 
 @function_tool
+@capped
+@memoized(lambda result, *args, **kwargs: memo.tree(workspace.current().folder))
 def git_grep(search_text: str, is_regex: bool = False) -> GrepResult:
     """
     Searches for text in files using git grep (searches in git tracked files within workspace).
@@ -28,12 +32,13 @@ def git_grep_impl(search_text: str, is_regex: bool = False) -> GrepResult:
     :param is_regex: Whether to treat search_text as a regular expression
     :return: GrepResult containing matched lines or error information
     """
+    folder = workspace.current().folder
+
     try:
         # Check if we're in a git repository
-        subprocess.run(
+        processes.run(
             ["git", "rev-parse", "--git-dir"],
-            cwd=workspace.folder,
-            capture_output=True,
+            cwd=folder,
             check=True
         )
 
@@ -50,11 +55,9 @@ def git_grep_impl(search_text: str, is_regex: bool = False) -> GrepResult:
         git_grep_args.append(search_text)
 
         # Run git grep command
-        result = subprocess.run(
+        result = processes.run(
             git_grep_args,
-            cwd=workspace.folder,
-            capture_output=True,
-            text=True,
+            cwd=folder,
             check=True
         )
 
@@ -70,8 +73,8 @@ def git_grep_impl(search_text: str, is_regex: bool = False) -> GrepResult:
                     matched_line = parts[2]
 
                     # Convert absolute path to relative path to hide workspace.py location
-                    if file_name.startswith(workspace.folder):
-                        relative_path = file_name[len(workspace.folder):].lstrip('/')
+                    if file_name.startswith(folder):
+                        relative_path = file_name[len(folder):].lstrip('/')
                         lines.append(GrepLine(
                             file_name=relative_path,
                             line=line_num,
@@ -2,10 +2,12 @@ import os
 import subprocess
 from typing import List, Optional
 
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 from pydantic import BaseModel
 
-from geai.tools import workspace_tools, workspace
+from geai.tools import memo, processes, workspace_tools, workspace
+from geai.tools.memo import memoized
+from geai.tools.spill import capped
 
 
 class GrepLine(BaseModel):
@@ -33,7 +35,7 @@ def grep_impl(search_text: str, is_regex: bool = False) -> GrepResult:
     :return: GrepResult containing matched lines or error information
     """
     try:
-        full_workspace_path = os.path.abspath(workspace.folder)
+        full_workspace_path = os.path.abspath(workspace.current().folder)
         
         if not os.path.isdir(full_workspace_path):
             return GrepResult(
@@ -52,17 +54,16 @@ def grep_impl(search_text: str, is_regex: bool = False) -> GrepResult:
             grep_args.append("-r")
             grep_args.append("-F")
         
+        grep_args.append("--exclude-dir=.geai")  # the scratch files of the tools
         grep_args.append("-n")  # Show line numbers
         grep_args.append("-H")  # Always print filenames
         grep_args.append(search_text)
         grep_args.append(".")
         
         # Run grep command
-        result = subprocess.run(
+        result = processes.run(
             grep_args,
             cwd=full_workspace_path,
-            capture_output=True,
-            text=True,
             check=True
         )
         
@@ -109,6 +110,8 @@ def grep_impl(search_text: str, is_regex: bool = False) -> GrepResult:
 
 
 @function_tool
+@capped
+@memoized(lambda result, *args, **kwargs: memo.tree(workspace.current().folder))
 def grep(search_text: str, is_regex: bool = False) -> GrepResult:
     """
     Searches for text in files within the workspace.py directory.
@@ -0,0 +1,35 @@
+from typing import Any, Callable, List, Optional
+
+
+class LazyFunctionTool:
+    """
+    A function tool that's created only when an agent needs it, so importing the
+    tools (and their `_impl` functions) doesn't import the agents SDK. Any
+    attribute of the real `FunctionTool` can be read through it.
+    """
+    def __init__(self, func: Callable[..., Any]):
+        self.func = func
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+        self._tool: Optional[Any] = None
+
+    def tool(self) -> Any:
+        if self._tool is None:
+            from agents import function_tool as sdk_function_tool
+
+            self._tool = sdk_function_tool(self.func)
+
+        return self._tool
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tool(), name)
+
+
+def function_tool(func: Callable[..., Any]) -> LazyFunctionTool:
+    """Same as the agents SDK `@function_tool`, but the tool is only created when it's first used."""
+    return LazyFunctionTool(func)
+
+
+def resolve_tools(tools: List[Any]) -> List[Any]:
+    """The SDK tools for an agent, creating the lazy ones."""
+    return [tool.tool() if isinstance(tool, LazyFunctionTool) else tool for tool in tools]
@@ -0,0 +1,133 @@
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from geai.metrics import registry
+from geai.snapshot import SKIPPED_FOLDERS
+from geai.tools import workspace
+
+tool_memo_lookups = registry.counter(
+    "geai_tool_memo_lookups_total",
+    "Number of the memoized tool calls, by tool and result (hit, miss, or stale when the workspace changed).")
+
+# (mtime, size) of a path, None if it doesn't exist
+Stamp = Optional[Tuple[int, int]]
+
+
+@dataclass
+class _Entry:
+    generation: int
+    paths: List[str]
+    stamps: List[Stamp]
+    result: Any
+
+
+# the results of the read-only tool calls of the current agent run
+_turn: contextvars.ContextVar[Optional[Dict[str, _Entry]]] = contextvars.ContextVar("tool_memo", default=None)
+
+_generation_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def turn() -> Iterator[None]:
+    """
+    Memoizes the read-only tool calls of the runs started in the block. The
+    run tasks copy the context when they're created, so the block only needs
+    to cover their start.
+    """
+    token = _turn.set(dict())
+
+    try:
+        yield
+    finally:
+        _turn.reset(token)
+
+
+def generation() -> int:
+    """How many times the tools changed the current workspace."""
+    return workspace.current().tool_state.get("generation", 0)
+
+
+def bump_generation() -> None:
+    """Called by the tools that change the workspace, so no memoized result of it is served anymore."""
+    state = workspace.current().tool_state
+
+    with _generation_lock:
+        state["generation"] = state.get("generation", 0) + 1
+
+
+def memoized(paths: Callable[..., Iterable[str]]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Memoizes a read-only tool in the agent run, by its arguments. A result is
+    served only while the workspace generation didn't change (no tool wrote
+    anything), and the paths the result depends on (called with the result and
+    the arguments of the tool) still have the same mtime and size, so the
+    external edits of those paths are seen too. A tool searching a folder
+    returns its whole `tree`. Outside an agent run the tool just runs.
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            entries = _turn.get()
+            if entries is None:
+                return func(*args, **kwargs)
+
+            key = repr((func.__name__, workspace.current().folder, args, sorted(kwargs.items())))
+            entry = entries.get(key)
+
+            if entry and entry.generation == generation() and _stamps(entry.paths) == entry.stamps:
+                tool_memo_lookups.inc(tool=func.__name__, result="hit")
+                return entry.result
+
+            tool_memo_lookups.inc(tool=func.__name__, result="stale" if entry else "miss")
+
+            # taken before the call, so a write during the call makes the result stale
+            call_generation = generation()
+            result = func(*args, **kwargs)
+
+            result_paths = list(paths(result, *args, **kwargs))
+            entries[key] = _Entry(call_generation, result_paths, _stamps(result_paths), result)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def tree(folder: str) -> List[str]:
+    """
+    The folders and the files under a folder, without the ones the snapshots
+    skip. Their stamps change with any edit, addition or removal in the tree.
+    """
+    paths = [folder]
+
+    for root, folders, files in os.walk(folder):
+        folders[:] = [f for f in folders if f not in SKIPPED_FOLDERS]
+        paths.extend(os.path.join(root, name) for name in folders + files)
+
+    return paths
+
+
+def hit_rate() -> float:
+    """The share of the memoized tool calls served from the memo."""
+    lookups = tool_memo_lookups.total()
+
+    return tool_memo_lookups.total(result="hit") / lookups if lookups else 0
+
+
+def _stamps(paths: List[str]) -> List[Stamp]:
+    stamps: List[Stamp] = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+
+    return stamps
@@ -0,0 +1,106 @@
+import contextlib
+import contextvars
+import os
+import signal
+import subprocess
+import threading
+from typing import Iterator, List, Optional, Set, Union
+
+from geai.metrics import registry
+
+tool_processes_killed = registry.counter(
+    "geai_tool_processes_killed_total", "Number of tool processes killed, because their run was interrupted.")
+
+
+class ProcessScope:
+    """
+    The processes started by the tools of a run, so they can be killed when
+    the run is interrupted. The tools run in threads, and a thread isn't
+    cancelled with its task, but it returns as soon as its process is killed.
+    """
+    def __init__(self):
+        self._processes: Set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+        self.killed = False
+
+    def add(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            if self.killed:
+                _kill(process)
+            self._processes.add(process)
+
+    def remove(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+    def kill(self) -> None:
+        """Kills the running processes, and the ones the tools still start from now on."""
+        with self._lock:
+            self.killed = True
+            processes = list(self._processes)
+
+        for process in processes:
+            _kill(process)
+
+
+_current: contextvars.ContextVar[Optional[ProcessScope]] = contextvars.ContextVar("process_scope", default=None)
+
+
+@contextlib.contextmanager
+def scope() -> Iterator[ProcessScope]:
+    """
+    Runs the block in a new process scope. The tool processes started in it
+    (in its tasks, and in the threads they start) that are still running at the
+    end of the block are killed.
+    """
+    process_scope = ProcessScope()
+    token = _current.set(process_scope)
+
+    try:
+        yield process_scope
+    finally:
+        _current.reset(token)
+        process_scope.kill()
+
+
+def run(args: Union[str, List[str]],
+        cwd: str,
+        shell: bool = False,
+        check: bool = False) -> subprocess.CompletedProcess:
+    """
+    Same as `subprocess.run(..., capture_output=True, text=True)`, but the
+    process (and its children, e.g. of a shell) is killed if the run of the
+    tool is interrupted.
+    """
+    process = subprocess.Popen(args,
+                               cwd=cwd,
+                               shell=shell,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               text=True,
+                               # its own process group, so the whole tree gets killed
+                               start_new_session=True)
+    process_scope = _current.get()
+
+    if process_scope:
+        process_scope.add(process)
+
+    try:
+        stdout, stderr = process.communicate()
+    finally:
+        if process_scope:
+            process_scope.remove(process)
+
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    if process.poll() is not None:
+        return
+
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+        tool_processes_killed.inc()
@@ -0,0 +1,106 @@
+import ast
+from typing import List, Optional
+
+MAX_VALUE_CHARS = 80
+
+
+def extract_python_api(source: str) -> Optional[str]:
+    """
+    Extracts the public API of a python module, without any model: the
+    constants, the function signatures, and the classes with their fields and
+    method signatures, each with the first line of its docstring.
+
+    :return: the API as python stubs, or None if the source doesn't parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    lines: List[str] = []
+    _module_docstring(tree, lines)
+
+    for node in tree.body:
+        _describe(node, lines, indent="")
+
+    return "\n".join(lines).strip() + "\n"
+
+
+def _module_docstring(tree: ast.Module, lines: List[str]) -> None:
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        lines.append(f'"""{docstring.strip().splitlines()[0]}"""')
+
+
+def _describe(node: ast.AST, lines: List[str], indent: str) -> None:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        _describe_function(node, lines, indent)
+    elif isinstance(node, ast.ClassDef):
+        _describe_class(node, lines, indent)
+    elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+        _describe_assignment(node, lines, indent)
+
+
+def _describe_function(node: ast.FunctionDef | ast.AsyncFunctionDef, lines: List[str], indent: str) -> None:
+    if _is_private(node.name):
+        return
+
+    lines.append("")
+    lines.extend(f"{indent}@{ast.unparse(decorator)}" for decorator in node.decorator_list)
+
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}:")
+    lines.append(f"{indent}    {_docstring_line(node) or '...'}")
+
+
+def _describe_class(node: ast.ClassDef, lines: List[str], indent: str) -> None:
+    if _is_private(node.name):
+        return
+
+    lines.append("")
+    lines.extend(f"{indent}@{ast.unparse(decorator)}" for decorator in node.decorator_list)
+
+    bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+    lines.append(f"{indent}class {node.name}" + (f"({', '.join(bases)})" if bases else "") + ":")
+
+    body_start = len(lines)
+    docstring = _docstring_line(node)
+    if docstring:
+        lines.append(f"{indent}    {docstring}")
+
+    for child in node.body:
+        _describe(child, lines, indent + "    ")
+
+    if len(lines) == body_start:
+        lines.append(f"{indent}    ...")
+
+
+def _describe_assignment(node: ast.Assign | ast.AnnAssign, lines: List[str], indent: str) -> None:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    names = [target.id for target in targets if isinstance(target, ast.Name) and not _is_private(target.id)]
+
+    if not names:
+        return
+
+    annotation = f": {ast.unparse(node.annotation)}" if isinstance(node, ast.AnnAssign) else ""
+    value = ""
+
+    if node.value is not None:
+        value = ast.unparse(node.value)
+        value = " = " + (value if len(value) <= MAX_VALUE_CHARS and "\n" not in value else "...")
+
+    for name in names:
+        lines.append(f"{indent}{name}{annotation}{value}")
+
+
+def _docstring_line(node: ast.AST) -> Optional[str]:
+    docstring = ast.get_docstring(node)
+    if not docstring or not docstring.strip():
+        return None
+
+    return f'"""{docstring.strip().splitlines()[0]}"""'
+
+
+def _is_private(name: str) -> bool:
+    return name.startswith("_") and not (name.startswith("__") and name.endswith("__"))
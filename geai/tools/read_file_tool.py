@@ -1,6 +1,9 @@
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 
 import geai.tools.workspace_tools as workspace_tools
+from geai.tools.file_locks import file_locks
+from geai.tools.memo import memoized
+from geai.tools.spill import capped
 from pydantic import BaseModel
 
 
@@ -12,6 +15,8 @@ class ReadFileResult(BaseModel):
 
 
 @function_tool
+@capped
+@memoized(lambda result, file_name: [workspace_tools.get_full_file_name(file_name)])
 def read_file(file_name: str) -> ReadFileResult:
     """
     Reads the full content of the file. Use only when needed, files can be large.
@@ -41,7 +46,7 @@ def read_file_impl(file_name: str) -> ReadFileResult:
                 error_message=f"FILE DOES NOT EXIST: {file_name}"
             )
 
-        with open(full_file_name, "rt", encoding="utf-8") as f:
+        with file_locks.read(full_file_name), open(full_file_name, "rt", encoding="utf-8") as f:
             content = f.read()
             return ReadFileResult(
                 content=content,
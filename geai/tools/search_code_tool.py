@@ -0,0 +1,92 @@
+import os
+from typing import List, Optional
+
+from geai.tools.lazy_tool import function_tool
+from pydantic import BaseModel
+
+from geai.tools import workspace
+from geai.tools.search_index import SearchIndex
+from geai.tools.spill import capped
+
+# the snippet lines shown for a file
+MAX_SNIPPETS = 3
+
+
+class CodeSnippet(BaseModel):
+    """A line of a file that matches the query"""
+    line: int
+    text: str
+
+
+class SearchHit(BaseModel):
+    """A file that matches the query, with its best lines"""
+    file_name: str
+    score: float
+    snippets: List[CodeSnippet]
+
+
+class SearchCodeResult(BaseModel):
+    """Result of a search_code operation, the best files first"""
+    hits: List[SearchHit]
+    success: bool
+    error_message: Optional[str] = None
+
+
+@function_tool
+@capped
+def search_code(query: str, max_results: int = 5) -> SearchCodeResult:
+    """
+    Searches the workspace files for a concept, and returns the files that
+    match it best, ranked, with their best matching lines. Use it to find
+    where something lives, before grepping. Identifiers are split, so
+    `read file` also finds `readFile` and `read_file`.
+
+    :param query: The words or identifiers to search for
+    :param max_results: How many files to return
+    :return: SearchCodeResult with the best files first
+    """
+    return search_code_impl(query, max_results)
+
+
+def search_code_impl(query: str, max_results: int = 5) -> SearchCodeResult:
+    """
+    Internal implementation of search_code, using the BM25 index of the
+    current workspace, that's refreshed for the changed files first.
+
+    This function is used by the search_code tool and can be tested independently.
+
+    :param query: The words or identifiers to search for
+    :param max_results: How many files to return
+    :return: SearchCodeResult with the best files first
+    """
+    try:
+        matches = SearchIndex.current().search(query, max(1, max_results))
+        hits = []
+
+        for match in matches:
+            file_lines = _read_lines(os.path.join(workspace.current().folder, match.file_name))
+            snippets = [CodeSnippet(line=line, text=file_lines[line - 1].strip())
+                        for line in match.lines[:MAX_SNIPPETS]
+                        if line <= len(file_lines)]
+
+            hits.append(SearchHit(file_name=match.file_name, score=match.score, snippets=snippets))
+
+        return SearchCodeResult(
+            hits=hits,
+            success=True,
+            error_message=None if hits else "No files match the query"
+        )
+    except Exception as e:
+        return SearchCodeResult(
+            hits=[],
+            success=False,
+            error_message=f"Error during search_code: {str(e)}"
+        )
+
+
+def _read_lines(full_file_name: str) -> List[str]:
+    try:
+        with open(full_file_name, "rt", encoding="utf-8") as f:
+            return f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
@@ -0,0 +1,138 @@
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+from geai.tools.file_index import FileIndex
+
+# the lines kept for a term in a file, for the snippets
+MAX_TERM_LINES = 16
+
+# the BM25 parameters
+K1 = 1.2
+B = 0.75
+
+IDENTIFIER = re.compile(r"[A-Za-z0-9_]+")
+# the words of an identifier: `HTTPServer` -> `HTTP`, `Server`, `read_file2` -> `read`, `file`, `2`
+WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    The search terms of a text: its identifiers, lowercased, and the words
+    they're made of, split on the camelCase and snake_case boundaries, so
+    `readFile`, `read_file` and "read the file" all match.
+    """
+    terms: List[str] = []
+
+    for identifier in IDENTIFIER.findall(text):
+        words = [word.lower() for word in WORD.findall(identifier)]
+        if len(words) != 1:
+            terms.append(identifier.lower())
+        terms.extend(words)
+
+    return [term for term in terms if len(term) > 1]
+
+
+@dataclass
+class IndexedFile:
+    mtime_ns: int
+    size: int
+    length: int
+    # term -> how many times it's in the file
+    terms: Dict[str, int]
+    # term -> the first lines it's on
+    lines: Dict[str, List[int]]
+
+
+@dataclass
+class SearchMatch:
+    file_name: str
+    score: float
+    # the lines with the most query terms, best first
+    lines: List[int]
+
+
+class SearchIndex(FileIndex[IndexedFile]):
+    """
+    An inverted index over the text files of a workspace, ranked with BM25.
+    Every search refreshes it first, see `FileIndex`.
+    """
+    name = "search"
+    entry_type = IndexedFile
+
+    def __init__(self, folder: str):
+        # term -> {file name -> term frequency}
+        self._postings: Dict[str, Dict[str, int]] = dict()
+        self._total_length = 0
+
+        super().__init__(folder)
+
+    def search(self, query: str, max_results: int = 5) -> List[SearchMatch]:
+        with self._lock:
+            self.refresh()
+
+            return self._search(query, max_results)
+
+    def _search(self, query: str, max_results: int) -> List[SearchMatch]:
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not self._files or not query_terms:
+            return []
+
+        average_length = self._total_length / len(self._files) or 1
+        scores: Dict[str, float] = dict()
+
+        for term in query_terms:
+            postings = self._postings.get(term, dict())
+            idf = math.log(1 + (len(self._files) - len(postings) + 0.5) / (len(postings) + 0.5))
+
+            for file_name, frequency in postings.items():
+                length_norm = 1 - B + B * self._files[file_name].length / average_length
+                scores[file_name] = (scores.get(file_name, 0)
+                                     + idf * frequency * (K1 + 1) / (frequency + K1 * length_norm))
+
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:max_results]
+
+        return [SearchMatch(file_name, round(score, 3), self._best_lines(file_name, query_terms))
+                for file_name, score in best]
+
+    def _best_lines(self, file_name: str, query_terms: List[str]) -> List[int]:
+        line_terms: Dict[int, int] = dict()
+
+        for term in query_terms:
+            for line in self._files[file_name].lines.get(term, []):
+                line_terms[line] = line_terms.get(line, 0) + 1
+
+        return sorted(line_terms, key=lambda line: (-line_terms[line], line))
+
+    def _index_file(self, full_file_name: str, content: str, stat: os.stat_result) -> IndexedFile:
+        terms: Dict[str, int] = dict()
+        term_lines: Dict[str, List[int]] = dict()
+        length = 0
+
+        for line_number, line in enumerate(content.splitlines(), start=1):
+            for term in tokenize(line):
+                terms[term] = terms.get(term, 0) + 1
+                length += 1
+
+                first_lines = term_lines.setdefault(term, [])
+                if len(first_lines) < MAX_TERM_LINES and (not first_lines or first_lines[-1] != line_number):
+                    first_lines.append(line_number)
+
+        return IndexedFile(stat.st_mtime_ns, stat.st_size, length, terms, term_lines)
+
+    def _added(self, file_name: str, entry: IndexedFile) -> None:
+        self._total_length += entry.length
+
+        for term, frequency in entry.terms.items():
+            self._postings.setdefault(term, dict())[file_name] = frequency
+
+    def _removed(self, file_name: str, entry: IndexedFile) -> None:
+        self._total_length -= entry.length
+
+        for term in entry.terms:
+            postings = self._postings[term]
+            del postings[file_name]
+            if not postings:
+                del self._postings[term]
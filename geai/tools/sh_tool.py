@@ -1,10 +1,10 @@
 import os
-import subprocess
 
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 from pydantic import BaseModel
 
-from geai.tools import workspace
+from geai.tools import memo, processes, workspace
+from geai.tools.spill import capped
 
 
 class RunShResult(BaseModel):
@@ -27,16 +27,17 @@ def run_sh_command_impl(command: str) -> RunShResult:
     """
     try:
         # Get the absolute path of the workspace.py folder
-        workspace_path = os.path.abspath(workspace.folder)
+        workspace_path = os.path.abspath(workspace.current().folder)
         
         # Run the command within the workspace.py directory
-        result = subprocess.run(
+        result = processes.run(
             command,
             shell=True,
-            cwd=workspace_path,
-            capture_output=True,
-            text=True
+            cwd=workspace_path
         )
+
+        # the command might have changed anything in the workspace
+        memo.bump_generation()
         
         return RunShResult(
             stdout=result.stdout,
@@ -55,6 +56,7 @@ def run_sh_command_impl(command: str) -> RunShResult:
 
 
 @function_tool
+@capped
 def execute(command: str) -> RunShResult:
     """
     Run a shell command within the workspace.py directory.
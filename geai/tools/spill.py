@@ -0,0 +1,157 @@
+import functools
+import hashlib
+import json
+import os
+import re
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from geai.metrics import registry
+from geai.tools import workspace
+from geai.tools.lazy_tool import function_tool
+
+# about 4k tokens, a bigger tool result goes to the spill store
+MAX_RESULT_CHARS = 16_000
+HEAD_CHARS = 8_000
+TAIL_CHARS = 4_000
+
+SPILL_ID = re.compile(r"^[\w-]+$")
+
+tool_results_spilled = registry.counter(
+    "geai_tool_results_spilled_total", "Number of the tool results too big for the model context, by tool.")
+tool_result_chars_saved = registry.counter(
+    "geai_tool_result_chars_saved_total",
+    "Number of the characters of the tool results kept out of the model context, by tool.")
+
+
+def capped(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Caps the size of the result of a tool. A result too big for the model
+    context is saved into the spill store of the workspace, and the model gets
+    only its head and tail, with a line telling how to read the rest, using
+    the `read_spilled_output` tool. A small result is returned as it is.
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        result = func(*args, **kwargs)
+        text = as_text(result)
+
+        if len(text) <= MAX_RESULT_CHARS:
+            return result
+
+        spill_id = spill(func.__name__, text)
+        head, tail = _head(text), _tail(text)
+        total_lines = _line_count(text)
+        omitted_lines = max(0, total_lines - _line_count(head) - _line_count(tail))
+
+        tool_results_spilled.inc(tool=func.__name__)
+        tool_result_chars_saved.inc(len(text) - len(head) - len(tail), tool=func.__name__)
+
+        return (f"{head}\n"
+                f"[... {omitted_lines} lines omitted. The full output has {total_lines} lines, and it's saved "
+                f"with the spill id `{spill_id}`: read the lines you need with the `read_spilled_output` tool ...]\n"
+                f"{tail}")
+
+    return wrapper
+
+
+@function_tool
+def read_spilled_output(spill_id: str, start_line: int, end_line: int) -> str:
+    """
+    Reads a range of lines from a tool output that was too big, and was saved
+    with its spill id.
+
+    :param spill_id: The spill id, as given in the truncated tool output
+    :param start_line: The first line to read, starting from 1
+    :param end_line: The last line to read (inclusive)
+    :return: the lines, or an error message
+    """
+    return read_spilled_output_impl(spill_id, start_line, end_line)
+
+
+def read_spilled_output_impl(spill_id: str, start_line: int, end_line: int) -> str:
+    if not SPILL_ID.match(spill_id):
+        return f"invalid spill id: {spill_id}"
+
+    try:
+        with open(_spill_file(spill_id), "rt", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return f"no spilled output with the id {spill_id}"
+
+    start_line = max(1, start_line)
+    end_line = min(len(lines), end_line)
+
+    if start_line > end_line:
+        return f"no lines in that range, the spilled output has {len(lines)} lines"
+
+    text = "\n".join(lines[start_line - 1:end_line])
+    header = f"lines {start_line}-{end_line} of {len(lines)}:\n"
+
+    if len(text) > MAX_RESULT_CHARS:
+        text = _head(text, MAX_RESULT_CHARS)
+        shown = _line_count(text)
+        header = (f"lines {start_line}-{start_line + shown - 1} of {len(lines)}, the range was too big, "
+                  f"read the rest from line {start_line + shown}:\n")
+
+    return header + text
+
+
+def as_text(result: Any) -> str:
+    """The result of a tool as text, with the long text fields (e.g. stdout) kept on their own lines."""
+    if isinstance(result, str):
+        return result
+
+    if isinstance(result, BaseModel):
+        result = result.model_dump()
+
+    if isinstance(result, dict):
+        parts = []
+
+        for key, value in result.items():
+            if isinstance(value, str) and "\n" in value:
+                parts.append(f"{key}:")
+                parts.append(value.removesuffix("\n"))
+            elif isinstance(value, list):
+                parts.append(f"{key}:")
+                parts.extend(as_text(item) if isinstance(item, str) else json.dumps(item) for item in value)
+            else:
+                parts.append(f"{key}: {json.dumps(value)}")
+
+        return "\n".join(parts)
+
+    if isinstance(result, list):
+        return "\n".join(item if isinstance(item, str) else json.dumps(item) for item in result)
+
+    return json.dumps(result)
+
+
+def spill(tool_name: str, text: str) -> str:
+    """Saves the text into the spill store of the workspace, and returns its spill id."""
+    spill_id = f"{tool_name}-{hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]}"
+    spill_folder = workspace.scratch_folder(workspace.current().folder, "spill")
+
+    with open(os.path.join(spill_folder, f"{spill_id}.txt"), "wt", encoding="utf-8") as f:
+        f.write(text)
+
+    return spill_id
+
+
+def _spill_file(spill_id: str) -> str:
+    return os.path.join(workspace.current().folder, ".geai", "spill", f"{spill_id}.txt")
+
+
+def _head(text: str, size: int = HEAD_CHARS) -> str:
+    head = text[:size]
+    # whole lines, unless it's a single huge line
+    return head[:head.rfind("\n")] if "\n" in head else head
+
+
+def _tail(text: str, size: int = TAIL_CHARS) -> str:
+    tail = text[-size:]
+    return tail[tail.find("\n") + 1:] if "\n" in tail else tail
+
+
+def _line_count(text: str) -> int:
+    return text.count("\n") + 1
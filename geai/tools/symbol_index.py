@@ -0,0 +1,256 @@
+import ast
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from geai.tools.file_index import FileIndex
+
+PYTHON_EXTENSIONS = {".py"}
+C_LIKE_EXTENSIONS = {".c", ".h", ".cc", ".cpp", ".hpp", ".java"}
+
+# the lines kept for a name used in a file
+MAX_REFERENCE_LINES = 50
+
+CONSTANT_NAME = re.compile(r"^_*[A-Z][A-Z0-9_]*$")
+
+# the lexical rules for C and Java, applied to the lines without comments and strings
+COMMENT_OR_STRING = re.compile(r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'", re.DOTALL)
+TYPE_DEFINITION = re.compile(
+    r"\b(?:class|interface|enum|record|struct|union)\s+([A-Za-z_]\w*)(?=\s*(?:[{:<(]|extends\b|implements\b|$))")
+# a return type (or modifiers) then a name and its parameters, not ending in `;` as a call or a prototype
+FUNCTION_DEFINITION = re.compile(r"^\s*((?:[\w$<>\[\],.*&:~?]+\s+)+)\**([A-Za-z_]\w*)\s*\((?!.*;\s*$)")
+JAVA_CONSTANT = re.compile(r"\bstatic\s+final\s+[\w<>\[\],.?\s]+?\s+([A-Z][A-Z0-9_]*)\s*=")
+C_DEFINE = re.compile(r"^\s*#\s*define\s+([A-Za-z_]\w*)")
+IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+C_LIKE_KEYWORDS = {
+    "abstract", "assert", "auto", "boolean", "break", "byte", "case", "catch", "char", "class", "const", "continue",
+    "default", "define", "delete", "do", "double", "else", "enum", "extends", "extern", "final", "finally", "float",
+    "for", "goto", "if", "implements", "import", "include", "inline", "instanceof", "int", "interface", "long",
+    "native", "new", "package", "private", "protected", "public", "record", "register", "return", "short",
+    "signed", "sizeof", "static", "struct", "super", "switch", "synchronized", "this", "throw", "throws",
+    "try", "typedef", "union", "unsigned", "var", "void", "volatile", "while",
+}
+# a "return type" word that shows the line is a statement, not a definition
+STATEMENT_WORDS = {"return", "new", "throw", "else", "case", "goto"}
+
+
+@dataclass
+class FileSymbols:
+    mtime_ns: int
+    size: int
+    # [name, kind, line, container], the container is the class (or function) it's defined in
+    definitions: List[List[Any]]
+    # name -> the lines it's used on
+    references: Dict[str, List[int]]
+
+
+@dataclass
+class Symbol:
+    name: str
+    # class, function, method, or constant
+    kind: str
+    file_name: str
+    line: int
+    container: Optional[str] = None
+
+
+class SymbolIndex(FileIndex[FileSymbols]):
+    """
+    The definitions (classes, functions, methods, constants) of the source
+    files of a workspace, and the lines where the names are used. Python is
+    read with `ast`, C and Java with lexical rules. Every lookup refreshes it
+    first, see `FileIndex`.
+    """
+    name = "symbols"
+    entry_type = FileSymbols
+
+    def __init__(self, folder: str):
+        # name -> where it's defined
+        self._definitions: Dict[str, List[Symbol]] = dict()
+        # name -> the files that use it
+        self._users: Dict[str, Set[str]] = dict()
+
+        super().__init__(folder)
+
+    def indexes(self, file_name: str) -> bool:
+        return os.path.splitext(file_name)[1] in PYTHON_EXTENSIONS | C_LIKE_EXTENSIONS
+
+    def find_symbol(self, name: str) -> List[Symbol]:
+        """
+        The definitions of a name. A qualified name (e.g. `Class.method`) only
+        matches the definitions in that container.
+        """
+        container, _, simple_name = name.rpartition(".")
+
+        with self._lock:
+            self.refresh()
+            symbols = self._definitions.get(simple_name, [])
+
+            if container:
+                # whole dotted parts only, `er.parse` isn't `Parser.parse`
+                symbols = [s for s in symbols
+                           if s.container and (s.container == container or s.container.endswith("." + container))]
+
+            return sorted(symbols, key=lambda s: (s.file_name, s.line))
+
+    def find_references(self, name: str) -> List[Tuple[str, int]]:
+        """The (file name, line) where a name is used, without its definitions."""
+        simple_name = name.rpartition(".")[2]
+
+        with self._lock:
+            self.refresh()
+            references = []
+
+            for file_name in sorted(self._users.get(simple_name, set())):
+                entry = self._files[file_name]
+                definition_lines = {line for d_name, _, line, _ in entry.definitions if d_name == simple_name}
+
+                references.extend((file_name, line)
+                                  for line in entry.references[simple_name]
+                                  if line not in definition_lines)
+
+            return references
+
+    def _index_file(self, full_file_name: str, content: str, stat: os.stat_result) -> FileSymbols:
+        if os.path.splitext(full_file_name)[1] in PYTHON_EXTENSIONS:
+            definitions, references = _python_symbols(content)
+        else:
+            definitions, references = _c_like_symbols(content, full_file_name.endswith(".java"))
+
+        return FileSymbols(stat.st_mtime_ns, stat.st_size, definitions, references)
+
+    def _added(self, file_name: str, entry: FileSymbols) -> None:
+        for name, kind, line, container in entry.definitions:
+            self._definitions.setdefault(name, []).append(Symbol(name, kind, file_name, line, container))
+
+        for name in entry.references:
+            self._users.setdefault(name, set()).add(file_name)
+
+    def _removed(self, file_name: str, entry: FileSymbols) -> None:
+        for name in {definition[0] for definition in entry.definitions}:
+            symbols = [s for s in self._definitions[name] if s.file_name != file_name]
+            if symbols:
+                self._definitions[name] = symbols
+            else:
+                del self._definitions[name]
+
+        for name in entry.references:
+            users = self._users[name]
+            users.discard(file_name)
+            if not users:
+                del self._users[name]
+
+
+class _PythonSymbols(ast.NodeVisitor):
+    def __init__(self):
+        self.definitions: List[List[Any]] = []
+        self.references: Dict[str, List[int]] = dict()
+        # the enclosing definitions, and if each one is a class
+        self._containers: List[Tuple[str, bool]] = []
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._define(node.name, "class", node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        in_class = bool(self._containers) and self._containers[-1][1]
+        self._define(node.name, "method" if in_class else "function", node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self._constants(node.targets, node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self._constants([node.target], node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            _reference(self.references, node.id, node.lineno)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if isinstance(node.ctx, ast.Load):
+            _reference(self.references, node.attr, node.lineno)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            _reference(self.references, alias.name, node.lineno)
+
+    def _define(self, name: str, kind: str, node: ast.AST) -> None:
+        container = ".".join(c for c, _ in self._containers) or None
+        self.definitions.append([name, kind, node.lineno, container])
+
+        self._containers.append((name, kind == "class"))
+        self.generic_visit(node)
+        self._containers.pop()
+
+    def _constants(self, targets: List[ast.expr], node: ast.AST) -> None:
+        # only the module and class level ones, in a function they're just variables
+        if not self._containers or self._containers[-1][1]:
+            container = ".".join(c for c, _ in self._containers) or None
+
+            for target in targets:
+                if isinstance(target, ast.Name) and CONSTANT_NAME.match(target.id):
+                    self.definitions.append([target.id, "constant", node.lineno, container])
+
+        self.generic_visit(node)
+
+
+def _python_symbols(content: str) -> Tuple[List[List[Any]], Dict[str, List[int]]]:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return [], dict()
+
+    visitor = _PythonSymbols()
+    visitor.visit(tree)
+
+    return visitor.definitions, visitor.references
+
+
+def _c_like_symbols(content: str, is_java: bool) -> Tuple[List[List[Any]], Dict[str, List[int]]]:
+    # the comments and the strings are blanked, so they keep their line breaks
+    code = COMMENT_OR_STRING.sub(lambda m: re.sub(r"[^\n]", " ", m.group()), content)
+    definitions: List[List[Any]] = []
+    references: Dict[str, List[int]] = dict()
+    # the enclosing types, with the brace depth they're opened from
+    types: List[Tuple[str, int]] = []
+    depth = 0
+
+    for line_number, line in enumerate(code.splitlines(), start=1):
+        container = ".".join(name for name, _ in types) or None
+
+        type_match = TYPE_DEFINITION.search(line)
+        function_match = FUNCTION_DEFINITION.match(line)
+        constant_match = JAVA_CONSTANT.search(line) if is_java else C_DEFINE.match(line)
+
+        if type_match:
+            definitions.append([type_match.group(1), "class", line_number, container])
+            types.append((type_match.group(1), depth))
+        elif (function_match
+              and function_match.group(2) not in C_LIKE_KEYWORDS
+              and not STATEMENT_WORDS & set(function_match.group(1).split())):
+            kind = "method" if types else "function"
+            definitions.append([function_match.group(2), kind, line_number, container])
+        elif constant_match:
+            definitions.append([constant_match.group(1), "constant", line_number, container])
+
+        for name in IDENTIFIER.findall(line):
+            if name not in C_LIKE_KEYWORDS:
+                _reference(references, name, line_number)
+
+        depth += line.count("{") - line.count("}")
+        # a type is closed once its braces are
+        while types and depth <= types[-1][1] and "}" in line:
+            types.pop()
+
+    return definitions, references
+
+
+def _reference(references: Dict[str, List[int]], name: str, line: int) -> None:
+    lines = references.setdefault(name, [])
+
+    if len(lines) < MAX_REFERENCE_LINES and line not in lines[-1:]:
+        lines.append(line)
@@ -0,0 +1,145 @@
+import os
+from typing import Dict, List, Optional
+
+from geai.tools.lazy_tool import function_tool
+from pydantic import BaseModel
+
+from geai.tools import workspace
+from geai.tools.spill import capped
+from geai.tools.symbol_index import SymbolIndex
+
+
+class SymbolLocation(BaseModel):
+    """Where a symbol is defined"""
+    name: str
+    kind: str  # 'class', 'function', 'method' or 'constant'
+    file_name: str
+    line: int
+    container: Optional[str] = None
+    text: str
+
+
+class FindSymbolResult(BaseModel):
+    """Result of a find_symbol operation"""
+    symbols: List[SymbolLocation]
+    success: bool
+    error_message: Optional[str] = None
+
+
+class ReferenceLocation(BaseModel):
+    """A line where a symbol is used"""
+    file_name: str
+    line: int
+    text: str
+
+
+class FindReferencesResult(BaseModel):
+    """Result of a find_references operation"""
+    references: List[ReferenceLocation]
+    success: bool
+    error_message: Optional[str] = None
+
+
+@function_tool
+@capped
+def find_symbol(name: str) -> FindSymbolResult:
+    """
+    Finds where a class, function, method or constant is defined in the
+    workspace (python, C and Java files), with the exact file and line.
+
+    :param name: The name of the symbol, optionally qualified with its class, e.g. `Client.get`
+    :return: FindSymbolResult with the definitions
+    """
+    return find_symbol_impl(name)
+
+
+def find_symbol_impl(name: str) -> FindSymbolResult:
+    """
+    Internal implementation of find_symbol, using the symbol index of the
+    current workspace, that's refreshed for the changed files first.
+
+    This function is used by the find_symbol tool and can be tested independently.
+
+    :param name: The name of the symbol, optionally qualified with its class, e.g. `Client.get`
+    :return: FindSymbolResult with the definitions
+    """
+    try:
+        symbols = SymbolIndex.current().find_symbol(name.strip())
+        lines = _Lines()
+
+        return FindSymbolResult(
+            symbols=[SymbolLocation(name=symbol.name,
+                                    kind=symbol.kind,
+                                    file_name=symbol.file_name,
+                                    line=symbol.line,
+                                    container=symbol.container,
+                                    text=lines.text(symbol.file_name, symbol.line))
+                     for symbol in symbols],
+            success=True,
+            error_message=None if symbols else f"No definition found for {name}"
+        )
+    except Exception as e:
+        return FindSymbolResult(
+            symbols=[],
+            success=False,
+            error_message=f"Error during find_symbol: {str(e)}"
+        )
+
+
+@function_tool
+@capped
+def find_references(name: str) -> FindReferencesResult:
+    """
+    Finds the lines where a class, function, method or constant is used in
+    the workspace (python, C and Java files), without its definitions.
+
+    :param name: The name of the symbol
+    :return: FindReferencesResult with the lines using it
+    """
+    return find_references_impl(name)
+
+
+def find_references_impl(name: str) -> FindReferencesResult:
+    """
+    Internal implementation of find_references, using the symbol index of the
+    current workspace, that's refreshed for the changed files first.
+
+    This function is used by the find_references tool and can be tested independently.
+
+    :param name: The name of the symbol
+    :return: FindReferencesResult with the lines using it
+    """
+    try:
+        references = SymbolIndex.current().find_references(name.strip())
+        lines = _Lines()
+
+        return FindReferencesResult(
+            references=[ReferenceLocation(file_name=file_name, line=line, text=lines.text(file_name, line))
+                        for file_name, line in references],
+            success=True,
+            error_message=None if references else f"No references found for {name}"
+        )
+    except Exception as e:
+        return FindReferencesResult(
+            references=[],
+            success=False,
+            error_message=f"Error during find_references: {str(e)}"
+        )
+
+
+class _Lines:
+    """The lines of the workspace files, each file is read once."""
+    def __init__(self):
+        self._files: Dict[str, List[str]] = dict()
+
+    def text(self, file_name: str, line: int) -> str:
+        if file_name not in self._files:
+            try:
+                with open(os.path.join(workspace.current().folder, file_name), "rt", encoding="utf-8") as f:
+                    self._files[file_name] = f.read().splitlines()
+            except (OSError, UnicodeDecodeError):
+                self._files[file_name] = []
+
+        lines = self._files[file_name]
+
+        return lines[line - 1].strip() if line <= len(lines) else ""
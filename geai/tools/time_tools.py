@@ -1,10 +1,10 @@
-import time
+import asyncio
 
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 
 
 @function_tool
-def sleep(seconds: float) -> str:
+async def sleep(seconds: float) -> str:
     """
     Wait for the specified number of seconds.
     
@@ -14,5 +14,6 @@ def sleep(seconds: float) -> str:
     Returns:
         A confirmation message indicating the sleep is complete
     """
-    time.sleep(seconds)
+    # async, so an interrupted turn doesn't leave a thread sleeping
+    await asyncio.sleep(seconds)
     return f"Successfully slept for {seconds} seconds"
@@ -1,3 +1,71 @@
+import contextlib
+import contextvars
 import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
 
-folder: str = os.getcwd()
+
+@dataclass
+class WorkspaceContext:
+    """
+    The workspace a run works in: its root folder, and the caches and state of
+    the tools for it. The context is carried in a context variable, so the tools
+    resolve the paths against the workspace of the current run, and concurrent
+    runs (tasks of the same event loop, or threads) don't see each other's
+    workspace.
+    """
+    folder: str
+    # full file name -> (content digest, API), so a stale API is never served
+    api_cache: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    # the state of the other tools, by tool name
+    tool_state: Dict[str, Any] = field(default_factory=dict)
+
+
+# used when no run entered a workspace, e.g. in the tests
+default_context = WorkspaceContext(folder=os.getcwd())
+
+_current: contextvars.ContextVar[Optional[WorkspaceContext]] = contextvars.ContextVar("workspace", default=None)
+
+
+def current() -> WorkspaceContext:
+    """The workspace of the current run."""
+    context = _current.get()
+
+    return context if context is not None else default_context
+
+
+@contextlib.contextmanager
+def use(workspace: Union[str, WorkspaceContext]) -> Iterator[WorkspaceContext]:
+    """
+    Runs the block in the workspace. A folder that is already the current
+    workspace keeps its context, and its warm caches.
+    """
+    if isinstance(workspace, WorkspaceContext):
+        context = workspace
+    elif _current.get() is not None and os.path.abspath(current().folder) == os.path.abspath(workspace):
+        context = current()
+    else:
+        context = WorkspaceContext(folder=workspace)
+
+    token = _current.set(context)
+
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def scratch_folder(folder: str, name: str) -> str:
+    """
+    A folder for the scratch files of the tools in the workspace, under `.geai`,
+    that's ignored by git, since the scratch files never belong to the project.
+    """
+    scratch = os.path.join(folder, ".geai", name)
+    os.makedirs(scratch, exist_ok=True)
+
+    ignore_file = os.path.join(folder, ".geai", ".gitignore")
+    if not os.path.exists(ignore_file):
+        with open(ignore_file, "wt", encoding="utf-8") as f:
+            f.write("*\n")
+
+    return scratch
@@ -1,11 +1,18 @@
+import hashlib
 import os.path
-from typing import Optional, Dict
+from typing import Optional
 
-from agents import function_tool
+from geai.tools.lazy_tool import function_tool
 
 import geai.tools.read_file_tool as read_file_tool
+from geai.disk_cache import DiskCache
 from geai.ge_openai.ge_agent import GeAgent
-from geai.tools import workspace
+from geai.singleflight import SingleFlight
+from geai.tools import file_index, memo, workspace
+from geai.tools.file_locks import file_locks
+from geai.tools.memo import memoized
+from geai.tools.spill import capped
+from geai.tools.python_api import extract_python_api
 
 
 @function_tool
@@ -23,6 +30,8 @@ def write_file(file_name: str, content: str) -> str:
 
 
 @function_tool
+@capped
+@memoized(lambda result, path: [get_full_file_name(path)])
 def list_files(path: str) -> list[str]:
     """
     Lists all the files in the given folder. Folders end with a `/` in the name.
@@ -48,7 +57,11 @@ def list_files(path: str) -> list[str]:
     return result
 
 
-api_cache: Dict[str, str] = dict()
+# keyed by the full file name and the content digest, so it's shared by the workspaces safely
+api_extractions = SingleFlight("read_api")
+
+# the APIs extracted by the model, by file name and content, shared by the processes of a batch
+api_disk_cache: Optional[DiskCache] = None
 
 
 @function_tool
@@ -58,24 +71,62 @@ async def read_api(file_name: str) -> str:
 
     :param file_name: The name of the file to read
     """
-    global api_cache
+    return await read_api_impl(file_name)
+
 
+async def read_api_impl(file_name: str) -> str:
+    """
+    Python APIs are extracted locally, for the other files an API extractor agent
+    is used. The result is cached for the file content in the current
+    workspace, and the concurrent requests for the same content share a single
+    extraction.
+    """
+    api_cache = workspace.current().api_cache
     full_file_name = get_full_file_name(file_name)
+    file_content = read_file_tool.read_file_impl(file_name)
+
+    if not file_content.success:
+        return file_content.error_message
+
+    digest = hashlib.sha256(file_content.content.encode("utf-8")).hexdigest()
+    cached = api_cache.get(full_file_name)
+
+    if cached and cached[0] == digest:
+        return cached[1]
+
+    api_content = await api_extractions.run((full_file_name, digest),
+                                            lambda: extract_api(file_name, file_content.content))
+    api_cache[full_file_name] = (digest, api_content)
+
+    return api_content
 
-    if full_file_name in api_cache:
-        return api_cache[full_file_name]
+
+async def extract_api(file_name: str, file_content: str) -> str:
+    api_content = extract_python_api(file_content) if file_name.endswith(".py") else None
+
+    if api_content is not None:
+        return api_content
+
+    disk_key = f"{os.path.basename(file_name)}\0{file_content}"
+    if api_disk_cache:
+        api_content = api_disk_cache.get(disk_key)
+        if api_content is not None:
+            return api_content
 
     # Create an API extractor agent
     api_extractor = GeAgent("instructions/api_extractor.txt",
                             output_type=str,
                             data={
                                "file_name": file_name,
-                               "file_content": read_file_tool.read_file_impl(file_name)
+                               "file_content": file_content,
                            })
 
     # Run the agent to extract the API
     api_content = await api_extractor.run(f"Extract the API for {file_name}")
 
+    if api_disk_cache:
+        api_disk_cache.put(disk_key, api_content)
+
     return api_content
 
 
@@ -89,32 +140,35 @@ def patch_file(file_name: str, search_text: str, replace_text: str) -> str:
     :param replace_text: The text to replace with
     :return: confirmation or error message
     """
-    global api_cache
-
+    api_cache = workspace.current().api_cache
     full_file_name = ensure_file_path(file_name)
 
     if not full_file_name:
         return f"unable to patch {file_name} - file path not valid"
 
     try:
-        # Read the current file content
-        with open(full_file_name, "rt", encoding="utf-8") as f:
-            content = f.read()
+        # the whole read-modify-write, so a parallel tool call can't change the file in between
+        with file_locks.write(full_file_name):
+            # Read the current file content
+            with open(full_file_name, "rt", encoding="utf-8") as f:
+                content = f.read()
 
-        # Check if search_text is found
-        if search_text not in content:
-            return f"Searched text not found in {file_name}"
+            # Check if search_text is found
+            if search_text not in content:
+                return f"Searched text not found in {file_name}"
 
-        # Replace only the first occurrence
-        patched_content = content.replace(search_text, replace_text, 1)
+            # Replace only the first occurrence
+            patched_content = content.replace(search_text, replace_text, 1)
 
-        # Update the cache if the file was in it
-        if full_file_name in api_cache:
-            del api_cache[full_file_name]
+            # Update the cache if the file was in it
+            api_cache.pop(full_file_name, None)
+            memo.bump_generation()
 
-        # Write the patched content back
-        with open(full_file_name, "wt", encoding="utf-8") as f:
-            f.write(patched_content)
+            # Write the patched content back
+            with open(full_file_name, "wt", encoding="utf-8") as f:
+                f.write(patched_content)
+
+            file_index.file_changed(full_file_name)
 
         return f"File {file_name} patched successfully"
 
@@ -123,19 +177,21 @@ def patch_file(file_name: str, search_text: str, replace_text: str) -> str:
 
 
 def write_file_impl(file_name: str, content: str) -> str:
-    global api_cache
-
+    api_cache = workspace.current().api_cache
     full_file_name = ensure_file_path(file_name)
 
-    if full_file_name in api_cache:
-        del api_cache[full_file_name]
-
     if not full_file_name:
         return f"{file_name} was written!"
 
     try:
-        with open(full_file_name, "wt", encoding="utf-8") as f:
-            f.write(content)
+        with file_locks.write(full_file_name):
+            api_cache.pop(full_file_name, None)
+            memo.bump_generation()
+
+            with open(full_file_name, "wt", encoding="utf-8") as f:
+                f.write(content)
+
+            file_index.file_changed(full_file_name)
     except Exception as e:
         return f"Failed to write {file_name}: {e}"
 
@@ -150,7 +206,7 @@ def ensure_file_path(workspace_file_name: str) -> Optional[str]:
     if workspace_file_name and workspace_file_name.startswith("/"):
         workspace_file_name = "." + workspace_file_name
 
-    full_file_name = os.path.abspath(os.path.join(workspace.folder, workspace_file_name))
+    full_file_name = os.path.abspath(os.path.join(workspace.current().folder, workspace_file_name))
     full_dir_name = os.path.dirname(full_file_name)
     os.makedirs(full_dir_name, exist_ok=True)
 
@@ -164,7 +220,7 @@ def get_full_file_name(workspace_file_name: str) -> str:
     if workspace_file_name and workspace_file_name.startswith("/"):
         workspace_file_name = "." + workspace_file_name
 
-    full_file_name = os.path.abspath(os.path.join(workspace.folder, workspace_file_name))
+    full_file_name = os.path.abspath(os.path.join(workspace.current().folder, workspace_file_name))
 
     return full_file_name
 
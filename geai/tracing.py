@@ -0,0 +1,173 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """A timed section of the pipeline. Spans nest, through their parent_id."""
+    name: str
+    category: str
+    span_id: int
+    parent_id: Optional[int]
+    track: int
+    task_key: Any
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("geai_current_span", default=None)
+
+
+class Tracer:
+    """
+    Records nested spans. The current span is kept in a context variable, so spans
+    started in tasks spawned from inside a span are nested under it.
+
+    Tracing is disabled by default, and then the spans cost nothing except the call.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._tracks = itertools.count(1)
+        self._task_tracks: Dict[Any, int] = dict()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def start_span(self, name: str, category: str = "stage", **attributes: Any) -> Optional[Span]:
+        """
+        Starts a span under the current span, without making it current. Used for
+        leaf spans that are finished from another callback, e.g. tool calls.
+        """
+        if not self.enabled:
+            return None
+
+        parent = _current_span.get()
+        task_key = _task_key()
+
+        with self._lock:
+            # concurrent tasks get their own track, so their spans don't overlap in the timeline
+            if parent and parent.task_key == task_key:
+                track = parent.track
+            else:
+                track = self._task_tracks.get(task_key) or self._task_tracks.setdefault(task_key, next(self._tracks))
+
+        span = Span(name=name,
+                    category=category,
+                    span_id=next(self._ids),
+                    parent_id=parent.span_id if parent else None,
+                    track=track,
+                    task_key=task_key,
+                    start=time.perf_counter(),
+                    attributes=attributes)
+
+        with self._lock:
+            self.spans.append(span)
+
+        return span
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Runs the block inside a new span, that is current for the duration of the block.
+        """
+        span = self.start_span(name, category, **attributes)
+
+        if span is None:
+            yield None
+            return
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    def export_chrome_trace(self, file_name: str) -> None:
+        """
+        Writes the spans as a Chrome trace-event JSON file, that can be opened in
+        Perfetto (ui.perfetto.dev) or chrome://tracing.
+        """
+        events = []
+
+        for span in self.spans:
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self._origin) * 1_000_000,
+                "dur": span.duration * 1_000_000,
+                "pid": os.getpid(),
+                "tid": span.track,
+                "args": {k: str(v) for k, v in span.attributes.items()},
+            })
+
+        with open(file_name, "wt", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, limit: int = 15) -> str:
+        """
+        A plain text report of the slowest spans, with their self time (the time
+        not spent in child spans), and the total time per category.
+        """
+        if not self.spans:
+            return "no spans recorded"
+
+        child_time: Dict[int, float] = dict()
+        category_time: Dict[str, float] = dict()
+
+        for span in self.spans:
+            category_time[span.category] = category_time.get(span.category, 0) + span.duration
+            if span.parent_id is not None:
+                child_time[span.parent_id] = child_time.get(span.parent_id, 0) + span.duration
+
+        roots = [span for span in self.spans if span.parent_id is None]
+        wall_time = max(span.duration for span in roots) if roots else 0
+
+        lines = [f"{'duration':>10} {'self':>10} {'share':>6}  span"]
+
+        for span in sorted(self.spans, key=lambda s: s.duration, reverse=True)[:limit]:
+            # children of concurrent tasks can add up to more than the parent
+            self_time = max(span.duration - child_time.get(span.span_id, 0), 0)
+            share = span.duration / wall_time * 100 if wall_time else 0
+            attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+
+            lines.append(f"{span.duration:>9.2f}s {self_time:>9.2f}s {share:>5.1f}%  "
+                         f"[{span.category}] {span.name} {attributes}".rstrip())
+
+        lines.append("")
+        lines.append("total time per category (concurrent spans add up):")
+        for category, total in sorted(category_time.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"{total:>9.2f}s  {category}")
+
+        return "\n".join(lines)
+
+
+def _task_key() -> Any:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+
+    return id(task) if task else threading.get_ident()
+
+
+tracer = Tracer()
@@ -1,6 +1,8 @@
+import codecs
+import contextlib
+import os
+import re
 import sys
-import select
-import tty
 import termios
 
 # this was generated with clanker itself :)
@@ -69,20 +71,239 @@ def _apply_styling(text, color=None, bgcolor=None, bold=False, italic=False):
         return f"\033[{';'.join(codes)}m{text}\033[{ANSI_RESET}m"
     return text
 
-def _get_input():
-    """Get input from stdin with non-blocking read."""
-    # Save current terminal settings
-    old_settings = termios.tcgetattr(sys.stdin)
+# bracketed paste: the terminal wraps the pasted text in these, so it's read in bulk
+PASTE_START = '\033[200~'
+PASTE_END = '\033[201~'
+ENABLE_BRACKETED_PASTE = '\033[?2004h'
+DISABLE_BRACKETED_PASTE = '\033[?2004l'
+
+# an escape sequence we don't handle (arrows, function keys), dropped as a whole
+ESCAPE_SEQUENCE = re.compile(r'\033(?:\[[0-9;?]*[ -/]*[@-~]|O.|[^\[O])')
+PLAIN_TEXT = re.compile(r'[^\x00-\x1f\x7f]+')
+
+READ_SIZE = 64 * 1024
+
+
+class _KeyParser:
+    """
+    Turns the bytes read from the terminal into keys: ("text", run of typed
+    characters), ("paste", pasted text) or ("key", control character). The
+    bytes can end anywhere, even inside a character or an escape sequence.
+    """
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._buffer = ''
+        self._paste = None
+
+    def feed(self, data: bytes) -> list:
+        self._buffer += self._decoder.decode(data)
+        keys = []
+
+        while self._buffer:
+            if self._paste is not None:
+                end = self._buffer.find(PASTE_END)
+                if end < 0:
+                    # the end marker might be split, keep what could be its start
+                    keep = _partial_suffix(self._buffer, PASTE_END)
+                    self._paste.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+
+                self._paste.append(self._buffer[:end])
+                self._buffer = self._buffer[end + len(PASTE_END):]
+                keys.append(('paste', ''.join(self._paste).replace('\r\n', '\n').replace('\r', '\n')))
+                self._paste = None
+                continue
+
+            if self._buffer[0] == '\033':
+                if self._buffer.startswith(PASTE_START):
+                    self._buffer = self._buffer[len(PASTE_START):]
+                    self._paste = []
+                    continue
+
+                match = ESCAPE_SEQUENCE.match(self._buffer)
+                if not match:
+                    break  # incomplete, wait for the rest of it
+
+                self._buffer = self._buffer[match.end():]
+                continue
+
+            match = PLAIN_TEXT.match(self._buffer)
+            if match:
+                keys.append(('text', match.group()))
+                self._buffer = self._buffer[match.end():]
+            else:
+                keys.append(('key', self._buffer[0]))
+                self._buffer = self._buffer[1:]
+
+        return keys
+
+
+class _LineEditor:
+    """
+    Edits the input from the keys: Enter ends a single line, or starts a new
+    line of a multi-line input that Ctrl+D ends. The echo is collected, and
+    written once for all the keys of a read.
+    """
+    def __init__(self, multiline: bool):
+        self.multiline = multiline
+        self.lines = []
+        self.current = []
+        self.echo = []
+        self.done = False
+
+    def feed(self, keys: list) -> None:
+        for kind, text in keys:
+            if self.done:
+                return
+
+            if kind == 'key':
+                self._control(text)
+            else:
+                self._text(text)
+
+    def result(self) -> str:
+        return '\n'.join(self.lines + [''.join(self.current)])
+
+    def take_echo(self) -> str:
+        echo = ''.join(self.echo)
+        self.echo = []
+        return echo
+
+    def _control(self, char: str) -> None:
+        if char == '\r' or char == '\n':  # Enter key
+            self.echo.append('\n')
+            if self.multiline:
+                self.lines.append(''.join(self.current))
+                self.current = []
+            else:
+                self.done = True
+        elif char == '\x03':  # Ctrl+C
+            raise KeyboardInterrupt
+        elif char == '\x7f' or char == '\b':  # Backspace
+            if self.current:
+                self.current.pop()
+                # Move cursor back, erase character, move cursor back again
+                self.echo.append('\b \b')
+        elif char == '\x04':  # Ctrl+D
+            if self.multiline:
+                self.echo.append('\n')
+                self.done = True
+        elif char == '\t':
+            self._text(char)
+
+    def _text(self, text: str) -> None:
+        if not self.multiline:
+            # a pasted single line can't have line breaks
+            text = text.replace('\n', ' ')
+
+        lines = text.split('\n')
+        self.current.extend(lines[0])
+
+        for line in lines[1:]:
+            self.lines.append(''.join(self.current))
+            self.current = list(line)
+
+        self.echo.append(text)
+
+
+@contextlib.contextmanager
+def _raw_terminal():
+    """
+    Puts the terminal in raw mode once, for the whole read: no line buffering,
+    no echo, no signals (Ctrl+C is read as a key). The output processing is
+    kept, so the echoed line breaks still work. Bracketed paste is enabled.
+    """
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+
+    settings = termios.tcgetattr(fd)
+    settings[0] &= ~(termios.ICRNL | termios.IXON)  # iflag
+    settings[3] &= ~(termios.ECHO | termios.ICANON | termios.ISIG | termios.IEXTEN)  # lflag
+    settings[6][termios.VMIN] = 1
+    settings[6][termios.VTIME] = 0
+
+    termios.tcsetattr(fd, termios.TCSADRAIN, settings)
+    _write(ENABLE_BRACKETED_PASTE)
+
     try:
-        # Set terminal to raw mode for non-blocking input
-        tty.setraw(sys.stdin.fileno())
-        # Check if input is available
-        if select.select([sys.stdin], [], [], 0) == ([sys.stdin], [], []):
-            return sys.stdin.read(1)
-        return None
+        yield fd
     finally:
-        # Restore terminal settings
-        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+        _write(DISABLE_BRACKETED_PASTE)
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+
+def _read(multiline: bool) -> str:
+    """Reads from the terminal, blocking until there's input, instead of polling."""
+    if not sys.stdin.isatty():
+        return _read_plain(multiline)
+
+    editor = _LineEditor(multiline)
+    keys = _KeyParser()
+
+    with _raw_terminal() as fd:
+        while not editor.done:
+            data = os.read(fd, READ_SIZE)
+            if not data:
+                break
+
+            editor.feed(keys.feed(data))
+            _write(editor.take_echo())
+
+    return editor.result()
+
+
+async def _read_async(multiline: bool) -> str:
+    """Reads from the terminal, without blocking the event loop."""
+    import asyncio  # only the async variants need it, keep the import of the module fast
+
+    if not sys.stdin.isatty():
+        return await asyncio.to_thread(_read_plain, multiline)
+
+    loop = asyncio.get_running_loop()
+    editor = _LineEditor(multiline)
+    keys = _KeyParser()
+    chunks = asyncio.Queue()
+
+    with _raw_terminal() as fd:
+        loop.add_reader(fd, lambda: chunks.put_nowait(os.read(fd, READ_SIZE)))
+
+        try:
+            while not editor.done:
+                data = await chunks.get()
+                if not data:
+                    break
+
+                editor.feed(keys.feed(data))
+                _write(editor.take_echo())
+        finally:
+            loop.remove_reader(fd)
+
+    return editor.result()
+
+
+def _read_plain(multiline: bool) -> str:
+    """Reads piped input: a line, or everything until the end of the input."""
+    if multiline:
+        return sys.stdin.read().rstrip('\n')
+
+    return sys.stdin.readline().rstrip('\n')
+
+
+def _write(text: str) -> None:
+    if text:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+def _partial_suffix(text: str, marker: str) -> int:
+    """How many characters at the end of the text are the start of the marker."""
+    for size in range(min(len(marker) - 1, len(text)), 0, -1):
+        if text.endswith(marker[:size]):
+            return size
+
+    return 0
+
 
 def read_single(prompt: str, color: str = None, bgcolor: str = None, bold: bool = False, italic: bool = False) -> str:
     """
@@ -98,35 +319,22 @@ def read_single(prompt: str, color: str = None, bgcolor: str = None, bold: bool
     Returns:
         The input string after pressing Enter
     """
-    # Apply styling to the prompt
     print_prompt(prompt, bgcolor, color, bold, italic)
 
-    # Read input character by character until Enter
-    input_buffer = []
-    while True:
-        char = _get_input()
-        if char is None:
-            continue
+    return _read(multiline=False)
 
-        if char == '\r' or char == '\n':  # Enter key
-            print()  # New line after input
-            break
-        elif char == '\x03':  # Ctrl+C
-            raise KeyboardInterrupt
-        elif char == '\x7f':  # Backspace
-            if input_buffer:
-                input_buffer.pop()
-                # Move cursor back, erase character, move cursor back again
-                print('\b \b', end='', flush=True)
-        else:
-            input_buffer.append(char)
-            print(char, end='', flush=True)
 
-    return ''.join(input_buffer)
+async def read_single_async(prompt: str, color: str = None, bgcolor: str = None, bold: bool = False, italic: bool = False) -> str:
+    """Same as `read_single`, but the event loop keeps running while the user types."""
+    print_prompt(prompt, bgcolor, color, bold, italic)
+
+    return await _read_async(multiline=False)
+
 
 def read_multi(prompt: str, color: str = None, bgcolor: str = None, bold: bool = False, italic: bool = False) -> str:
     """
-    Reads multi-line input.
+    Reads multi-line input, until Ctrl+D. Pasted text is read and echoed in
+    bulk.
 
     Args:
         prompt: The prompt to display
@@ -140,34 +348,15 @@ def read_multi(prompt: str, color: str = None, bgcolor: str = None, bold: bool =
     """
     print_prompt(prompt, bgcolor, color, bold, italic)
 
-    input_lines = []
-    current_line = []
+    return _read(multiline=True)
 
-    while True:
-        char = _get_input()
-        if char is None:
-            continue
 
-        if char == '\r' or char == '\n':  # Enter key
-            input_lines.append(''.join(current_line))
-            print()  # New line after input
-            current_line = []
-        elif char == '\x03':  # Ctrl+C
-            raise KeyboardInterrupt
-        elif char == '\x7f':  # Backspace
-            if current_line:
-                current_line.pop()
-                print('\b \b', end='', flush=True)
-        elif char == '\x04':  # Ctrl+D
-            # If we're at the end of a line, finish input
-            input_lines.append(''.join(current_line))
-            print()  # New line after input
-            break
-        else:
-            current_line.append(char)
-            print(char, end='', flush=True)
+async def read_multi_async(prompt: str, color: str = None, bgcolor: str = None, bold: bool = False, italic: bool = False) -> str:
+    """Same as `read_multi`, but the event loop keeps running while the user types."""
+    print_prompt(prompt, bgcolor, color, bold, italic)
+
+    return await _read_async(multiline=True)
 
-    return '\n'.join(input_lines)
 
 def read_options(prompt: str, title: str, options: list[str], color: str = None, bgcolor: str = None, bold: bool = False, italic: bool = False) -> str:
     """
@@ -185,7 +374,21 @@ def read_options(prompt: str, title: str, options: list[str], color: str = None,
     Returns:
         The selected option text or the raw input if not a valid option number
     """
+    _print_options(title, options)
+    print_prompt(prompt, bgcolor, color, bold, italic)
+
+    return _selected_option(_read(multiline=False), options)
+
+
+async def read_options_async(prompt: str, title: str, options: list[str], color: str = None, bgcolor: str = None, bold: bool = False, italic: bool = False) -> str:
+    """Same as `read_options`, but the event loop keeps running while the user types."""
+    _print_options(title, options)
+    print_prompt(prompt, bgcolor, color, bold, italic)
+
+    return _selected_option(await _read_async(multiline=False), options)
+
 
+def _print_options(title: str, options: list[str]) -> None:
     # Display title in bold
     print(_apply_styling(title, bold=True))
 
@@ -193,38 +396,20 @@ def read_options(prompt: str, title: str, options: list[str], color: str = None,
     for i, option in enumerate(options, 1):
         print(f"  {i}. {option}")
 
-    print_prompt(prompt, bgcolor, color, bold, italic)
 
-    input_buffer = []
-    while True:
-        char = _get_input()
-        if char is None:
-            continue
+def _selected_option(input_str: str, options: list[str]) -> str:
+    input_str = input_str.strip()
 
-        if char == '\r' or char == '\n':  # Enter key
-            print()  # New line after input
-            input_str = ''.join(input_buffer).strip()
-
-            # Try to parse as number
-            try:
-                option_index = int(input_str) - 1
-                if 0 <= option_index < len(options):
-                    return options[option_index]
-            except ValueError:
-                pass  # Not a number, return raw input
-
-            # Return raw input if not a valid option number
-            return input_str
-        elif char == '\x03':  # Ctrl+C
-            raise KeyboardInterrupt
-        elif char == '\x7f':  # Backspace
-            if input_buffer:
-                input_buffer.pop()
-                # Move cursor back, erase character, move cursor back again
-                print('\b \b', end='', flush=True)
-        else:
-            input_buffer.append(char)
-            print(char, end='', flush=True)
+    # Try to parse as number
+    try:
+        option_index = int(input_str) - 1
+        if 0 <= option_index < len(options):
+            return options[option_index]
+    except ValueError:
+        pass  # Not a number, return raw input
+
+    # Return raw input if not a valid option number
+    return input_str
 
 
 def print_prompt(prompt: str, bgcolor: str | None, color: str | None, bold: bool, italic: bool):
@@ -0,0 +1,242 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import structs
+from geai.metrics import registry, RATIO_BUCKETS
+
+SUMMARY_MAX_CHARS = 2000
+
+# a block that mentions more files than this is a listing (e.g. a folder tree), not a dependency
+MAX_CO_MENTIONS = 5
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+LIST_ITEM = re.compile(r"^(?:[*+-]|\d+[.)])\s")
+
+spec_slice_ratio = registry.histogram(
+    "geai_spec_slice_ratio", "Size of the SPEC.md slice sent for a file, relative to the full SPEC.md.", RATIO_BUCKETS)
+
+
+@dataclass
+class SpecBlock:
+    """
+    A paragraph, list item, or code block of the spec, the project files it
+    mentions, and the file it's about: the first one mentioned.
+    """
+    text: str
+    mentions: Set[str] = field(default_factory=set)
+    subject: Optional[str] = None
+
+
+@dataclass
+class SpecSection:
+    heading: str
+    blocks: List[SpecBlock] = field(default_factory=list)
+
+
+class SpecIndex:
+    """
+    Splits the SPEC.md into sections and blocks, so every file gets only the
+    part of the spec that's relevant for it: the blocks that mention the file,
+    or its dependencies (the files mentioned in the blocks about it), and a short
+    summary of the project.
+    """
+    def __init__(self, spec: str, files: List[structs.FileInfo]):
+        self.spec = spec
+        self.files = files
+        self.sections = parse_sections(spec)
+
+        patterns = _mention_patterns([file.filename for file in files])
+        for section in self.sections:
+            heading_mentions = _find_mentions(section.heading, patterns)
+            heading_subject = _first_mention(section.heading, patterns)
+            previous: Optional[SpecBlock] = None
+
+            for block in section.blocks:
+                block.mentions = heading_mentions | _find_mentions(block.text, patterns)
+                block.subject = heading_subject or _first_mention(block.text, patterns)
+
+                # e.g. "`util.py` exposes:" followed by a code block, that belongs to it
+                if previous and not block.mentions and previous.text.rstrip().endswith(":"):
+                    block.mentions = previous.mentions
+                    block.subject = previous.subject
+
+                previous = block
+
+        self._patterns = patterns
+        self._slices: Dict[str, str] = dict()
+
+    def dependencies(self, file: structs.FileInfo) -> List[str]:
+        """
+        The files mentioned in the spec blocks about this file, or in its
+        description. They're in the order of the file list.
+        """
+        dependencies = _find_mentions(file.description, self._patterns)
+
+        for block in self._blocks():
+            if block.subject == file.filename and len(block.mentions) <= MAX_CO_MENTIONS:
+                dependencies |= block.mentions
+
+        dependencies.discard(file.filename)
+
+        return [f.filename for f in self.files if f.filename in dependencies]
+
+    def related_files(self, file: structs.FileInfo) -> List[str]:
+        """
+        The dependencies of the file, and the files whose blocks mention it, since
+        the spec can describe a dependency either way ("uses x.py", "used by y.py").
+        """
+        related = set(self.dependencies(file))
+
+        for block in self._blocks():
+            if file.filename in block.mentions and block.subject and len(block.mentions) <= MAX_CO_MENTIONS:
+                related.add(block.subject)
+
+        related.discard(file.filename)
+
+        return [f.filename for f in self.files if f.filename in related]
+
+    def slice_for(self, file: structs.FileInfo) -> str:
+        """
+        The part of the spec relevant for the file. If the spec doesn't mention
+        the file at all, it gets the full spec.
+        """
+        if file.filename not in self._slices:
+            self._slices[file.filename] = self._slice(file)
+            spec_slice_ratio.observe(len(self._slices[file.filename]) / len(self.spec) if self.spec else 1)
+
+        return self._slices[file.filename]
+
+    def _slice(self, file: structs.FileInfo) -> str:
+        if not any(file.filename in block.mentions for block in self._blocks()):
+            return self.spec
+
+        relevant = {file.filename, *self.dependencies(file)}
+        texts: Dict[int, str] = self._summary()
+
+        for block in self._blocks():
+            if block.mentions & relevant:
+                texts[id(block)] = block.text
+
+        parts: List[str] = []
+        for section in self.sections:
+            section_text = _join_blocks([(block, texts[id(block)]) for block in section.blocks if id(block) in texts])
+
+            if section_text:
+                parts.append("\n\n".join(([section.heading] if section.heading else []) + [section_text]))
+
+        parts.append("All the files of the project: " + ", ".join(f.filename for f in self.files))
+        result = "\n\n".join(parts)
+
+        return result if len(result) < len(self.spec) else self.spec
+
+    def _summary(self) -> Dict[int, str]:
+        """The first blocks of the spec, that describe the project, up to `SUMMARY_MAX_CHARS`."""
+        texts: Dict[int, str] = dict()
+        budget = SUMMARY_MAX_CHARS
+
+        first_section = next((section for section in self.sections if section.blocks), None)
+        if not first_section:
+            return texts
+
+        for block in first_section.blocks:
+            if budget <= 0:
+                break
+
+            texts[id(block)] = block.text if len(block.text) <= budget else block.text[:budget].rstrip() + " ..."
+            budget -= len(block.text)
+
+        return texts
+
+    def _blocks(self) -> List[SpecBlock]:
+        return [block for section in self.sections for block in section.blocks]
+
+
+def parse_sections(spec: str) -> List[SpecSection]:
+    """
+    Splits the markdown into sections, by their headings, and every section into
+    blocks: paragraphs, top level list items, and code blocks.
+    """
+    sections = [SpecSection(heading="")]
+    lines: List[str] = []
+    in_code = False
+
+    def end_block() -> None:
+        text = "\n".join(lines).strip("\n")
+        if text.strip():
+            sections[-1].blocks.append(SpecBlock(text=text))
+        lines.clear()
+
+    for line in spec.splitlines():
+        if line.lstrip().startswith("```"):
+            if not in_code:
+                end_block()
+            lines.append(line)
+            in_code = not in_code
+            if not in_code:
+                end_block()
+            continue
+
+        if in_code:
+            lines.append(line)
+            continue
+
+        if HEADING.match(line):
+            end_block()
+            sections.append(SpecSection(heading=line.strip()))
+            continue
+
+        if not line.strip() or LIST_ITEM.match(line):
+            end_block()
+
+        if line.strip():
+            lines.append(line)
+
+    end_block()
+
+    return [section for section in sections if section.heading or section.blocks]
+
+
+def _join_blocks(blocks: List[Tuple[SpecBlock, str]]) -> str:
+    """Joins the blocks back, keeping the list items together."""
+    result = ""
+    previous_item = False
+
+    for block, text in blocks:
+        item = bool(LIST_ITEM.match(block.text))
+        result += ("\n" if item and previous_item else "\n\n" if result else "") + text
+        previous_item = item
+
+    return result
+
+
+def _mention_patterns(file_names: List[str]) -> Dict[str, re.Pattern]:
+    """
+    How every file is mentioned: by its path, or by its base name, if no other
+    file has the same base name.
+    """
+    base_names = [os.path.basename(f) for f in file_names]
+    patterns: Dict[str, re.Pattern] = dict()
+
+    for file_name, base_name in zip(file_names, base_names):
+        names = {file_name.lstrip("/")}
+        if base_names.count(base_name) == 1:
+            names.add(base_name)
+
+        alternatives = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+        patterns[file_name] = re.compile(rf"(?<![\w.-])(?:{alternatives})(?![\w-])")
+
+    return patterns
+
+
+def _first_mention(text: str, patterns: Dict[str, re.Pattern]) -> Optional[str]:
+    positions = [(match.start(), file_name)
+                 for file_name, pattern in patterns.items()
+                 for match in [pattern.search(text)] if match]
+
+    return min(positions)[1] if positions else None
+
+
+def _find_mentions(text: str, patterns: Dict[str, re.Pattern]) -> Set[str]:
+    return {file_name for file_name, pattern in patterns.items() if pattern.search(text)}
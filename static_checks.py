@@ -0,0 +1,418 @@
+import ast
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
+
+MODULE_NAMES = {"__file__", "__name__", "__doc__", "__spec__", "__loader__", "__package__",
+                "__builtins__", "__path__", "__annotations__", "__dict__", "__cached__"}
+BUILTIN_NAMES = set(dir(builtins)) | MODULE_NAMES
+
+SKIPPED_FOLDERS = {".git", ".geai", "__pycache__", "venv", ".venv", "node_modules"}
+
+# if the workspace declares its dependencies, a module we can't find might just not be installed here
+DEPENDENCY_FILES = ("requirements.txt", "pyproject.toml", "setup.py", "setup.cfg", "Pipfile")
+
+# handlers that make an import optional, e.g. `except ImportError:`
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+
+MAX_LISTED_NAMES = 30
+
+# fewer modules and files than this are checked in the calling thread, a pool would cost more than the checks
+INLINE_CHECKS = 8
+
+# a module's API we can't tell statically, e.g. because of star imports or a module `__getattr__`
+UNKNOWN_API = None
+
+# the process pool shared by all the checks, started on first use
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def find_workspace_modules(folder: str) -> Dict[str, str]:
+    """
+    Finds the python modules of the workspace, as they would be imported with the
+    workspace folder in the PYTHONPATH, e.g. `pkg.mod` for `pkg/mod.py`.
+
+    :return: the module names, and their file names relative to the workspace.
+    """
+    modules: Dict[str, str] = dict()
+
+    for root, folders, files in os.walk(folder):
+        folders[:] = sorted(f for f in folders if f not in SKIPPED_FOLDERS and not f.startswith("."))
+
+        for file_name in sorted(files):
+            if not file_name.endswith(".py"):
+                continue
+
+            relative_name = os.path.relpath(os.path.join(root, file_name), folder)
+            parts = relative_name[:-len(".py")].split(os.sep)
+
+            if parts[-1] == "__init__":
+                parts = parts[:-1]
+
+            if parts:
+                modules[".".join(parts)] = relative_name
+
+    return modules
+
+
+def module_api(source: str) -> Optional[List[str]]:
+    """
+    The names a module defines at its top level, so other modules can import
+    them. Returns `UNKNOWN_API` if they can't be known statically.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return UNKNOWN_API
+
+    names: Set[str] = set()
+
+    for node in tree.body:
+        for child in _top_level_nodes(node):
+            if isinstance(child, ast.ImportFrom) and any(alias.name == "*" for alias in child.names):
+                return UNKNOWN_API
+
+            names.update(_bound_names(child))
+
+    if "__getattr__" in names:
+        return UNKNOWN_API
+
+    return sorted(names)
+
+
+def check_python_source(file_name: str,
+                        source: str,
+                        workspace_apis: Dict[str, Optional[List[str]]],
+                        declares_dependencies: bool = False) -> List[str]:
+    """
+    Statically checks a python file of the workspace, without running it:
+    * it must compile,
+    * the names it uses must be defined somewhere,
+    * the imported modules must exist in the workspace, or be installed,
+    * the names imported or used from the other workspace modules must exist in them.
+
+    :param file_name: the file name relative to the workspace, used in the diagnostics.
+    :param workspace_apis: the modules of the workspace, and their API (see `module_api`).
+    :param declares_dependencies: the workspace lists its dependencies, so missing
+                                  third party modules aren't reported.
+    :return: the diagnostics, as `file:line: message`, empty if the file is clean.
+    """
+    try:
+        tree = compile(source, file_name, "exec", ast.PyCF_ONLY_AST)
+    except SyntaxError as e:
+        return [f"{file_name}:{e.lineno or 1}: syntax error: {e.msg}"]
+
+    checker = _SourceChecker(file_name, workspace_apis, declares_dependencies)
+    checker.check(tree)
+
+    return checker.diagnostics
+
+
+def check_workspace_files(folder: str,
+                          file_names: List[str],
+                          executor: Optional[Executor] = None) -> Dict[str, List[str]]:
+    """
+    Checks the python files in parallel, see `check_python_source`. Files that
+    aren't python have no static checks, and are not in the result.
+
+    :param executor: where the checks run. If not given, a few checks run in
+                     the calling thread, and more in a shared process pool.
+    :return: the diagnostics for every checked file.
+    """
+    file_names = [f.lstrip("/") for f in file_names if f.endswith(".py")]
+    if not file_names:
+        return dict()
+
+    modules = find_workspace_modules(folder)
+    sources = {module: _read(os.path.join(folder, file_name)) for module, file_name in modules.items()}
+    for file_name in file_names:
+        sources.setdefault(file_name, _read(os.path.join(folder, file_name)))
+
+    declares_dependencies = any(os.path.exists(os.path.join(folder, f)) for f in DEPENDENCY_FILES)
+
+    if executor is not None:
+        run = executor.map
+    elif len(modules) + len(file_names) < INLINE_CHECKS:
+        run = map
+    else:
+        run = _shared_executor().map
+
+    apis = dict(zip(modules, run(module_api, [sources[module] for module in modules])))
+    results = run(check_python_source,
+                  file_names,
+                  [sources[file_name] for file_name in file_names],
+                  [apis] * len(file_names),
+                  [declares_dependencies] * len(file_names))
+
+    return dict(zip(file_names, results))
+
+
+def _shared_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+        return _executor
+
+
+def format_diagnostics(diagnostics: List[str]) -> str:
+    return "The static checks found these errors:\n" + "\n".join(f"* {d}" for d in diagnostics)
+
+
+class _SourceChecker:
+    def __init__(self,
+                 file_name: str,
+                 workspace_apis: Dict[str, Optional[List[str]]],
+                 declares_dependencies: bool):
+        self.file_name = file_name
+        self.workspace_apis = workspace_apis
+        self.declares_dependencies = declares_dependencies
+        self.package = _module_name(file_name).split(".")[:-1]
+
+        self.diagnostics: List[str] = []
+        # local name -> the workspace module it refers to, for `import module`
+        self.module_aliases: Dict[str, str] = dict()
+        # imports that are allowed to fail
+        self.optional_imports: Set[ast.AST] = set()
+
+    def check(self, tree: ast.AST) -> None:
+        bound: Set[str] = set()
+        # with a star import, or names added through `globals()`, any name could be defined
+        dynamic_names = False
+
+        self.optional_imports = _optional_imports(tree)
+
+        for node in ast.walk(tree):
+            bound.update(_bound_names(node))
+
+            if isinstance(node, ast.Import):
+                self._check_import(node)
+            elif isinstance(node, ast.ImportFrom):
+                dynamic_names |= any(alias.name == "*" for alias in node.names)
+                self._check_import_from(node)
+            elif isinstance(node, ast.Name) and node.id == "globals":
+                dynamic_names = True
+
+        self._check_module_attributes(tree)
+
+        if not dynamic_names:
+            self._check_undefined_names(tree, bound)
+
+    def _check_import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if not self._module_exists(alias.name):
+                if node not in self.optional_imports:
+                    self._report(node, f"module `{alias.name}` is not in the workspace, and not installed")
+                continue
+
+            if alias.name in self.workspace_apis:
+                local_name = alias.asname or alias.name.split(".")[0]
+                self.module_aliases[local_name] = alias.name if alias.asname else alias.name.split(".")[0]
+
+    def _check_import_from(self, node: ast.ImportFrom) -> None:
+        module = self._absolute_module(node)
+
+        if not self._module_exists(module):
+            if node not in self.optional_imports:
+                self._report(node, f"module `{module}` is not in the workspace, and not installed")
+            return
+
+        if module not in self.workspace_apis:
+            return
+
+        for alias in node.names:
+            if alias.name == "*" or f"{module}.{alias.name}" in self.workspace_apis:
+                continue
+
+            self._check_module_name(node, module, alias.name)
+
+    def _check_module_attributes(self, tree: ast.AST) -> None:
+        """Checks the `module.name` uses, for the imported workspace modules."""
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Attribute) or not isinstance(node.ctx, ast.Load):
+                continue
+
+            chain = _attribute_chain(node)
+            if not chain or chain[0] not in self.module_aliases:
+                continue
+
+            # `import pkg.mod` binds `pkg`, so `pkg.mod.name` walks down to the module first
+            module = self.module_aliases[chain[0]]
+            for part in chain[1:]:
+                if f"{module}.{part}" in self.workspace_apis:
+                    module = f"{module}.{part}"
+                    continue
+
+                if module in self.workspace_apis:
+                    self._check_module_name(node, module, part)
+                break
+
+    def _check_module_name(self, node: ast.AST, module: str, name: str) -> None:
+        api = self.workspace_apis.get(module)
+
+        if api is UNKNOWN_API or name in api:
+            return
+
+        listed = ", ".join(api[:MAX_LISTED_NAMES]) + (", ..." if len(api) > MAX_LISTED_NAMES else "")
+        self._report(node, f"`{name}` doesn't exist in module `{module}`, it only defines: {listed or 'nothing'}")
+
+    def _check_undefined_names(self, tree: ast.AST, bound: Set[str]) -> None:
+        # flow insensitive on purpose: a name bound anywhere counts as defined, so there are no false alarms
+        reported: Set[str] = set()
+
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Name) or not isinstance(node.ctx, ast.Load):
+                continue
+
+            if node.id in bound or node.id in BUILTIN_NAMES or node.id in reported:
+                continue
+
+            reported.add(node.id)
+            self._report(node, f"undefined name `{node.id}`")
+
+    def _absolute_module(self, node: ast.ImportFrom) -> str:
+        if not node.level:
+            return node.module or ""
+
+        package = self.package[:len(self.package) - node.level + 1] if node.level > 1 else self.package
+        return ".".join(package + ([node.module] if node.module else []))
+
+    def _module_exists(self, module: str) -> bool:
+        if not module:
+            return True
+
+        if module in self.workspace_apis or any(m.startswith(module + ".") for m in self.workspace_apis):
+            return True
+
+        top_level = module.split(".")[0]
+
+        if top_level in self.workspace_apis:
+            # the workspace module exists, but not the submodule
+            return False
+
+        if top_level == "__main__" or top_level in sys.stdlib_module_names or top_level in sys.builtin_module_names:
+            return True
+
+        try:
+            if importlib.util.find_spec(top_level) is not None:
+                return True
+        except ValueError:
+            # already imported, without a spec
+            return True
+        except ImportError:
+            pass
+
+        return self.declares_dependencies
+
+    def _report(self, node: ast.AST, message: str) -> None:
+        self.diagnostics.append(f"{self.file_name}:{getattr(node, 'lineno', 1)}: {message}")
+
+
+def _optional_imports(tree: ast.AST) -> Set[ast.AST]:
+    """The imports inside a `try:` that handles the import errors."""
+    optional: Set[ast.AST] = set()
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Try) or not any(_handles_import_error(h) for h in node.handlers):
+            continue
+
+        for statement in node.body:
+            optional.update(n for n in ast.walk(statement) if isinstance(n, (ast.Import, ast.ImportFrom)))
+
+    return optional
+
+
+def _handles_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+
+    return any(isinstance(t, ast.Name) and t.id in IMPORT_ERRORS for t in types)
+
+
+def _top_level_nodes(node: ast.AST) -> List[ast.AST]:
+    """The statement, and the statements nested in its `if`/`try` blocks, but not in functions or classes."""
+    nodes = [node]
+
+    if isinstance(node, (ast.If, ast.Try, ast.With, ast.For, ast.While)):
+        for field in ("body", "orelse", "finalbody"):
+            for child in getattr(node, field, []):
+                nodes.extend(_top_level_nodes(child))
+
+        for handler in getattr(node, "handlers", []):
+            for child in handler.body:
+                nodes.extend(_top_level_nodes(child))
+
+    if isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign, ast.For, ast.With)):
+        nodes.extend(n for n in ast.walk(node) if isinstance(n, ast.Name))
+
+    return nodes
+
+
+def _bound_names(node: ast.AST) -> List[str]:
+    if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+        return [node.id]
+
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+
+    if isinstance(node, ast.arg):
+        return [node.arg]
+
+    if isinstance(node, ast.Import):
+        return [alias.asname or alias.name.split(".")[0] for alias in node.names]
+
+    if isinstance(node, ast.ImportFrom):
+        return [alias.asname or alias.name for alias in node.names if alias.name != "*"]
+
+    if isinstance(node, (ast.Global, ast.Nonlocal)):
+        return list(node.names)
+
+    if isinstance(node, (ast.ExceptHandler, ast.MatchAs, ast.MatchStar)) and node.name:
+        return [node.name]
+
+    if isinstance(node, ast.MatchMapping) and node.rest:
+        return [node.rest]
+
+    return []
+
+
+def _attribute_chain(node: ast.Attribute) -> Optional[List[str]]:
+    """`a.b.c` as ["a", "b", "c"], or None if it doesn't start with a name."""
+    parts: List[str] = []
+    current: ast.AST = node
+
+    while isinstance(current, ast.Attribute):
+        parts.append(current.attr)
+        current = current.value
+
+    if not isinstance(current, ast.Name):
+        return None
+
+    parts.append(current.id)
+    return list(reversed(parts))
+
+
+def _module_name(file_name: str) -> str:
+    parts = os.path.splitext(file_name)[0].replace("\\", "/").split("/")
+    if parts[-1] == "__init__":
+        # the package itself, so its relative imports start from it
+        parts[-1] = ""
+
+    return ".".join(parts)
+
+
+def _read(full_file_name: str) -> str:
+    try:
+        with open(full_file_name, "rt", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
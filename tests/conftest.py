@@ -0,0 +1,23 @@
+"""
+The fixtures shared by the tests.
+"""
+import pytest
+
+from geai.ge_openai import ge_agent
+from geai.tools import workspace
+from geai.tools.workspace import WorkspaceContext
+
+
+@pytest.fixture
+def tmp_workspace(tmp_path, monkeypatch) -> WorkspaceContext:
+    """The default workspace of the test, in its tmp_path."""
+    context = WorkspaceContext(folder=str(tmp_path))
+    monkeypatch.setattr(workspace, "default_context", context)
+
+    return context
+
+
+@pytest.fixture
+def fake_model_client(monkeypatch) -> None:
+    """Restores the model client after the test, so it can point it at a fake server with `configure_client`."""
+    monkeypatch.setattr(ge_agent, "local_client", ge_agent.local_client)
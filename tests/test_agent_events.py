@@ -0,0 +1,136 @@
+"""
+Tests for the typed agent events and the event sinks.
+"""
+import io
+import json
+import sys
+
+from pydantic import TypeAdapter
+
+from agents import RawResponsesStreamEvent
+from openai.types.responses import ResponseTextDeltaEvent, ResponseOutputItemAddedEvent, ResponseOutputItemDoneEvent, \
+    ResponseFunctionToolCall
+
+from geai.event_sinks import JsonlEventSink, FanOutEventSink, EventSink, events_output
+from geai.ge_openai.agent_events import StreamEventTranslator, TextDeltaEvent, StatusEvent, ToolCallStartEvent, \
+    AgentEvent, ChangedFile, TurnChangesEvent
+
+
+def raw(data) -> RawResponsesStreamEvent:
+    return RawResponsesStreamEvent(data=data)
+
+
+def tool_call(name: str, arguments: str) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall.model_construct(call_id="call_1", name=name, arguments=arguments,
+                                                    type="function_call")
+
+
+class RecordingSink(EventSink):
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+
+class TestStreamEventTranslator:
+    """Test suite for StreamEventTranslator."""
+
+    def test_text_delta(self):
+        """Text deltas are translated, and tagged with the agent title."""
+        translator = StreamEventTranslator("Coder")
+        event = translator.translate(raw(ResponseTextDeltaEvent.model_construct(delta="hello")))
+
+        assert isinstance(event, TextDeltaEvent)
+        assert event.delta == "hello"
+        assert event.agent == "Coder"
+
+    def test_empty_text_delta_is_dropped(self):
+        """Empty deltas don't produce events."""
+        translator = StreamEventTranslator()
+
+        assert translator.translate(raw(ResponseTextDeltaEvent.model_construct(delta=""))) is None
+
+    def test_tool_call(self):
+        """Tool call items produce a status event when added, and a start event when done."""
+        translator = StreamEventTranslator()
+
+        added = translator.translate(raw(ResponseOutputItemAddedEvent.model_construct(
+            item=tool_call("read_file", ""))))
+        done = translator.translate(raw(ResponseOutputItemDoneEvent.model_construct(
+            item=tool_call("read_file", '{"file_name": "a.py"}'))))
+
+        assert isinstance(added, StatusEvent)
+        assert added.status == "tool"
+        assert added.detail == "read_file"
+        assert isinstance(done, ToolCallStartEvent)
+        assert done.name == "read_file"
+        assert done.arguments == '{"file_name": "a.py"}'
+
+    def test_unknown_event_is_ignored(self):
+        """Events missing from the dispatch tables are ignored."""
+        assert StreamEventTranslator().translate(object()) is None
+
+
+class TestJsonlEventSink:
+    """Test suite for JsonlEventSink."""
+
+    def test_writes_one_line_per_event(self):
+        """Every event is written as a JSON line, in order."""
+        output = io.StringIO()
+        sink = JsonlEventSink(output)
+
+        for i in range(100):
+            sink.emit(TextDeltaEvent(delta=str(i)))
+        sink.close()
+
+        lines = output.getvalue().splitlines()
+        assert len(lines) == 100
+        assert [json.loads(line)["delta"] for line in lines] == [str(i) for i in range(100)]
+        assert json.loads(lines[0])["type"] == "text_delta"
+
+    def test_writes_to_file(self, tmp_path):
+        """A string target is opened as a file."""
+        target = tmp_path / "events.jsonl"
+        sink = JsonlEventSink(str(target))
+        sink.emit(StatusEvent(status="thinking"))
+        sink.close()
+
+        assert json.loads(target.read_text())["status"] == "thinking"
+
+    def test_stdout_stays_json_lines(self, monkeypatch):
+        """With the events on stdout, the prints for the user go to stderr."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        monkeypatch.setattr(sys, "stdout", stdout)
+        monkeypatch.setattr(sys, "stderr", stderr)
+
+        with events_output("-") as target:
+            sink = JsonlEventSink(target)
+            print("👋 Goodbye!")
+            sink.emit(StatusEvent(status="thinking"))
+            sink.close()
+
+        assert [json.loads(line)["status"] for line in stdout.getvalue().splitlines()] == ["thinking"]
+        assert stderr.getvalue() == "👋 Goodbye!\n"
+
+    def test_fan_out(self):
+        """The fan out sink forwards the events to all the sinks."""
+        first, second = RecordingSink(), RecordingSink()
+        FanOutEventSink([first, second]).emit(StatusEvent(status=""))
+
+        assert len(first.events) == 1
+        assert len(second.events) == 1
+
+    def test_turn_changes_round_trip(self):
+        """The turn changes are their own event type, so the daemon clients don't take them for model text."""
+        event = TurnChangesEvent(files=[ChangedFile(file_name="a.py", change="M", added_lines=1, removed_lines=2)],
+                                 diff_file=".geai/diffs/turn-1.diff")
+        output = io.StringIO()
+        sink = JsonlEventSink(output)
+        sink.emit(event)
+        sink.close()
+
+        parsed = TypeAdapter(AgentEvent).validate_json(output.getvalue())
+
+        assert isinstance(parsed, TurnChangesEvent)
+        assert parsed.files[0].removed_lines == 2
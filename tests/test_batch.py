@@ -0,0 +1,101 @@
+"""
+Tests for the batch mode, and the on-disk caches its workers share.
+"""
+import asyncio
+import io
+
+from openai import AsyncOpenAI
+
+import batch
+from benchmark import PipelineResponder
+from geai.disk_cache import DiskCache
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+from geai.ge_openai.response_cache import ResponseCacheTransport, response_cache_http_client
+
+
+async def ask(openai_client: AsyncOpenAI, question: str, whole: bool = True) -> str:
+    stream = await openai_client.chat.completions.create(model="fake",
+                                                         messages=[{"role": "user", "content": question}],
+                                                         stream=True)
+    answer = ""
+    async for chunk in stream:
+        answer += chunk.choices[0].delta.content or "" if chunk.choices else ""
+        if not whole:
+            break
+
+    await stream.close()
+    return answer
+
+
+class TestDiskCache:
+    def test_put_and_get(self, tmp_path):
+        cache = DiskCache(str(tmp_path), "api")
+
+        assert cache.get("list.h\0int size();") is None
+        cache.put("list.h\0int size();", "int size();")
+
+        # another process, with its own instance
+        assert DiskCache(str(tmp_path), "api").get("list.h\0int size();") == "int size();"
+        assert not [p for p in tmp_path.rglob(".tmp-*")]
+
+
+class TestResponseCache:
+    def test_identical_requests_are_served_from_the_cache(self, tmp_path):
+        """Only the first of the identical requests reaches the server."""
+        responder = lambda request: ScriptedReply(text=f"answer to {request['messages'][0]['content']}")
+
+        with FakeModelServer(responder) as server:
+            async def run():
+                answers = []
+                for _ in range(2):
+                    # a new client every time, like a new worker
+                    transport = ResponseCacheTransport(DiskCache(str(tmp_path), "responses"))
+                    openai_client = AsyncOpenAI(base_url=server.base_url, api_key="EMPTY", max_retries=0,
+                                                http_client=response_cache_http_client(transport))
+                    answers.append(await ask(openai_client, "one"))
+                return answers
+
+            assert asyncio.run(run()) == ["answer to one", "answer to one"]
+
+        assert server.request_count == 1
+
+    def test_stopped_responses_are_not_cached(self, tmp_path):
+        """A response that wasn't read until its end is never served from the cache."""
+        with FakeModelServer(lambda request: ScriptedReply(text="a long answer " * 50)) as server:
+            transport = ResponseCacheTransport(DiskCache(str(tmp_path), "responses"))
+            openai_client = AsyncOpenAI(base_url=server.base_url, api_key="EMPTY", max_retries=0,
+                                        http_client=response_cache_http_client(transport))
+
+            async def run():
+                await ask(openai_client, "one", whole=False)
+                return await ask(openai_client, "one")
+
+            assert asyncio.run(run()) == "a long answer " * 50
+
+
+class TestBatch:
+    def test_specs_run_in_their_own_workspace(self, tmp_path, monkeypatch):
+        """Every spec gets its own workspace and log, and the board reports them all."""
+        with open("spec_tests/list_c.txt", "rt", encoding="utf-8") as f:
+            responder = PipelineResponder(f.read(), invalid_percent=0)
+
+        specs_folder = tmp_path / "specs"
+        specs_folder.mkdir()
+        for name in ["one", "two"]:
+            (specs_folder / f"{name}.txt").write_text("a C linked list library", encoding="utf-8")
+
+        with FakeModelServer(responder, latency=0, token_rate=0, prompt_token_rate=0) as server:
+            # the workers are new processes, they read the server from the environment
+            monkeypatch.setenv("GEAI_BASE_URL", server.base_url)
+
+            specs = batch.find_specs(str(specs_folder), str(tmp_path / "out"), [])
+            board_output = io.StringIO()
+            batch.run_batch(specs, 2, str(tmp_path / "cache"), False, batch.BatchBoard(specs, board_output))
+
+        assert [spec.status for spec in specs] == ["done", "done"]
+        for spec in specs:
+            assert (tmp_path / "out" / spec.name / "SPEC.md").exists()
+            assert "designing a spec" in (tmp_path / "out" / f"{spec.name}.log").read_text(encoding="utf-8")
+
+        assert "2 specs in" in board_output.getvalue()
+        assert "2 done, 0 failed" in board_output.getvalue()
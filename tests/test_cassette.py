@@ -0,0 +1,84 @@
+"""
+Tests for the record/replay cassettes of the model traffic.
+"""
+import asyncio
+
+import pytest
+from openai import AsyncOpenAI
+
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+from geai.ge_openai.cassette import CassetteTransport, cassette_http_client
+
+
+def client(base_url: str, transport: CassetteTransport) -> AsyncOpenAI:
+    return AsyncOpenAI(base_url=base_url, api_key="EMPTY", http_client=cassette_http_client(transport),
+                       max_retries=0)
+
+
+async def ask(openai_client: AsyncOpenAI, question: str) -> str:
+    stream = await openai_client.chat.completions.create(model="fake",
+                                                         messages=[{"role": "user", "content": question}],
+                                                         stream=True)
+    return "".join([chunk.choices[0].delta.content or "" async for chunk in stream if chunk.choices])
+
+
+def record(file_name: str, questions) -> list:
+    responder = lambda request: ScriptedReply(text=f"answer to {request['messages'][0]['content']}")
+
+    with FakeModelServer(responder) as server:
+        transport = CassetteTransport(file_name, "record")
+        openai_client = client(server.base_url, transport)
+
+        async def run():
+            return [await ask(openai_client, question) for question in questions]
+
+        answers = asyncio.run(run())
+
+    assert transport.recorded == len(questions)
+    return answers
+
+
+class TestCassetteTransport:
+    """Test suite for CassetteTransport."""
+
+    def test_record_and_replay(self, tmp_path):
+        """A replay serves the recorded answers without any server."""
+        cassette = str(tmp_path / "cassette.jsonl")
+        recorded = record(cassette, ["one", "two"])
+
+        transport = CassetteTransport(cassette, "replay")
+        openai_client = client("http://127.0.0.1:1/v1/", transport)
+
+        async def run():
+            # out of order is fine, requests are matched by their content
+            return [await ask(openai_client, "two"), await ask(openai_client, "one")]
+
+        assert asyncio.run(run()) == [recorded[1], recorded[0]]
+        assert transport.divergences == []
+
+    def test_divergence_is_flagged(self, tmp_path):
+        """A request that wasn't recorded is answered in order, and flagged."""
+        cassette = str(tmp_path / "cassette.jsonl")
+        recorded = record(cassette, ["one"])
+
+        transport = CassetteTransport(cassette, "replay")
+        answer = asyncio.run(ask(client("http://127.0.0.1:1/v1/", transport), "something else"))
+
+        assert answer == recorded[0]
+        assert len(transport.divergences) == 1
+        assert "message #1 (user) is different" in transport.divergences[0]
+
+    def test_strict_divergence_fails(self, tmp_path):
+        """In strict mode, an unknown request fails."""
+        cassette = str(tmp_path / "cassette.jsonl")
+        record(cassette, ["one"])
+
+        transport = CassetteTransport(cassette, "replay", strict=True)
+
+        with pytest.raises(Exception):
+            asyncio.run(ask(client("http://127.0.0.1:1/v1/", transport), "something else"))
+
+    def test_unknown_mode(self, tmp_path):
+        """Only record and replay modes exist."""
+        with pytest.raises(Exception):
+            CassetteTransport(str(tmp_path / "cassette.jsonl"), "rewind")
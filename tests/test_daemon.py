@@ -0,0 +1,182 @@
+"""
+Tests for the geai daemon, and its thin client.
+"""
+import asyncio
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+from geai.daemon import Daemon, SessionOutput
+from geai.daemon_client import DaemonError, connect
+from geai.event_sinks import EventSink
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+from geai.ge_openai import ge_agent
+from geai.tools import workspace
+
+
+class CollectingEventSink(EventSink):
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    """A daemon serving on its own event loop, in a background thread."""
+    # the daemon replaces the stdout while it runs, restore the pytest capture after it
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    running_daemon = Daemon(str(tmp_path / "daemon.sock"))
+    asyncio.run_coroutine_threadsafe(running_daemon.start(), loop).result(5)
+
+    yield running_daemon
+
+    asyncio.run_coroutine_threadsafe(running_daemon.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+class TestDaemon:
+    def test_no_daemon(self, tmp_path):
+        """Without a daemon listening, the CLIs run locally."""
+        assert connect(str(tmp_path / "missing.sock")) is None
+
+    def test_socket_is_private(self, tmp_path, monkeypatch):
+        """The folder and the socket are only for the user, from the moment they exist."""
+        monkeypatch.setattr(sys, "stdout", sys.stdout)
+        socket_path = tmp_path / "geai" / "daemon.sock"
+        umask = os.umask(0o022)
+
+        async def start_and_close():
+            running_daemon = Daemon(str(socket_path))
+            await running_daemon.start()
+            modes = (stat.S_IMODE(os.stat(socket_path.parent).st_mode), stat.S_IMODE(os.stat(socket_path).st_mode))
+            await running_daemon.close()
+            return modes
+
+        try:
+            assert asyncio.run(start_and_close()) == (0o700, 0o600)
+            # the umask is only changed for the bind
+            assert os.umask(0o022) == 0o022
+        finally:
+            os.umask(umask)
+
+    def test_output_goes_to_its_session(self, daemon, monkeypatch):
+        """What a session prints is streamed to its own client."""
+        # pytest swaps the stdout between the test phases, so route it again
+        monkeypatch.setattr(sys, "stdout", SessionOutput(sys.stdout))
+
+        async def greet(session, request):
+            await asyncio.sleep(0.05)
+            print(f"hello {request['name']}")
+
+        daemon.commands["greet"] = greet
+
+        first, second = connect(daemon.socket_path), connect(daemon.socket_path)
+        first.send({"command": "greet", "name": "first"})
+        second.send({"command": "greet", "name": "second"})
+
+        for client, name in [(first, "first"), (second, "second")]:
+            messages = list(client.messages())
+            client.close()
+
+            assert "".join(m["text"] for m in messages if m["type"] == "output") == f"hello {name}\n"
+            assert messages[-1] == {"type": "done"}
+
+    def test_sessions_have_their_own_workspace(self, daemon, tmp_path, monkeypatch):
+        """Concurrent sessions in different workspaces don't wait for, or see, each other."""
+        monkeypatch.setattr(sys, "stdout", SessionOutput(sys.stdout))
+
+        async def where(session, request):
+            await asyncio.sleep(0.1)
+            print(workspace.current().folder)
+
+        daemon.commands["where"] = where
+        folders = [str(tmp_path / "w1"), str(tmp_path / "w2")]
+
+        clients = [connect(daemon.socket_path) for _ in folders]
+        for client, folder in zip(clients, folders):
+            client.send({"command": "where", "workspace": folder})
+
+        for client, folder in zip(clients, folders):
+            assert [m["text"] for m in client.messages() if m["type"] == "output"][0] == folder
+            client.close()
+
+    def test_unknown_command(self, daemon):
+        client = connect(daemon.socket_path)
+        client.send({"command": "deploy"})
+
+        assert list(client.messages()) == [{"type": "error", "message": "unknown command: deploy"}]
+        client.close()
+
+    def test_errors_go_to_the_client(self, daemon):
+        """A failed request is reported to the CLI, that raises it."""
+        async def fail(session, request):
+            raise ValueError("no SPEC.md")
+
+        daemon.commands["spec"] = fail
+
+        with pytest.raises(DaemonError, match="ValueError: no SPEC.md"):
+            connect(daemon.socket_path).run_spec("a spec", "workspace")
+
+    def test_chat_session_streams_events(self, daemon, tmp_path, fake_model_client):
+        """Every turn of a session streams back the agent events."""
+        with FakeModelServer(lambda request: ScriptedReply(text="Hi there, how can I help?")) as server:
+            ge_agent.configure_client(server.base_url)
+            event_sink = CollectingEventSink()
+
+            connect(daemon.socket_path).run_session("chat", str(tmp_path), ["hello", "hello again"], event_sink)
+
+        text = "".join(event.delta for event in event_sink.events if event.type == "text_delta")
+        assert text == "Hi there, how can I help?" * 2
+        assert server.request_count == 2
+
+    def test_interrupted_turn(self, daemon, tmp_path, fake_model_client):
+        """An interrupt from the client ends the running turn, the session goes on."""
+        replies = iter([ScriptedReply(text="a long answer " * 100), ScriptedReply(text="short")])
+
+        with FakeModelServer(lambda request: next(replies), token_rate=50) as server:
+            ge_agent.configure_client(server.base_url)
+
+            client = connect(daemon.socket_path)
+            client.send({"command": "chat", "workspace": str(tmp_path)})
+            client.send({"type": "input", "text": "hello"})
+
+            message_types = []
+            for message in client.messages():
+                message_types.append(message["type"])
+
+                if message["type"] == "event" and "interrupt" not in message_types:
+                    message_types.append("interrupt")
+                    client.send({"type": "interrupt"})
+                elif message["type"] == "turn_done":
+                    break
+
+            # the interrupt sent during the turn gets its own answer
+            assert next(client.messages())["type"] == "interrupt_done"
+
+            # an interrupt that arrives after the turn ended doesn't end the next turn early
+            client.send({"type": "interrupt"})
+            assert next(client.messages())["type"] == "interrupt_done"
+
+            client.send({"type": "input", "text": "hello again"})
+            next_turn = []
+            for message in client.messages():
+                next_turn.append(message["type"])
+                if message["type"] == "turn_done":
+                    break
+            client.close()
+
+        assert "interrupt" in message_types
+        assert message_types[-1] == "turn_done"
+        assert "event" in next_turn
@@ -0,0 +1,89 @@
+"""
+Tests for the targeted file edits of the fixers.
+"""
+import difflib
+
+import pytest
+
+from geai.tools.edit_file_tool import (FileEdit, EditError, apply_edits, apply_unified_diff, edit_file_impl,
+                                       apply_diff_impl)
+
+SOURCE = "def add(a, b):\n    return a - b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+
+class TestApplyEdits:
+    """Test suite for apply_edits."""
+
+    def test_edits_in_order(self):
+        result = apply_edits(SOURCE, [
+            FileEdit(search="def add(a, b):\n    return a - b", replace="def add(a, b):\n    return a + b"),
+            FileEdit(search="def sub", replace="def subtract"),
+        ])
+
+        assert result == "def add(a, b):\n    return a + b\n\n\ndef subtract(a, b):\n    return a - b\n"
+
+    def test_missing_search_text(self):
+        with pytest.raises(EditError, match="not found"):
+            apply_edits(SOURCE, [FileEdit(search="def mul", replace="")])
+
+    def test_ambiguous_search_text(self):
+        """The search text must point to a single place."""
+        with pytest.raises(EditError, match="found 2 times"):
+            apply_edits(SOURCE, [FileEdit(search="return a - b", replace="return a + b")])
+
+
+class TestApplyUnifiedDiff:
+    """Test suite for apply_unified_diff."""
+
+    def test_hunk(self):
+        diff = "--- a/m.py\n+++ b/m.py\n@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n"
+
+        assert apply_unified_diff(SOURCE, diff).startswith("def add(a, b):\n    return a + b\n\n\ndef sub")
+
+    def test_wrong_line_numbers(self):
+        """The hunks are found by their content, the line numbers are only a hint."""
+        diff = "@@ -40,2 +40,3 @@\n def sub(a, b):\n+    # subtracts\n     return a - b\n"
+
+        assert apply_unified_diff(SOURCE, diff).endswith("def sub(a, b):\n    # subtracts\n    return a - b\n")
+
+    def test_zero_context_insertions(self):
+        """A hunk without old lines (`diff -U0`) inserts after the line of its header."""
+        assert apply_unified_diff("a\nb\nc\n", "@@ -2,0 +3 @@\n+X\n") == "a\nb\nX\nc\n"
+        assert apply_unified_diff("a\nb\nc\n", "@@ -0,0 +1 @@\n+X\n") == "X\na\nb\nc\n"
+
+        old, new = ["a\n", "b\n", "c\n"], ["a\n", "b\n", "X\n", "Y\n", "c\n", "Z\n"]
+        diff = "".join(difflib.unified_diff(old, new, n=0))
+
+        assert apply_unified_diff("".join(old), diff) == "".join(new)
+
+    def test_hunk_not_found(self):
+        with pytest.raises(EditError, match="hunk #1"):
+            apply_unified_diff(SOURCE, "@@ -1,1 +1,1 @@\n-def mul(a, b):\n+def div(a, b):\n")
+
+    def test_no_hunks(self):
+        with pytest.raises(EditError, match="no hunks"):
+            apply_unified_diff(SOURCE, "return a + b")
+
+
+class TestEditFileImpl:
+    """Test suite for edit_file_impl and apply_diff_impl."""
+
+    def test_edit_is_written(self, tmp_path, tmp_workspace):
+        (tmp_path / "m.py").write_text(SOURCE, encoding="utf-8")
+
+        result = edit_file_impl("m.py", [FileEdit(search="def sub", replace="def subtract")])
+
+        assert "WRITTEN" in result
+        assert "def subtract" in (tmp_path / "m.py").read_text(encoding="utf-8")
+
+    def test_invalid_python_is_not_written(self, tmp_path, tmp_workspace):
+        """Edits that break the syntax are rejected, and the file stays as it was."""
+        (tmp_path / "m.py").write_text(SOURCE, encoding="utf-8")
+
+        result = apply_diff_impl("m.py", "@@ -1,1 +1,1 @@\n-def add(a, b):\n+def add(a, b:\n")
+
+        assert "doesn't compile" in result
+        assert (tmp_path / "m.py").read_text(encoding="utf-8") == SOURCE
+
+    def test_missing_file(self, tmp_workspace):
+        assert edit_file_impl("nope.py", [FileEdit(search="a", replace="b")]).startswith("unable to edit")
@@ -0,0 +1,57 @@
+"""
+Tests for the fake OpenAI compatible model server.
+"""
+import json
+
+from openai import OpenAI
+
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+
+
+def tool_responder(request) -> ScriptedReply:
+    return ScriptedReply(tool_calls=[("write_file", json.dumps({"file_name": "a.py", "content": "x = 1\n" * 20}))])
+
+
+class TestFakeModelServer:
+    """Test suite for FakeModelServer."""
+
+    def test_completion(self):
+        """A non streamed request gets the scripted text and the usage."""
+        with FakeModelServer() as server:
+            client = OpenAI(base_url=server.base_url, api_key="EMPTY")
+            response = client.chat.completions.create(model="fake", messages=[{"role": "user", "content": "hi"}])
+
+        assert response.choices[0].message.content == "OK"
+        assert response.usage.completion_tokens > 0
+        assert server.request_count == 1
+
+    def test_streamed_text(self):
+        """A streamed request gets the text in pieces, and the usage at the end when asked for."""
+        reply = "a fairly long answer, that gets streamed in multiple pieces"
+
+        with FakeModelServer(lambda request: ScriptedReply(text=reply), token_rate=10000) as server:
+            client = OpenAI(base_url=server.base_url, api_key="EMPTY")
+            chunks = list(client.chat.completions.create(model="fake",
+                                                         messages=[{"role": "user", "content": "hi"}],
+                                                         stream=True,
+                                                         stream_options={"include_usage": True}))
+
+        text = "".join(chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices)
+        assert text == reply
+        assert len(chunks) > 3
+        assert chunks[-1].usage.prompt_tokens > 0
+
+    def test_streamed_tool_call(self):
+        """Tool calls are streamed as argument pieces, under the same call id."""
+        with FakeModelServer(tool_responder) as server:
+            client = OpenAI(base_url=server.base_url, api_key="EMPTY")
+            chunks = list(client.chat.completions.create(model="fake",
+                                                         messages=[{"role": "user", "content": "hi"}],
+                                                         stream=True))
+
+        calls = [call for chunk in chunks if chunk.choices for call in chunk.choices[0].delta.tool_calls or []]
+        arguments = json.loads("".join(call.function.arguments or "" for call in calls))
+
+        assert calls[0].function.name == "write_file"
+        assert arguments["file_name"] == "a.py"
+        assert chunks[-1].choices[0].finish_reason == "tool_calls"
@@ -0,0 +1,92 @@
+"""
+Tests for the file locks, that make the parallel tool calls safe.
+"""
+import concurrent.futures
+import contextvars
+import threading
+import time
+
+from geai.tools.edit_file_tool import FileEdit, edit_file_impl
+from geai.tools.file_locks import FileLocks, ReadWriteLock
+from geai.tools.workspace_tools import patch_file
+
+
+class TestReadWriteLock:
+    """Test suite for ReadWriteLock."""
+
+    def test_readers_share_writers_exclude(self):
+        lock = ReadWriteLock()
+        lock.acquire_read()
+
+        other_read = threading.Thread(target=lambda: (lock.acquire_read(), lock.release_read()))
+        other_read.start()
+        other_read.join(1)
+        assert not other_read.is_alive()
+
+        written = threading.Event()
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), written.set(), lock.release_write()))
+        writer.start()
+        assert not written.wait(0.1)
+
+        lock.release_read()
+        assert written.wait(1)
+
+    def test_reentrant_for_the_writer(self):
+        """A writer can read, and write again, e.g. an edit that writes through `write_file`."""
+        lock = ReadWriteLock()
+
+        lock.acquire_write()
+        lock.acquire_read()
+        lock.acquire_write()
+        lock.release_write()
+        lock.release_read()
+        lock.release_write()
+
+        assert lock._writer is None and not lock._readers
+
+
+class TestFileLocks:
+    """Test suite for FileLocks."""
+
+    def test_many_files_in_any_order_dont_deadlock(self, tmp_path):
+        locks = FileLocks()
+        a, b = str(tmp_path / "a.c"), str(tmp_path / "b.c")
+
+        def edit(paths):
+            for _ in range(200):
+                with locks.write(*paths):
+                    pass
+
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            done, pending = concurrent.futures.wait([pool.submit(edit, [a, b]), pool.submit(edit, [b, a])], timeout=5)
+
+        assert not pending
+        # the locks are gone once nobody uses them
+        assert not locks._locks
+
+    def test_parallel_patches_of_the_same_file(self, tmp_path, monkeypatch, tmp_workspace):
+        """No patch is lost, when the tool calls run in parallel on the same file."""
+        (tmp_path / "list.c").write_text("".join(f"int f{i}();\n" for i in range(20)), encoding="utf-8")
+
+        # slow writes, so the read-modify-writes would overlap without the locks
+        original_open = open
+
+        def slow_open(*args, **kwargs):
+            time.sleep(0.001)
+            return original_open(*args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", slow_open)
+
+        def patch(i):
+            if i % 2:
+                return patch_file.func("list.c", f"int f{i}();", f"long f{i}();")
+            return edit_file_impl("list.c", [FileEdit(search=f"int f{i}();", replace=f"long f{i}();")])
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            # the tools run with the context of their run, like `asyncio.to_thread` does
+            results = list(pool.map(lambda i: contextvars.copy_context().run(patch, i), range(20)))
+
+        monkeypatch.setattr("builtins.open", original_open)
+
+        assert all("successfully" in result for result in results), results
+        assert (tmp_path / "list.c").read_text(encoding="utf-8") == "".join(f"long f{i}();\n" for i in range(20))
@@ -0,0 +1,54 @@
+"""
+Tests for the lazily created function tools, and the light imports of the tools.
+"""
+import os
+import subprocess
+import sys
+
+from agents import FunctionTool
+
+from geai.tools.lazy_tool import LazyFunctionTool, function_tool, resolve_tools
+from geai.tools.time_tools import sleep
+
+
+@function_tool
+def add_numbers(a: int, b: int) -> int:
+    """
+    Adds two numbers.
+
+    :param a: the first number
+    :param b: the second number
+    """
+    return a + b
+
+
+class TestLazyTool:
+    def test_tool_is_created_on_first_use(self):
+        """The SDK tool is created once, when it's first needed, and proxies its attributes."""
+        assert isinstance(add_numbers, LazyFunctionTool)
+
+        assert add_numbers.name == "add_numbers"
+        assert isinstance(add_numbers.tool(), FunctionTool)
+        assert add_numbers.tool() is add_numbers.tool()
+        assert "a" in add_numbers.params_json_schema["properties"]
+
+    def test_resolve_tools(self):
+        """The lazy tools are replaced by the SDK tools, anything else is kept as it is."""
+        other = object()
+
+        tools = resolve_tools([sleep, other])
+
+        assert isinstance(tools[0], FunctionTool)
+        assert tools[0].name == "sleep"
+        assert tools[1] is other
+
+    def test_tools_import_without_the_sdks(self):
+        """Importing the tools, and the agent wrapper, doesn't import the agents or openai SDKs."""
+        code = ("import sys\n"
+                "import geai.tools.workspace_tools, geai.tools.edit_file_tool, geai.ge_openai.ge_agent\n"
+                "print(sorted(m for m in ('agents', 'openai') if m in sys.modules))\n")
+
+        process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        assert process.stdout.strip() == "[]"
@@ -0,0 +1,103 @@
+"""
+Tests for the memoization of the read-only tools in an agent run.
+"""
+import asyncio
+import os
+
+from geai import chat
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+from geai.ge_openai import ge_agent
+from geai.ge_openai.memory_session import InMemorySession
+from geai.tools import memo
+from geai.tools.find_file_tool import find_file
+from geai.tools.grep_tool import grep
+from geai.tools.read_file_tool import read_file
+from geai.tools.sh_tool import run_sh_command_impl
+from geai.tools.workspace_tools import list_files, write_file_impl
+
+
+def lookups(result: str) -> float:
+    return memo.tool_memo_lookups.value(tool="read_file", result=result)
+
+
+class TestMemoized:
+    def test_repeated_calls_are_served_from_the_memo(self, tmp_path, tmp_workspace):
+        (tmp_path / "list.h").write_text("int size();", encoding="utf-8")
+        hits = lookups("hit")
+
+        with memo.turn():
+            first = read_file.func("list.h")
+            assert read_file.func("list.h") is first
+
+        assert lookups("hit") == hits + 1
+
+    def test_writes_invalidate(self, tmp_path, tmp_workspace):
+        """A write of a tool, or a shell command, makes all the memoized results stale."""
+        (tmp_path / "list.h").write_text("int size();", encoding="utf-8")
+
+        with memo.turn():
+            assert list_files.func(".") == ["./list.h"]
+
+            write_file_impl("list.c", "int size() { return 0; }")
+            assert sorted(list_files.func(".")) == ["./list.c", "./list.h"]
+
+            read_file.func("list.h")
+            run_sh_command_impl("true")
+            stale = lookups("stale")
+            read_file.func("list.h")
+
+        assert lookups("stale") == stale + 1
+
+    def test_external_edits_invalidate(self, tmp_path, tmp_workspace):
+        """An edit outside the tools is seen through the mtime and the size of the file."""
+        header = tmp_path / "list.h"
+        header.write_text("int size();", encoding="utf-8")
+
+        with memo.turn():
+            assert read_file.func("list.h").content == "int size();"
+
+            header.write_text("int size();\nint empty();", encoding="utf-8")
+            assert read_file.func("list.h").content == "int size();\nint empty();"
+
+            os.unlink(header)
+            assert not read_file.func("list.h").success
+
+    def test_external_edits_of_other_files_invalidate_the_searches(self, tmp_path, tmp_workspace):
+        """The searches stamp the whole tree, not only the files they found."""
+        (tmp_path / "a.c").write_text("int size();", encoding="utf-8")
+        (tmp_path / "b.c").write_text("int empty();", encoding="utf-8")
+        (tmp_path / "src").mkdir()
+
+        with memo.turn():
+            assert [line.file_name for line in grep.func("size").lines] == ["./a.c"]
+            assert [f.path for f in find_file.func("src", "*.c", "f").files] == []
+
+            (tmp_path / "b.c").write_text("int size2();", encoding="utf-8")
+            (tmp_path / "src" / "nested").mkdir()
+            (tmp_path / "src" / "nested" / "list.c").write_text("", encoding="utf-8")
+
+            assert sorted(line.file_name for line in grep.func("size").lines) == ["./a.c", "./b.c"]
+            assert [f.path for f in find_file.func("src", "*.c", "f").files] == [os.path.join("nested", "list.c")]
+
+    def test_not_memoized_outside_a_run(self, tmp_path, tmp_workspace):
+        (tmp_path / "list.h").write_text("int size();", encoding="utf-8")
+
+        assert read_file.func("list.h") is not read_file.func("list.h")
+
+    def test_agent_run(self, tmp_path, capsys, tmp_workspace, fake_model_client):
+        """The tool calls of an agent run share the memo, through the threads the tools run in."""
+        (tmp_path / "list.h").write_text("int size();", encoding="utf-8")
+
+        def responder(request):
+            tool_results = [m for m in request["messages"] if m["role"] == "tool"]
+            if len(tool_results) < 2:
+                return ScriptedReply(tool_calls=[("read_file", '{"file_name": "list.h"}')])
+            return ScriptedReply(text="it has a size function")
+
+        hits = lookups("hit")
+
+        with FakeModelServer(responder) as server:
+            ge_agent.configure_client(server.base_url)
+            asyncio.run(chat.run_agent(InMemorySession("test"), "what's in list.h?"))
+
+        assert lookups("hit") == hits + 1
@@ -0,0 +1,130 @@
+"""
+Tests for the metrics registry and the Prometheus export.
+"""
+import asyncio
+import urllib.request
+
+import pytest
+
+from openai.types.responses import ResponseCompletedEvent, ResponseTextDeltaEvent
+
+from geai.ge_openai.model_telemetry import MeteredModel, model_requests, model_completion_tokens, \
+    model_request_duration, model_time_to_first_token
+from geai.metrics import MetricsRegistry
+
+
+class FakeStreamingModel:
+    async def stream_response(self, *args, **kwargs):
+        yield ResponseTextDeltaEvent.model_construct(delta="hi")
+        usage = type("Usage", (), {"input_tokens": 100, "output_tokens": 20})()
+        yield ResponseCompletedEvent.model_construct(response=type("Response", (), {"usage": usage})())
+
+
+class FailingModel:
+    async def get_response(self, *args, **kwargs):
+        raise ConnectionError("connection reset")
+
+
+class TestMetricsRegistry:
+    """Test suite for MetricsRegistry."""
+
+    def test_counter(self):
+        """Counters are kept per label set."""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests.")
+        counter.inc(agent="a")
+        counter.inc(2, agent="a")
+        counter.inc(agent="b")
+
+        assert counter.value(agent="a") == 3
+        assert counter.value(agent="b") == 1
+        assert registry.counter("requests_total", "Requests.") is counter
+
+    def test_counter_total(self):
+        """The total is over all the label sets, or over the ones with the given labels."""
+        counter = MetricsRegistry().counter("lookups_total", "Lookups.")
+        counter.inc(tool="read_file", result="hit")
+        counter.inc(2, tool="git_grep", result="hit")
+        counter.inc(tool="git_grep", result="miss")
+
+        assert counter.total() == 4
+        assert counter.total(result="hit") == 3
+        assert counter.total(tool="git_grep", result="miss") == 1
+
+    def test_histogram_render(self):
+        """Histograms render cumulative buckets, the sum and the count."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency.", (1, 5))
+        histogram.observe(0.5, model="m")
+        histogram.observe(3, model="m")
+        histogram.observe(10, model="m")
+
+        text = registry.render_prometheus()
+
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{model="m",le="1"} 1' in text
+        assert 'latency_seconds_bucket{model="m",le="5"} 2' in text
+        assert 'latency_seconds_bucket{model="m",le="+Inf"} 3' in text
+        assert 'latency_seconds_sum{model="m"} 13.5' in text
+        assert 'latency_seconds_count{model="m"} 3' in text
+
+    def test_label_escaping(self):
+        """Quotes in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.counter("c", "C.").inc(agent='say "hi"')
+
+        assert 'c{agent="say \\"hi\\""} 1' in registry.render_prometheus()
+
+    def test_write_file(self, tmp_path):
+        """The metrics can be written into a file."""
+        registry = MetricsRegistry()
+        registry.counter("c", "C.").inc()
+        target = tmp_path / "metrics.prom"
+
+        registry.write_prometheus_file(str(target))
+
+        assert "c 1" in target.read_text()
+
+    def test_http_server(self):
+        """The metrics are served over HTTP."""
+        registry = MetricsRegistry()
+        registry.counter("c", "C.").inc()
+        server = registry.start_http_server(0)
+
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                assert "c 1" in response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+
+
+class TestMeteredModel:
+    """Test suite for MeteredModel."""
+
+    def test_stream_records_request(self):
+        """A streamed request records the latency, the first token and the token counts."""
+        model = MeteredModel(FakeStreamingModel(), agent_title="Test Agent", model_name="test-model")
+        labels = {"agent": "Test Agent", "model": "test-model"}
+        requests_before = model_requests.value(**labels)
+
+        async def consume():
+            return [event async for event in model.stream_response()]
+
+        events = asyncio.run(consume())
+
+        assert len(events) == 2
+        assert model_requests.value(**labels) == requests_before + 1
+        assert model_completion_tokens.sum(**labels) >= 20
+        assert model_time_to_first_token.count(**labels) >= 1
+
+    def test_failed_request_is_recorded(self):
+        """A request that fails still counts, with its latency."""
+        model = MeteredModel(FailingModel(), agent_title="Failing Agent", model_name="test-model")
+        labels = {"agent": "Failing Agent", "model": "test-model"}
+        requests_before = model_requests.value(**labels)
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(model.get_response())
+
+        assert model_requests.value(**labels) == requests_before + 1
+        assert model_request_duration.count(**labels) >= 1
@@ -0,0 +1,103 @@
+"""
+Tests for the model routing and the model cascades.
+"""
+import asyncio
+
+import pytest
+
+from geai.ge_openai.model_router import resolve_model, parse_cascade, run_cascade, escalation_rate
+
+
+class TestResolveModel:
+    """Test suite for resolve_model."""
+
+    def test_template_model_is_used(self, monkeypatch):
+        """Without overrides, the template model is used."""
+        monkeypatch.delenv("GEAI_MODEL", raising=False)
+        monkeypatch.delenv("GEAI_MODEL_ALIASES", raising=False)
+
+        assert resolve_model("qwen3-coder:30b") == "qwen3-coder:30b"
+
+    def test_forced_model(self, monkeypatch):
+        """GEAI_MODEL forces the same model for everything."""
+        monkeypatch.setenv("GEAI_MODEL", "big")
+
+        assert resolve_model("qwen3-coder:30b") == "big"
+
+    def test_aliases(self, monkeypatch):
+        """GEAI_MODEL_ALIASES remaps only the listed models."""
+        monkeypatch.delenv("GEAI_MODEL", raising=False)
+        monkeypatch.setenv("GEAI_MODEL_ALIASES", "small=tiny, medium=large")
+
+        assert resolve_model("medium") == "large"
+        assert resolve_model("other") == "other"
+
+
+class TestParseCascade:
+    """Test suite for parse_cascade."""
+
+    def test_no_cascade(self, monkeypatch):
+        """Without a cascade, only the template model runs."""
+        monkeypatch.delenv("GEAI_MODEL", raising=False)
+
+        assert parse_cascade({"model": "small"}) == ["small"]
+
+    def test_cascade(self, monkeypatch):
+        """The cascade lists the models in order."""
+        monkeypatch.delenv("GEAI_MODEL", raising=False)
+
+        assert parse_cascade({"model": "small", "cascade": "small, large"}) == ["small", "large"]
+
+    def test_forced_model_runs_once(self, monkeypatch):
+        """Forcing a model doesn't run the same model twice."""
+        monkeypatch.setenv("GEAI_MODEL", "big")
+
+        assert parse_cascade({"model": "small", "cascade": "small,large"}) == ["big"]
+
+
+class TestRunCascade:
+    """Test suite for run_cascade."""
+
+    def test_accepted_by_first_model(self):
+        """An accepted answer doesn't escalate."""
+        calls = []
+
+        async def attempt(model):
+            calls.append(model)
+            return "VALID"
+
+        result, model = asyncio.run(run_cascade("test_first", ["small", "large"], attempt, lambda r: True))
+
+        assert (result, model) == ("VALID", "small")
+        assert calls == ["small"]
+        assert escalation_rate("test_first") == 0
+
+    def test_escalates_on_rejected_answer(self):
+        """A rejected answer, or an error, escalates to the next model."""
+        answers = {"small": None, "large": "VALID"}
+
+        async def attempt(model):
+            return answers[model]
+
+        result, model = asyncio.run(run_cascade("test_escalate", ["small", "large"], attempt,
+                                                lambda r: r is not None))
+
+        assert (result, model) == ("VALID", "large")
+        assert escalation_rate("test_escalate") == 1
+
+    def test_last_error_is_raised(self):
+        """If every model fails, the last error is raised."""
+        async def attempt(model):
+            raise Exception(f"{model} failed")
+
+        with pytest.raises(Exception, match="large failed"):
+            asyncio.run(run_cascade("test_error", ["small", "large"], attempt, lambda r: True))
+
+
+    def test_no_models(self):
+        """An empty cascade is an error, and no attempt runs."""
+        async def attempt(model):
+            raise AssertionError("no attempt should run")
+
+        with pytest.raises(ValueError, match="no models"):
+            asyncio.run(run_cascade("test_empty", [], attempt, lambda r: True))
@@ -0,0 +1,90 @@
+"""
+Tests for the local extraction of the python APIs.
+"""
+import asyncio
+
+from geai.tools import workspace_tools
+from geai.tools.python_api import extract_python_api
+
+SOURCE = '''"""Storage of the todo items."""
+import json
+
+DEFAULT_FILE = "~/.todo.json"
+_cache = {}
+
+
+def load(file_name: str = DEFAULT_FILE) -> list:
+    """Loads the items.
+
+    More details that aren't part of the API.
+    """
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def _parse(text):
+    return text
+
+
+class Item(Base, frozen=True):
+    """A todo item."""
+    title: str
+    done: bool = False
+
+    def __init__(self, title: str) -> None:
+        self.title = title
+
+    @property
+    def label(self) -> str:
+        return self.title
+
+    def _secret(self):
+        pass
+
+
+async def sync(items: list, *, force=False):
+    pass
+'''
+
+
+class TestExtractPythonApi:
+    """Test suite for extract_python_api."""
+
+    def test_public_api(self):
+        """Only the public names are extracted, with their signatures and docstrings."""
+        assert extract_python_api(SOURCE) == '''"""Storage of the todo items."""
+DEFAULT_FILE = '~/.todo.json'
+
+def load(file_name: str=DEFAULT_FILE) -> list:
+    """Loads the items."""
+
+class Item(Base, frozen=True):
+    """A todo item."""
+    title: str
+    done: bool = False
+
+    def __init__(self, title: str) -> None:
+        ...
+
+    @property
+    def label(self) -> str:
+        ...
+
+async def sync(items: list, *, force=False):
+    ...
+'''
+
+    def test_syntax_error(self):
+        assert extract_python_api("def broken(:\n") is None
+
+
+class TestReadApiImpl:
+    """Test suite for read_api_impl."""
+
+    def test_python_api_is_local_and_cached(self, tmp_workspace):
+        """Python files don't need the API extractor agent, and the API is cached until the file is written."""
+        workspace_tools.write_file_impl("store.py", "def load() -> list:\n    return []\n")
+        assert "def load() -> list:" in asyncio.run(workspace_tools.read_api_impl("store.py"))
+
+        workspace_tools.write_file_impl("store.py", "def save(items: list) -> None:\n    pass\n")
+        assert "def save(items: list) -> None:" in asyncio.run(workspace_tools.read_api_impl("store.py"))
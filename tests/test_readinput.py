@@ -0,0 +1,119 @@
+"""
+Tests for the terminal input: the keys decoded from the terminal bytes, the
+line editing, and the reads from a (pseudo) terminal.
+"""
+import asyncio
+import io
+import os
+import pty
+import sys
+
+import readinput
+
+
+def edit(chunks, multiline=True):
+    keys = readinput._KeyParser()
+    editor = readinput._LineEditor(multiline)
+    echoes = []
+
+    for chunk in chunks:
+        editor.feed(keys.feed(chunk))
+        echoes.append(editor.take_echo())
+
+    return editor, echoes
+
+
+class TestKeyParser:
+    def test_bracketed_paste_is_a_single_key(self):
+        """A paste split over many reads is still a single key, with the line breaks normalized."""
+        keys = readinput._KeyParser()
+
+        assert keys.feed(b"ab\x1b[200~line 1\r") == [("text", "ab")]
+        assert keys.feed(b"line 2\x1b[20") == []
+        assert keys.feed(b"1~\r") == [("paste", "line 1\nline 2"), ("key", "\r")]
+
+    def test_escape_sequences_and_split_characters(self):
+        """The arrow keys are dropped, and a character split between reads is decoded whole."""
+        keys = readinput._KeyParser()
+
+        assert keys.feed(b"a\x1b[") == [("text", "a")]
+        assert keys.feed(b"Db\xc3") == [("text", "b")]
+        assert keys.feed(b"\xa9") == [("text", "é")]
+
+
+class TestLineEditor:
+    def test_multi_line_editing(self):
+        """Enter starts a new line, backspace erases, Ctrl+D ends the input."""
+        editor, echoes = edit([b"one\rtwx\x7fo\r", b"three\x04"])
+
+        assert editor.done
+        assert editor.result() == "one\ntwo\nthree"
+        assert echoes == ["one\ntwx\b \bo\n", "three\n"]
+
+    def test_paste_is_echoed_at_once(self):
+        """A large paste is echoed with a single write."""
+        spec = "\n".join(f"line {i} of the spec" for i in range(2000))
+        editor, echoes = edit([b"\x1b[200~" + spec.encode() + b"\x1b[201~\x04"])
+
+        assert editor.result() == spec
+        assert echoes == [spec + "\n"]
+
+    def test_single_line_ends_at_enter(self):
+        """A single line ends at Enter, and a pasted line break becomes a space."""
+        editor, _ = edit([b"\x1b[200~a\nb\x1b[201~\rignored"], multiline=False)
+
+        assert editor.result() == "a b"
+
+    def test_ctrl_c_interrupts(self):
+        try:
+            edit([b"abc\x03"])
+        except KeyboardInterrupt:
+            return
+
+        assert False, "Ctrl+C should interrupt the input"
+
+
+class TestRead:
+    def test_piped_input(self, monkeypatch, capsys):
+        """When the input isn't a terminal, it's read as lines."""
+        monkeypatch.setattr(sys, "stdin", io.StringIO("2\n"))
+
+        assert readinput.read_options("pick", "Options", ["one", "two"]) == "two"
+
+        monkeypatch.setattr(sys, "stdin", io.StringIO("first\nsecond\n"))
+
+        assert readinput.read_multi("spec") == "first\nsecond"
+
+    def test_async_read_from_terminal(self, monkeypatch, capsys):
+        """The async read runs in the event loop, that keeps running other tasks while waiting."""
+        master, slave = pty.openpty()
+        monkeypatch.setattr(sys, "stdin", os.fdopen(slave, "r"))
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.create_task(tick())
+            reading = asyncio.create_task(readinput.read_multi_async("spec"))
+
+            await asyncio.sleep(0.1)
+            os.write(master, b"one\r\x1b[200~two\nthree\x1b[201~\x04")
+            result = await reading
+            ticker.cancel()
+
+            return result, ticks
+
+        try:
+            result, ticks = asyncio.run(run())
+        finally:
+            sys.stdin.close()
+            os.close(master)
+
+        assert result == "one\ntwo\nthree"
+        assert ticks > 5
+        assert "one\ntwo\nthree\n" in capsys.readouterr().out
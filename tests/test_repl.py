@@ -0,0 +1,129 @@
+"""
+Tests for the REPLs: the messages are read in the background, the ones queued
+during a turn are folded into the next turn, and Ctrl+C interrupts only the
+running turn.
+"""
+import asyncio
+import os
+import signal
+import time
+
+from geai import chat
+from geai.event_sinks import EventSink
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+from geai.ge_openai import ge_agent
+from geai.ge_openai.memory_session import InMemorySession
+from geai.repl import InputQueue, interruptible
+from geai.tools import processes
+
+
+class TestInputQueue:
+    def test_messages_typed_during_a_turn_are_folded(self, capsys):
+        """The event loop keeps running while waiting, and the messages queued during a turn make a single turn."""
+        read_fd, write_fd = os.pipe()
+        user = os.fdopen(write_fd, "w", buffering=1)
+
+        async def run():
+            turns = []
+
+            async for turn in InputQueue("> ", "first", os.fdopen(read_fd, "r")):
+                turns.append(turn)
+
+                if turn == "first":
+                    # the user types while the turn is still running
+                    user.write("fix the typo\n\nand add a test\n")
+                    await asyncio.sleep(0.1)
+                elif len(turns) == 2:
+                    user.write("quit\n")
+
+            return turns
+
+        try:
+            turns = asyncio.run(asyncio.wait_for(run(), 5))
+        finally:
+            user.close()
+
+        assert turns == ["first", "fix the typo\n\nand add a test"]
+        assert "📨 2 queued messages in this turn" in capsys.readouterr().out
+
+    def test_turns_until_the_end_of_the_input(self):
+        """The turns can also be waited for in a thread, until the end of the input."""
+        read_fd, write_fd = os.pipe()
+
+        with os.fdopen(write_fd, "w") as user:
+            user.write("one\n")
+
+        assert list(InputQueue("> ", None, os.fdopen(read_fd, "r")).turns()) == ["one"]
+
+
+class CtrlCEventSink(EventSink):
+    """Presses Ctrl+C a bit after the first event of the type."""
+    def __init__(self, event_type: str, delay: float):
+        self.event_type = event_type
+        self.delay = delay
+        self.pressed_at = None
+
+    def emit(self, event) -> None:
+        if event.type == self.event_type and self.pressed_at is None:
+            self.pressed_at = time.perf_counter() + self.delay
+            asyncio.get_running_loop().call_later(self.delay, os.kill, os.getpid(), signal.SIGINT)
+
+
+class TestInterruptible:
+    def test_ctrl_c_stops_the_stream_and_keeps_the_session(self, capsys, fake_model_client):
+        """The interrupted generation stops at once, and the next turn sees what it generated."""
+        requests = []
+
+        def responder(request):
+            requests.append(request)
+            return ScriptedReply(text="a very long and wrong answer " * 40 if len(requests) == 1 else "a short one")
+
+        with FakeModelServer(responder, token_rate=50) as server:
+            ge_agent.configure_client(server.base_url)
+
+            async def run():
+                session = InMemorySession("test")
+
+                ctrl_c = CtrlCEventSink("text_delta", 0.2)
+                interrupted = await interruptible(chat.run_agent(session, "hello", ctrl_c))
+                elapsed = time.perf_counter() - ctrl_c.pressed_at
+
+                answer = await interruptible(chat.run_agent(session, "try again"))
+
+                return interrupted, elapsed, answer
+
+            interrupted, elapsed, answer = asyncio.run(run())
+
+        assert interrupted is None
+        assert elapsed < 0.5
+        assert answer == "a short one"
+        assert "⛔ interrupted" in capsys.readouterr().out
+
+        history = requests[1]["messages"]
+        assert history[-3]["content"] == "hello"
+        assert history[-2]["content"].startswith("a very long")
+        assert history[-2]["content"].endswith("[interrupted by the user]")
+        assert history[-1]["content"] == "try again"
+
+    def test_ctrl_c_kills_the_tool_processes(self, capsys, tmp_workspace, fake_model_client):
+        """A hung command of the `execute` tool is killed with its turn."""
+
+        def responder(request):
+            if request["messages"][-1]["role"] == "tool":
+                return ScriptedReply(text="done")
+            return ScriptedReply(tool_calls=[("execute", '{"command": "sleep 30"}')])
+
+        killed = processes.tool_processes_killed.value()
+
+        with FakeModelServer(responder) as server:
+            ge_agent.configure_client(server.base_url)
+
+            async def run():
+                ctrl_c = CtrlCEventSink("tool_call_start", 0.3)
+                await interruptible(chat.run_agent(InMemorySession("test"), "wait for it", ctrl_c))
+
+                return time.perf_counter() - ctrl_c.pressed_at
+
+            assert asyncio.run(run()) < 0.5
+
+        assert processes.tool_processes_killed.value() == killed + 1
@@ -0,0 +1,71 @@
+"""
+Tests for the BM25 search index, and the search_code tool.
+"""
+import os
+
+from geai.tools.search_code_tool import search_code_impl
+from geai.tools.file_index import file_index_files
+from geai.tools.search_index import SearchIndex, tokenize
+
+
+class TestTokenize:
+    def test_identifiers_are_split(self):
+        assert tokenize("readFile(file_name)") == ["readfile", "read", "file", "file_name", "file", "name"]
+        assert tokenize("HTTPServer x") == ["httpserver", "http", "server"]
+
+
+class TestSearchIndex:
+    def test_ranking(self, tmp_path):
+        """The file about the concept wins over the ones that only mention it."""
+        (tmp_path / "parser.py").write_text("def parse_config(config_text):\n"
+                                            "    return ConfigParser().parse(config_text)\n", encoding="utf-8")
+        (tmp_path / "main.py").write_text("from parser import parse_config\n"
+                                          "print('hello')\n", encoding="utf-8")
+        (tmp_path / "other.py").write_text("print('nothing here')\n", encoding="utf-8")
+
+        matches = SearchIndex(str(tmp_path)).search("parse config")
+
+        assert [match.file_name for match in matches] == ["parser.py", "main.py"]
+        assert matches[0].lines == [1, 2]
+
+    def test_refresh_is_incremental_and_persisted(self, tmp_path):
+        (tmp_path / "a.py").write_text("alpha = 1\n", encoding="utf-8")
+        (tmp_path / "b.py").write_text("beta = 1\n", encoding="utf-8")
+        SearchIndex(str(tmp_path)).search("alpha")
+
+        # a new session loads the index, and only reads the changed files
+        indexed = file_index_files.value(index="search", result="indexed")
+        (tmp_path / "b.py").write_text("gamma_value = 1\n", encoding="utf-8")
+        (tmp_path / "a.py").unlink()
+        index = SearchIndex(str(tmp_path))
+
+        assert [match.file_name for match in index.search("gamma")] == ["b.py"]
+        assert index.search("alpha") == []
+        assert index.search("beta") == []
+        assert file_index_files.value(index="search", result="indexed") == indexed + 1
+
+
+class TestSearchCodeImpl:
+    def test_snippets(self, tmp_path, tmp_workspace):
+        os.makedirs(tmp_path / "src")
+        (tmp_path / "src" / "Cache.java").write_text("class LruCache {\n"
+                                                     "    int size;\n"
+                                                     "    void evictOldest() {}\n"
+                                                     "}\n", encoding="utf-8")
+
+        result = search_code_impl("evict oldest cache entry")
+
+        assert result.success is True
+        assert len(result.hits) == 1
+        assert result.hits[0].file_name == os.path.join("src", "Cache.java")
+        assert [(s.line, s.text) for s in result.hits[0].snippets] == [(3, "void evictOldest() {}"),
+                                                                      (1, "class LruCache {")]
+
+    def test_no_matches(self, tmp_path, tmp_workspace):
+        (tmp_path / "a.py").write_text("alpha = 1\n", encoding="utf-8")
+
+        result = search_code_impl("nothing")
+
+        assert result.success is True
+        assert result.hits == []
+        assert result.error_message == "No files match the query"
@@ -0,0 +1,127 @@
+"""
+Tests for the single-flight coalescing of concurrent calls.
+"""
+import asyncio
+
+import pytest
+
+from geai.singleflight import SingleFlight, singleflight_deduplicated
+from geai.tools import workspace_tools
+
+
+class SlowCall:
+    def __init__(self, result="done", error: Exception | None = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+        if self.error:
+            raise self.error
+
+        return self.result
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight."""
+
+    def test_concurrent_calls_are_shared(self):
+        """Concurrent calls for the same key run once, and are counted as deduplicated."""
+        flight = SingleFlight("test_shared")
+        call = SlowCall()
+
+        async def run():
+            return await asyncio.gather(*[flight.run("key", call) for _ in range(3)],
+                                        flight.run("other key", call))
+
+        assert asyncio.run(run()) == ["done"] * 4
+        assert call.calls == 2
+        assert singleflight_deduplicated.value(name="test_shared") == 2
+        assert flight.in_flight() == 0
+
+    def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight("test_sequential")
+        call = SlowCall()
+
+        async def run():
+            await flight.run("key", call)
+            await flight.run("key", call)
+
+        asyncio.run(run())
+        assert call.calls == 2
+
+    def test_errors_are_shared(self):
+        """All the waiting callers get the error."""
+        flight = SingleFlight("test_errors")
+        call = SlowCall(error=ValueError("broken"))
+
+        async def run():
+            return await asyncio.gather(flight.run("key", call), flight.run("key", call), return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert call.calls == 1
+
+    def test_cancelled_caller_doesnt_cancel_the_others(self):
+        flight = SingleFlight("test_cancel_one")
+        call = SlowCall()
+
+        async def run():
+            first = asyncio.ensure_future(flight.run("key", call))
+            second = asyncio.ensure_future(flight.run("key", call))
+            await asyncio.sleep(0.01)
+            first.cancel()
+
+            return await second
+
+        assert asyncio.run(run()) == "done"
+        assert not call.cancelled
+
+    def test_call_is_cancelled_with_its_last_caller(self):
+        flight = SingleFlight("test_cancel_all")
+        call = SlowCall()
+
+        async def run():
+            caller = asyncio.ensure_future(flight.run("key", call))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        assert call.cancelled
+        assert flight.in_flight() == 0
+
+
+class TestReadApiSingleFlight:
+    """Test suite for the deduplicated read_api extractions."""
+
+    def test_concurrent_read_api(self, monkeypatch, tmp_workspace):
+        """Concurrent read_api calls for the same file run a single extraction."""
+        workspace_tools.write_file_impl("list.h", "int list_size(list *l);\n")
+
+        extractions = []
+
+        async def extract_api(file_name: str, file_content: str) -> str:
+            extractions.append(file_name)
+            await asyncio.sleep(0.05)
+            return file_content
+
+        monkeypatch.setattr(workspace_tools, "extract_api", extract_api)
+
+        async def run():
+            return await asyncio.gather(*[workspace_tools.read_api_impl("list.h") for _ in range(4)])
+
+        assert asyncio.run(run()) == ["int list_size(list *l);\n"] * 4
+        assert extractions == ["list.h"]
@@ -0,0 +1,120 @@
+"""
+Tests for the workspace snapshots, and the change tracking of the agent turns.
+"""
+import os
+import subprocess
+
+from geai.agent import turn_changes
+from geai.snapshot import SnapshotEngine, snapshot_files
+
+
+class TestSnapshotEngine:
+    def test_unchanged_files_are_not_hashed_again(self, tmp_path):
+        """The files with the same mtime and size keep their hash from the previous snapshot."""
+        (tmp_path / "a.py").write_text("a = 1\n", encoding="utf-8")
+        (tmp_path / "b.py").write_text("b = 1\n", encoding="utf-8")
+        engine = SnapshotEngine(str(tmp_path))
+
+        engine.snapshot()
+        reused = snapshot_files.value(hash="reused")
+        hashed = snapshot_files.value(hash="hashed")
+
+        (tmp_path / "b.py").write_text("b = 22\n", encoding="utf-8")
+        snapshot = engine.snapshot()
+
+        assert snapshot_files.value(hash="reused") == reused + 1
+        assert snapshot_files.value(hash="hashed") == hashed + 1
+        # the scratch files aren't part of the snapshot
+        assert sorted(snapshot) == ["a.py", "b.py"]
+
+    def test_changes_and_diff(self, tmp_path):
+        (tmp_path / "kept.py").write_text("kept = 1\n", encoding="utf-8")
+        (tmp_path / "changed.py").write_text("x = 1\ny = 2\n", encoding="utf-8")
+        (tmp_path / "gone.py").write_text("gone = 1\n", encoding="utf-8")
+        engine = SnapshotEngine(str(tmp_path))
+        before = engine.snapshot()
+
+        (tmp_path / "changed.py").write_text("x = 1\ny = 3\n", encoding="utf-8")
+        (tmp_path / "gone.py").unlink()
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "new.py").write_text("new = 1\n", encoding="utf-8")
+        after = engine.snapshot()
+
+        changes = engine.changes(before, after)
+
+        assert changes.added == [os.path.join("pkg", "new.py")]
+        assert changes.modified == ["changed.py"]
+        assert changes.deleted == ["gone.py"]
+        assert engine.line_counts(before, after, "changed.py") == (1, 1)
+
+        diff = engine.diff(before, after, changes)
+
+        assert "--- a/changed.py\n+++ b/changed.py\n" in diff
+        assert "-y = 2\n+y = 3\n" in diff
+        assert "--- a/gone.py\n+++ /dev/null\n" in diff
+        assert "+++ b/pkg/new.py\n" in diff
+        assert "kept.py" not in diff
+
+    def test_prune_keeps_only_the_referenced_contents(self, tmp_path):
+        (tmp_path / "a.py").write_text("version = 1\n", encoding="utf-8")
+        engine = SnapshotEngine(str(tmp_path))
+        first = engine.snapshot()
+
+        (tmp_path / "a.py").write_text("version = 22\n", encoding="utf-8")
+        second = engine.snapshot()
+        (tmp_path / "a.py").write_text("version = 333\n", encoding="utf-8")
+        third = engine.snapshot()
+
+        engine.prune(second, third)
+
+        stored = {name for _, _, files in os.walk(engine.objects_folder) for name in files}
+        assert stored == {second["a.py"].digest, third["a.py"].digest}
+        assert first["a.py"].digest not in stored
+        assert "+version = 333\n" in engine.diff(second, third)
+
+    def test_git_ignored_files_are_skipped(self, tmp_path):
+        """The build outputs aren't copied into the object store."""
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        (tmp_path / ".gitignore").write_text("build/\n*.log\n", encoding="utf-8")
+        (tmp_path / "main.py").write_text("main = 1\n", encoding="utf-8")
+        (tmp_path / "run.log").write_text("log\n", encoding="utf-8")
+        (tmp_path / "build").mkdir()
+        (tmp_path / "build" / "out.txt").write_text("out\n", encoding="utf-8")
+
+        snapshot = SnapshotEngine(str(tmp_path)).snapshot()
+
+        assert sorted(snapshot) == [".gitignore", "main.py"]
+
+    def test_big_files_are_not_diffed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("geai.snapshot.MAX_STORED_SIZE", 10)
+        engine = SnapshotEngine(str(tmp_path))
+        before = engine.snapshot()
+
+        (tmp_path / "big.txt").write_text("x" * 100, encoding="utf-8")
+        after = engine.snapshot()
+
+        assert engine.diff(before, after) == "Binary or large file big.txt changed\n"
+
+
+class TestTurnChanges:
+    def test_only_the_touched_files_are_checked(self, tmp_path, tmp_workspace):
+        """The event lists the changed files, and the static checks run only on them."""
+        (tmp_path / "broken.py").write_text("print(undefined_name)\n", encoding="utf-8")
+        engine = SnapshotEngine(str(tmp_path))
+        before = engine.snapshot()
+
+        assert turn_changes(engine, before, engine.snapshot()) is None
+
+        (tmp_path / "main.py").write_text("print(missing)\n", encoding="utf-8")
+        tmp_workspace.api_cache[str(tmp_path / "main.py")] = ("digest", "api")
+        event = turn_changes(engine, before, engine.snapshot())
+
+        # not a text delta, the model didn't write it
+        assert event.type == "turn_changes"
+        assert [(f.change, f.file_name, f.added_lines, f.removed_lines) for f in event.files] == [("A", "main.py", 1, 0)]
+        assert event.diff_file == os.path.join(".geai", "diffs", "turn-1.diff")
+        assert len(event.diagnostics) == 1
+        assert event.diagnostics[0].startswith("main.py:1:")
+        assert tmp_workspace.api_cache == dict()
+        assert (tmp_path / ".geai" / "diffs" / "turn-1.diff").read_text(encoding="utf-8").startswith(
+            "--- /dev/null\n+++ b/main.py\n")
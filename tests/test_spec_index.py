@@ -0,0 +1,87 @@
+"""
+Tests for the SPEC.md slicing per file.
+"""
+from spec_index import SpecIndex, parse_sections
+from structs import FileInfo
+
+SPEC = """## Description
+
+A command line todo list.
+
+## File List
+
+* /storage.py - Saves and loads the todo items
+* /render.py - Renders the todo items as a table
+* /main.py - The entry point, uses storage.py and render.py
+
+## Documentation
+
+The items are saved as JSON in `~/.todo.json`.
+
+`storage.py` exposes:
+
+```python
+def load() -> list: ...
+def save(items: list) -> None: ...
+```
+
+`storage.py` writes the file atomically: it writes a temporary file next to it first, and
+renames it over the old one, so a crash never leaves a half written todo list behind. The
+previous version is kept as `~/.todo.json.bak`, and used if the main file can't be parsed.
+
+`render.py` uses colors only if the output is a terminal.
+"""
+
+FILES = [FileInfo(filename=f, description="") for f in ["/storage.py", "/render.py", "/main.py"]]
+
+
+class TestParseSections:
+    """Test suite for parse_sections."""
+
+    def test_blocks(self):
+        """Sections are split into paragraphs, list items and code blocks."""
+        sections = parse_sections(SPEC)
+
+        assert [section.heading for section in sections] == ["## Description", "## File List", "## Documentation"]
+        assert len(sections[1].blocks) == 3
+        assert sections[2].blocks[2].text.startswith("```python\ndef load()")
+
+
+class TestSpecIndex:
+    """Test suite for SpecIndex."""
+
+    def test_dependencies(self):
+        """Files mentioned together with the file are its dependencies."""
+        index = SpecIndex(SPEC, FILES)
+
+        assert index.dependencies(FILES[2]) == ["/storage.py", "/render.py"]
+
+    def test_related_files(self):
+        """The files that mention the file are related too."""
+        index = SpecIndex(SPEC, FILES)
+
+        assert index.related_files(FILES[0]) == ["/main.py"]
+
+    def test_slice(self):
+        """The slice has the summary, the file's blocks, and the blocks of its dependencies."""
+        index = SpecIndex(SPEC, FILES)
+        spec_slice = index.slice_for(FILES[1])
+
+        assert "A command line todo list." in spec_slice
+        assert "* /render.py - Renders the todo items as a table\n* /main.py" in spec_slice
+        assert "uses colors only if the output is a terminal" in spec_slice
+        # only storage.py needs these
+        assert "def load()" not in spec_slice
+        assert "All the files of the project: /storage.py, /render.py, /main.py" in spec_slice
+        assert len(spec_slice) < len(SPEC)
+
+    def test_blocks_introduced_by_a_mention(self):
+        """A code block introduced by a block about a file belongs to that file."""
+        spec_slice = SpecIndex(SPEC, FILES).slice_for(FILES[0])
+
+        assert "def save(items: list) -> None: ..." in spec_slice
+
+    def test_unmentioned_file_gets_the_full_spec(self):
+        file = FileInfo(filename="/README.md", description="")
+
+        assert SpecIndex(SPEC, FILES + [file]).slice_for(file) == SPEC
@@ -0,0 +1,55 @@
+"""
+Tests for the cap on the size of the tool results, and the spill store that
+keeps the full outputs.
+"""
+import re
+
+from geai.tools.read_file_tool import read_file
+from geai.tools.sh_tool import execute
+from geai.tools.spill import MAX_RESULT_CHARS, read_spilled_output_impl
+
+
+class TestCapped:
+    def test_small_results_are_unchanged(self, tmp_path, tmp_workspace):
+        result = execute.func("echo hello")
+
+        assert result.stdout == "hello\n"
+        assert not (tmp_path / ".geai").exists()
+
+    def test_big_results_keep_the_head_and_the_tail(self, tmp_path, tmp_workspace):
+        """A noisy command output is cut, and the full output can still be read in ranges."""
+        result = execute.func("seq 1 100000")
+
+        assert len(result) < MAX_RESULT_CHARS
+        assert result.startswith("stdout:\n1\n2\n3\n")
+        assert "\n100000\nstderr: \"\"\nreturn_code: 0\nsuccess: true" in result
+
+        spill_id = re.search(r"spill id `([\w-]+)`", result).group(1)
+        # line 1 is the `stdout:` header
+        assert read_spilled_output_impl(spill_id, 50001, 50003) == "lines 50001-50003 of 100004:\n50000\n50001\n50002"
+        # the scratch files don't end up in the project
+        assert (tmp_path / ".geai" / ".gitignore").read_text(encoding="utf-8") == "*\n"
+
+    def test_big_files(self, tmp_path, tmp_workspace):
+        (tmp_path / "big.c").write_text("".join(f"int f{i}();\n" for i in range(5000)), encoding="utf-8")
+
+        result = read_file.func("big.c")
+
+        assert "int f0();" in result and "int f4999();" in result
+        assert "int f2500();" not in result
+        assert "lines omitted" in result
+
+
+class TestReadSpilledOutput:
+    def test_too_big_ranges_are_cut(self, tmp_workspace):
+        spill_id = re.search(r"spill id `([\w-]+)`", execute.func("seq 1 100000")).group(1)
+
+        result = read_spilled_output_impl(spill_id, 1, 100000)
+
+        assert len(result) < MAX_RESULT_CHARS + 200
+        assert result.startswith("lines 1-")
+        assert "the range was too big" in result
+
+    def test_invalid_ids(self, tmp_workspace):
+        assert read_spilled_output_impl("../../etc/passwd", 1, 10) == "invalid spill id: ../../etc/passwd"
+        assert read_spilled_output_impl("execute-123", 1, 10) == "no spilled output with the id execute-123"
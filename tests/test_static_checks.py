@@ -0,0 +1,127 @@
+"""
+Tests for the static checks of the generated python files.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import static_checks
+from static_checks import check_python_source, check_workspace_files, module_api
+
+
+def write(folder, file_name: str, content: str) -> None:
+    path = folder / file_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+class TestCheckPythonSource:
+    """Test suite for check_python_source."""
+
+    def test_clean_file(self):
+        """A file that only uses defined names is clean."""
+        source = "import os\n\n\ndef main(args):\n    return [os.path.join(a, b) for a, b in args]\n"
+
+        assert check_python_source("main.py", source, {}) == []
+
+    def test_main_module_exists(self):
+        """`__main__` has no spec to find, but it's always there."""
+        assert check_python_source("main.py", "import __main__\n\nprint(__main__.__file__)\n", {}) == []
+
+    def test_syntax_error(self):
+        diagnostics = check_python_source("main.py", "def main(:\n    pass\n", {})
+
+        assert len(diagnostics) == 1
+        assert diagnostics[0].startswith("main.py:1: syntax error")
+
+    def test_undefined_name(self):
+        diagnostics = check_python_source("main.py", "def main():\n    return helper(1)\n", {})
+
+        assert diagnostics == ["main.py:2: undefined name `helper`"]
+
+    def test_star_import_skips_undefined_names(self):
+        """With a star import, any name could be defined."""
+        assert check_python_source("main.py", "from os.path import *\n\nprint(join)\n", {}) == []
+
+    def test_missing_module(self):
+        diagnostics = check_python_source("main.py", "import no_such_module_anywhere\n", {})
+
+        assert diagnostics == ["main.py:1: module `no_such_module_anywhere` is not in the workspace, and not installed"]
+
+    def test_optional_import(self):
+        """An import that is allowed to fail isn't reported."""
+        source = "try:\n    import no_such_module_anywhere\nexcept ImportError:\n    pass\n"
+
+        assert check_python_source("main.py", source, {}) == []
+
+    def test_missing_module_with_declared_dependencies(self):
+        """If the workspace declares its dependencies, the module might just not be installed here."""
+        assert check_python_source("main.py", "import no_such_module_anywhere\n", {},
+                                   declares_dependencies=True) == []
+
+    def test_missing_sibling_function(self):
+        """Names imported, or used, from sibling modules must exist."""
+        apis = {"store": ["load", "save"]}
+        source = "import store\nfrom store import load, delete\n\nstore.save(load())\nstore.update()\n"
+
+        diagnostics = check_python_source("main.py", source, apis)
+
+        assert diagnostics == [
+            "main.py:2: `delete` doesn't exist in module `store`, it only defines: load, save",
+            "main.py:5: `update` doesn't exist in module `store`, it only defines: load, save",
+        ]
+
+    def test_relative_import(self):
+        """Relative imports resolve from the package of the file."""
+        apis = {"pkg": [], "pkg.util": ["helper"]}
+
+        assert check_python_source("pkg/main.py", "from .util import helper\n", apis) == []
+        assert len(check_python_source("pkg/main.py", "from .util import other\n", apis)) == 1
+
+
+class TestModuleApi:
+    """Test suite for module_api."""
+
+    def test_top_level_names(self):
+        source = "import os\nVALUE = 1\n\nif os.name:\n    def f(): pass\n\nclass C:\n    x = 2\n"
+
+        assert module_api(source) == ["C", "VALUE", "f", "os"]
+
+    def test_unknown_api(self):
+        assert module_api("from os import *\n") is None
+        assert module_api("def broken(:\n") is None
+
+
+class TestCheckWorkspaceFiles:
+    """Test suite for check_workspace_files."""
+
+    def test_workspace(self, tmp_path):
+        """Only the python files are checked, against the other modules of the workspace."""
+        write(tmp_path, "store.py", "def load():\n    return 1\n")
+        write(tmp_path, "main.py", "from store import load, save\n\nprint(load())\n")
+        write(tmp_path, "README.md", "# readme\n")
+
+        with ThreadPoolExecutor(2) as executor:
+            diagnostics = check_workspace_files(str(tmp_path), ["store.py", "/main.py", "README.md"], executor)
+
+        assert diagnostics == {
+            "store.py": [],
+            "main.py": ["main.py:1: `save` doesn't exist in module `store`, it only defines: load"],
+        }
+
+    def test_few_checks_run_inline(self, tmp_path, monkeypatch):
+        """A handful of files doesn't start a process pool."""
+        monkeypatch.setattr(static_checks, "_shared_executor", None)
+        write(tmp_path, "main.py", "print(undefined_value)\n")
+
+        assert check_workspace_files(str(tmp_path), ["main.py"]) == {
+            "main.py": ["main.py:1: undefined name `undefined_value`"],
+        }
+
+    def test_process_pool(self, tmp_path, monkeypatch):
+        """More checks run in a process pool, shared by the calls."""
+        monkeypatch.setattr(static_checks, "INLINE_CHECKS", 1)
+        write(tmp_path, "main.py", "print(undefined_value)\n")
+
+        assert check_workspace_files(str(tmp_path), ["main.py"]) == {
+            "main.py": ["main.py:1: undefined name `undefined_value`"],
+        }
+        assert static_checks._shared_executor() is static_checks._shared_executor()
@@ -0,0 +1,162 @@
+"""
+Tests for the symbol index, and the find_symbol and find_references tools.
+"""
+from geai.tools.file_index import file_index_files
+from geai.tools.symbol_index import SymbolIndex
+from geai.tools.symbol_tools import find_references_impl, find_symbol_impl
+from geai.tools.workspace_tools import write_file_impl
+
+PYTHON_SOURCE = """\
+MAX_RETRIES = 3
+
+class Client:
+    def get(self, path):
+        return self.fetch(path, MAX_RETRIES)
+
+    async def fetch(self, path, retries):
+        pass
+
+def main():
+    Client().get("x")
+"""
+
+JAVA_SOURCE = """\
+/* class NotReal { */
+public class LruCache<K, V> extends Base {
+    public static final int MAX_SIZE = 10;
+    private String name = "class Fake {";
+
+    public V get(K key) {
+        return lookup(key);
+    }
+
+    void evict() {
+        get(null);
+    }
+}
+"""
+
+C_SOURCE = """\
+#define MAX_ITEMS 100
+
+struct node {
+    int value;
+};
+
+static struct node *make_node(int value)
+{
+    return 0;
+}
+
+int list_length(struct node *head);
+
+int main(void) {
+    return list_length(make_node(1));
+}
+"""
+
+
+def _definitions(index: SymbolIndex, file_name: str):
+    return [(s.name, s.kind, s.line, s.container)
+            for symbols in index._definitions.values() for s in symbols
+            if s.file_name == file_name]
+
+
+class TestSymbolIndex:
+    def test_python_definitions(self, tmp_path):
+        (tmp_path / "client.py").write_text(PYTHON_SOURCE, encoding="utf-8")
+        index = SymbolIndex(str(tmp_path))
+        index.refresh()
+
+        assert sorted(_definitions(index, "client.py"), key=lambda d: d[2]) == [
+            ("MAX_RETRIES", "constant", 1, None),
+            ("Client", "class", 3, None),
+            ("get", "method", 4, "Client"),
+            ("fetch", "method", 7, "Client"),
+            ("main", "function", 10, None),
+        ]
+
+    def test_c_and_java_definitions(self, tmp_path):
+        """The comments and the strings don't define anything, and the prototypes aren't definitions."""
+        (tmp_path / "LruCache.java").write_text(JAVA_SOURCE, encoding="utf-8")
+        (tmp_path / "list.c").write_text(C_SOURCE, encoding="utf-8")
+        index = SymbolIndex(str(tmp_path))
+        index.refresh()
+
+        assert sorted(_definitions(index, "LruCache.java"), key=lambda d: d[2]) == [
+            ("LruCache", "class", 2, None),
+            ("MAX_SIZE", "constant", 3, "LruCache"),
+            ("get", "method", 6, "LruCache"),
+            ("evict", "method", 10, "LruCache"),
+        ]
+        assert sorted(_definitions(index, "list.c"), key=lambda d: d[2]) == [
+            ("MAX_ITEMS", "constant", 1, None),
+            ("node", "class", 3, None),
+            ("make_node", "function", 7, None),
+            ("main", "function", 14, None),
+        ]
+
+    def test_persisted(self, tmp_path):
+        """A new session loads the index, and doesn't read the unchanged files again."""
+        (tmp_path / "client.py").write_text(PYTHON_SOURCE, encoding="utf-8")
+        SymbolIndex(str(tmp_path)).refresh()
+
+        indexed = file_index_files.value(index="symbols", result="indexed")
+        index = SymbolIndex(str(tmp_path))
+
+        assert [s.line for s in index.find_symbol("Client")] == [3]
+        assert file_index_files.value(index="symbols", result="indexed") == indexed
+
+
+class TestSymbolTools:
+    def test_find_symbol(self, tmp_path, tmp_workspace):
+        (tmp_path / "client.py").write_text(PYTHON_SOURCE, encoding="utf-8")
+        (tmp_path / "LruCache.java").write_text(JAVA_SOURCE, encoding="utf-8")
+
+        result = find_symbol_impl("get")
+
+        assert result.success is True
+        assert [(s.file_name, s.line, s.text) for s in result.symbols] == [
+            ("LruCache.java", 6, "public V get(K key) {"),
+            ("client.py", 4, "def get(self, path):"),
+        ]
+        assert [s.file_name for s in find_symbol_impl("Client.get").symbols] == ["client.py"]
+        assert find_symbol_impl("missing").error_message == "No definition found for missing"
+
+    def test_qualified_names_match_whole_containers(self, tmp_path, tmp_workspace):
+        (tmp_path / "parsers.py").write_text("class Parser:\n"
+                                             "    def parse(self):\n"
+                                             "        pass\n"
+                                             "\n"
+                                             "class Other:\n"
+                                             "    class Parser:\n"
+                                             "        def parse(self):\n"
+                                             "            pass\n", encoding="utf-8")
+
+        assert find_symbol_impl("er.parse").symbols == []
+        assert [s.line for s in find_symbol_impl("Parser.parse").symbols] == [2, 7]
+        assert [s.line for s in find_symbol_impl("Other.Parser.parse").symbols] == [7]
+
+    def test_find_references(self, tmp_path, tmp_workspace):
+        (tmp_path / "client.py").write_text(PYTHON_SOURCE, encoding="utf-8")
+        (tmp_path / "list.c").write_text(C_SOURCE, encoding="utf-8")
+
+        assert [(r.file_name, r.line, r.text) for r in find_references_impl("MAX_RETRIES").references] == [
+            ("client.py", 5, "return self.fetch(path, MAX_RETRIES)"),
+        ]
+        # the prototype is a reference, not a definition
+        assert [(r.file_name, r.line) for r in find_references_impl("list_length").references] == [
+            ("list.c", 12),
+            ("list.c", 15),
+        ]
+
+    def test_write_tools_update_the_index(self, tmp_path, tmp_workspace):
+        (tmp_path / "client.py").write_text(PYTHON_SOURCE, encoding="utf-8")
+        assert find_symbol_impl("Server").symbols == []
+
+        write_file_impl("server.py", "class Server:\n    pass\n")
+        indexed = file_index_files.value(index="symbols", result="indexed")
+
+        assert [(s.file_name, s.line) for s in find_symbol_impl("Server").symbols] == [("server.py", 1)]
+        # already indexed by the write, the refresh finds nothing new
+        assert file_index_files.value(index="symbols", result="indexed") == indexed
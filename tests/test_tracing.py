@@ -0,0 +1,90 @@
+"""
+Tests for the pipeline tracing.
+"""
+import asyncio
+import json
+
+from geai.tracing import Tracer
+
+
+def enabled_tracer() -> Tracer:
+    tracer = Tracer()
+    tracer.enabled = True
+    return tracer
+
+
+class TestTracer:
+    """Test suite for Tracer."""
+
+    def test_disabled_records_nothing(self):
+        """A disabled tracer yields no spans."""
+        tracer = Tracer()
+
+        with tracer.span("stage") as span:
+            assert span is None
+
+        assert tracer.spans == []
+
+    def test_nested_spans(self):
+        """Spans opened inside another span are its children."""
+        tracer = enabled_tracer()
+
+        with tracer.span("root") as root:
+            with tracer.span("child") as child:
+                leaf = tracer.start_span("tool call", "tool")
+                leaf.finish()
+
+        assert root.parent_id is None
+        assert child.parent_id == root.span_id
+        assert leaf.parent_id == child.span_id
+        assert root.end is not None and child.end is not None
+        assert root.track == child.track == leaf.track
+
+    def test_concurrent_tasks_get_own_tracks(self):
+        """Spans of concurrent tasks are nested under the parent, but on different tracks."""
+        tracer = enabled_tracer()
+
+        async def work(name: str):
+            with tracer.span(name):
+                await asyncio.sleep(0.01)
+
+        async def main():
+            with tracer.span("root"):
+                await asyncio.gather(work("a"), work("b"))
+
+        asyncio.run(main())
+
+        root, a, b = tracer.spans
+        assert a.parent_id == root.span_id
+        assert b.parent_id == root.span_id
+        assert a.track != b.track
+
+    def test_chrome_trace_export(self, tmp_path):
+        """The spans are exported as complete events."""
+        tracer = enabled_tracer()
+
+        with tracer.span("generate", file="main.py"):
+            pass
+
+        target = tmp_path / "trace.json"
+        tracer.export_chrome_trace(str(target))
+        trace = json.loads(target.read_text())
+
+        assert len(trace["traceEvents"]) == 1
+        event = trace["traceEvents"][0]
+        assert event["ph"] == "X"
+        assert event["name"] == "generate"
+        assert event["args"] == {"file": "main.py"}
+
+    def test_summary(self):
+        """The summary lists the spans and the time per category."""
+        tracer = enabled_tracer()
+
+        with tracer.span("spec_mode"):
+            tracer.start_span("model request", "model").finish()
+
+        summary = tracer.summary()
+
+        assert "[stage] spec_mode" in summary
+        assert "[model] model request" in summary
+        assert "total time per category" in summary
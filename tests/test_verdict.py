@@ -0,0 +1,107 @@
+"""
+Tests for the streamed VALID/INVALID verdicts of the checkers.
+"""
+import asyncio
+import time
+
+from geai.fake_model_server import FakeModelServer, ScriptedReply
+from geai.ge_openai import ge_agent
+from geai.ge_openai.ge_agent import GeAgent
+from verdict import VerdictParser, parse_verdict, stream_verdict
+
+
+def feed_pieces(parser: VerdictParser, text: str, size: int = 3) -> int:
+    """Feeds the text in small pieces, and returns how many characters were needed."""
+    for i in range(0, len(text), size):
+        if parser.feed(text[i:i + size]):
+            return i + size
+
+    return len(text)
+
+
+class TestVerdictParser:
+    """Test suite for VerdictParser."""
+
+    def test_valid_is_decided_on_the_verdict(self):
+        """The justification after VALID isn't needed."""
+        parser = VerdictParser()
+        used = feed_pieces(parser, "VALID\n\nThe code matches the spec, because " + "blah " * 100)
+
+        assert used <= len("VALID") + 3
+        assert parser.finish().valid is True
+
+    def test_invalid_reason_paragraph(self):
+        """The reason ends with its paragraph."""
+        parser = VerdictParser()
+        used = feed_pieces(parser, "INVALID: the main function is missing.\n\nAlso, " + "blah " * 100)
+        verdict = parser.finish()
+
+        assert used < 60
+        assert verdict.valid is False
+        assert verdict.reason == "the main function is missing."
+
+    def test_invalid_reason_is_bounded(self):
+        """A reason that doesn't end is cut at the limit."""
+        parser = VerdictParser(max_reason_chars=20)
+        feed_pieces(parser, "INVALID\n" + "x" * 100)
+
+        assert parser.finish().reason == "x" * 20
+
+    def test_invalid_at_the_end_of_the_answer(self):
+        """A reason without any paragraph end is decided when the answer ends."""
+        assert parse_verdict("**INVALID**: wrong import").reason == "wrong import"
+
+    def test_invalid_without_reason_is_malformed(self):
+        assert parse_verdict("INVALID") is None
+
+    def test_malformed_is_decided_early(self):
+        """An answer that can't be a verdict is dropped right away."""
+        parser = VerdictParser()
+
+        assert parser.feed("Let me check the ")
+        assert parser.finish() is None
+
+    def test_longer_words_are_not_verdicts(self):
+        """A word starting with the verdict waits for its next character, and is malformed."""
+        parser = VerdictParser()
+
+        assert not parser.feed("VALID")
+        assert parser.feed("ATION of the spec")
+        assert parser.finish() is None
+        assert parse_verdict("INVALIDATED: the cache") is None
+        assert parse_verdict("**VALID**").valid is True
+
+    def test_partial_verdict_waits(self):
+        """The start of a verdict waits for the rest of it."""
+        parser = VerdictParser()
+
+        assert not parser.feed("IN")
+        assert parser.finish() is None
+
+
+class TestStreamVerdict:
+    """Test suite for stream_verdict."""
+
+    def test_generation_is_cancelled(self, fake_model_client):
+        """The model stops generating as soon as the verdict is decided."""
+        reply = "VALID\n\n" + "The code is fine. " * 200
+
+
+        with FakeModelServer(lambda request: ScriptedReply(text=reply), token_rate=500) as server:
+            ge_agent.configure_client(server.base_url)
+            checker = GeAgent("instructions/coder/py/code_check.txt",
+                              data={"file_name": "main.py", "file_content": "print('hi')"})
+
+            start = time.perf_counter()
+            verdict = asyncio.run(stream_verdict(checker, "Check the main.py"))
+            elapsed = time.perf_counter() - start
+
+            deadline = time.monotonic() + 5
+            while not server.request_count and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+        assert verdict.valid is True
+        # the whole reply is about 900 tokens, almost 2s to generate; the server
+        # notices the disconnect only on one of its next writes
+        assert elapsed < 1
+        assert server.completion_tokens < 450
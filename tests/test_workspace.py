@@ -0,0 +1,62 @@
+"""
+Tests for the workspace context of the runs.
+"""
+import asyncio
+import os
+
+from benchmark import PipelineResponder
+from geai.fake_model_server import FakeModelServer
+from geai.ge_openai import ge_agent
+from geai.tools import workspace, workspace_tools
+
+import clanker
+
+
+class TestWorkspaceContext:
+    def test_concurrent_runs_use_their_own_workspace(self, tmp_path):
+        """The tools of every task resolve the paths against the workspace of their own run."""
+        async def run(name: str):
+            with workspace.use(str(tmp_path / name)):
+                await asyncio.sleep(0.01)
+                workspace_tools.write_file_impl("/name.txt", name)
+                await asyncio.sleep(0.01)
+                return workspace.current().folder
+
+        async def main():
+            return await asyncio.gather(run("a"), run("b"))
+
+        assert asyncio.run(main()) == [str(tmp_path / "a"), str(tmp_path / "b")]
+        assert (tmp_path / "a" / "name.txt").read_text() == "a"
+        assert (tmp_path / "b" / "name.txt").read_text() == "b"
+        assert workspace.current() is workspace.default_context
+
+    def test_same_folder_keeps_its_context(self, tmp_path):
+        """Entering the current workspace again keeps its caches."""
+        with workspace.use(str(tmp_path)) as context:
+            context.api_cache["x"] = ("digest", "api")
+
+            with workspace.use(str(tmp_path)) as inner:
+                assert inner is context
+
+            with workspace.use(str(tmp_path / "other")) as other:
+                assert other is not context
+                assert not other.api_cache
+
+    def test_concurrent_spec_pipelines(self, tmp_path, fake_model_client):
+        """Many specs run concurrently on one event loop, each into its own workspace."""
+        with open("spec_tests/list_c.txt", "rt", encoding="utf-8") as f:
+            spec = f.read()
+
+        responder = PipelineResponder(spec, invalid_percent=0)
+        folders = [str(tmp_path / f"w{i}") for i in range(3)]
+
+        with FakeModelServer(responder, latency=0, token_rate=0, prompt_token_rate=0) as server:
+            ge_agent.configure_client(server.base_url)
+
+            async def main():
+                await asyncio.gather(*[clanker.run_spec(spec, folder) for folder in folders])
+
+            asyncio.run(main())
+
+        for folder in folders:
+            assert sorted(os.listdir(folder)) == sorted(["SPEC.md"] + [f.lstrip("/") for f in responder.files])
@@ -0,0 +1,128 @@
+import contextlib
+import re
+from typing import Optional
+
+import structs
+from geai.ge_openai.ge_agent import GeAgent
+from geai.metrics import registry
+
+MAX_REASON_CHARS = 600
+
+# markup some models put in front of the verdict, e.g. `**VALID**`
+_LEADING_MARKUP = " \t\r\n*`#>"
+
+# the whole words only, `VALIDATION` isn't a verdict
+_INVALID = re.compile(r"INVALID\b")
+_VALID = re.compile(r"VALID\b")
+
+check_verdicts = registry.counter(
+    "geai_check_verdicts_total", "Number of streamed check verdicts, by verdict and if the stream was cut early.")
+
+
+class VerdictParser:
+    """
+    Decides a VALID/INVALID verdict incrementally, from the streamed answer of a
+    checker. The answer must start with the verdict:
+
+    * `VALID` is decided as soon as the word arrives, the rest is not needed,
+    * `INVALID: <reason>` is decided when the reason paragraph ends, or when the
+      reason reaches `max_reason_chars`,
+    * anything else is malformed, and decided as soon as it can't be a verdict
+      anymore. So is an `INVALID` without any reason.
+    """
+    def __init__(self, max_reason_chars: int = MAX_REASON_CHARS):
+        self.max_reason_chars = max_reason_chars
+        self.text = ""
+        self.decided = False
+        self.verdict: Optional[structs.SpecCheckResult] = None
+
+    def feed(self, delta: str) -> bool:
+        """
+        Adds the next piece of the answer.
+
+        :return: True if the verdict is decided, and the rest of the answer can be dropped.
+        """
+        if not self.decided:
+            self.text += delta
+            self._decide(final=False)
+
+        return self.decided
+
+    def finish(self) -> Optional[structs.SpecCheckResult]:
+        """
+        Ends the answer, and returns the verdict, or None if the answer was malformed.
+        """
+        if not self.decided:
+            self._decide(final=True)
+
+        return self.verdict
+
+    def _decide(self, final: bool) -> None:
+        head = self.text.lstrip(_LEADING_MARKUP)
+
+        # still a possible start of a verdict, e.g. "INV", or a whole one
+        # until the next character shows it's not the start of a longer word
+        if not final and ("INVALID".startswith(head) or "VALID".startswith(head)):
+            return
+
+        if _INVALID.match(head):
+            self._decide_invalid(head[len("INVALID"):], final)
+            return
+
+        if _VALID.match(head):
+            self._set_verdict(structs.SpecCheckResult(valid=True, reason=""))
+            return
+
+        self._set_verdict(None)
+
+    def _decide_invalid(self, rest: str, final: bool) -> None:
+        reason = rest.lstrip(" \t\r\n:-*`")
+
+        if len(reason) >= self.max_reason_chars:
+            reason = reason[:self.max_reason_chars]
+        elif "\n\n" in reason.rstrip():
+            reason = reason.split("\n\n", 1)[0]
+        elif not final:
+            return
+
+        reason = reason.strip()
+        self._set_verdict(structs.SpecCheckResult(valid=False, reason=reason) if reason else None)
+
+    def _set_verdict(self, verdict: Optional[structs.SpecCheckResult]) -> None:
+        self.decided = True
+        self.verdict = verdict
+
+
+def parse_verdict(text: str, max_reason_chars: int = MAX_REASON_CHARS) -> Optional[structs.SpecCheckResult]:
+    """
+    Parses a complete answer of a checker, see `VerdictParser`.
+    """
+    parser = VerdictParser(max_reason_chars)
+    parser.feed(text)
+
+    return parser.finish()
+
+
+async def stream_verdict(agent: GeAgent,
+                         user_input: str,
+                         max_reason_chars: int = MAX_REASON_CHARS) -> Optional[structs.SpecCheckResult]:
+    """
+    Runs the checker agent, and stops its generation as soon as the verdict is
+    decided.
+
+    :return: the verdict, or None if the answer was malformed.
+    """
+    parser = VerdictParser(max_reason_chars)
+    stopped_early = False
+
+    async with contextlib.aclosing(agent.async_run(user_input)) as deltas:
+        async for delta in deltas:
+            if parser.feed(delta):
+                stopped_early = True
+                break
+
+    verdict = parser.finish()
+    check_verdicts.inc(verdict="malformed" if verdict is None else "valid" if verdict.valid else "invalid",
+                       stopped_early=str(stopped_early).lower())
+
+    return verdict